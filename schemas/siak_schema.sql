@@ -2,7 +2,9 @@
 CREATE TABLE IF NOT EXISTS faculties (
     id SERIAL PRIMARY KEY,
     faculty_code VARCHAR(10) UNIQUE NOT NULL,
-    faculty_name VARCHAR(100) NOT NULL
+    faculty_name VARCHAR(100) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 -- Programs Table
 CREATE TABLE IF NOT EXISTS programs (
@@ -10,6 +12,8 @@ CREATE TABLE IF NOT EXISTS programs (
     program_code VARCHAR(10) UNIQUE NOT NULL,
     program_name VARCHAR(100) NOT NULL,
     faculty_id INTEGER NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (faculty_id) REFERENCES faculties(id)
 );
 -- Students Table
@@ -22,6 +26,8 @@ CREATE TABLE IF NOT EXISTS students (
     enrollment_date DATE NOT NULL,
     program_id INTEGER NOT NULL,
     is_active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (program_id) REFERENCES programs(id)
 );
 -- Lecturers Table
@@ -31,6 +37,8 @@ CREATE TABLE IF NOT EXISTS lecturers (
     name VARCHAR(100) NOT NULL,
     email VARCHAR(100) NOT NULL,
     faculty_id INTEGER NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (faculty_id) REFERENCES faculties(id)
 );
 -- Rooms Table
@@ -38,7 +46,9 @@ CREATE TABLE IF NOT EXISTS rooms (
     id SERIAL PRIMARY KEY,
     room_number VARCHAR(20) NOT NULL,
     building VARCHAR(50) NOT NULL,
-    capacity INTEGER NOT NULL
+    capacity INTEGER NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 -- Courses Table
 CREATE TABLE IF NOT EXISTS courses (
@@ -47,6 +57,8 @@ CREATE TABLE IF NOT EXISTS courses (
     course_name VARCHAR(100) NOT NULL,
     credits INTEGER NOT NULL,
     program_id INTEGER NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (program_id) REFERENCES programs(id)
 );
 -- Semesters Table (is_active removed)
@@ -55,7 +67,9 @@ CREATE TABLE IF NOT EXISTS semesters (
     semester_code VARCHAR(10) UNIQUE NOT NULL,
     semester_name VARCHAR(100) NOT NULL,
     start_date DATE NOT NULL,
-    end_date DATE NOT NULL
+    end_date DATE NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 -- Class Schedules Table
 CREATE TABLE IF NOT EXISTS class_schedules (
@@ -67,6 +81,8 @@ CREATE TABLE IF NOT EXISTS class_schedules (
     day_of_week VARCHAR(10) NOT NULL,
     start_time TIME NOT NULL,
     end_time TIME NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (course_id) REFERENCES courses(id),
     FOREIGN KEY (lecturer_id) REFERENCES lecturers(id),
     FOREIGN KEY (room_id) REFERENCES rooms(id),
@@ -79,6 +95,8 @@ CREATE TABLE IF NOT EXISTS registrations (
     course_id INTEGER NOT NULL,
     semester_id INTEGER NOT NULL,
     registration_date DATE NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (student_id) REFERENCES students(id),
     FOREIGN KEY (course_id) REFERENCES courses(id),
     FOREIGN KEY (semester_id) REFERENCES semesters(id),
@@ -90,6 +108,8 @@ CREATE TABLE IF NOT EXISTS grades (
     registration_id INTEGER NOT NULL,
     final_grade DECIMAL(5, 2),
     letter_grade VARCHAR(2),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (registration_id) REFERENCES registrations(id)
 );
 -- Semester Fees Table (payment_status removed)
@@ -99,6 +119,8 @@ CREATE TABLE IF NOT EXISTS semester_fees (
     semester_id INTEGER NOT NULL,
     fee_amount DECIMAL(10, 2) NOT NULL,
     payment_date DATE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (student_id) REFERENCES students(id),
     FOREIGN KEY (semester_id) REFERENCES semesters(id),
     UNIQUE (student_id, semester_id)
@@ -119,7 +141,66 @@ CREATE TABLE IF NOT EXISTS academic_records (
     total_credits INTEGER NOT NULL,
     -- Total credits earned so far
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (student_id) REFERENCES students(id),
     FOREIGN KEY (semester_id) REFERENCES semesters(id),
     UNIQUE (student_id, semester_id)
 );
+-- updated_at is the watermark of the incremental extract: bump it on every
+-- update that does not set it itself
+CREATE OR REPLACE FUNCTION touch_updated_at() RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.updated_at IS NOT DISTINCT FROM OLD.updated_at THEN
+        NEW.updated_at := CURRENT_TIMESTAMP;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+DROP TRIGGER IF EXISTS faculties_updated_at ON faculties;
+CREATE TRIGGER faculties_updated_at BEFORE UPDATE ON faculties
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+CREATE INDEX IF NOT EXISTS faculties_updated_at_idx ON faculties (updated_at);
+DROP TRIGGER IF EXISTS programs_updated_at ON programs;
+CREATE TRIGGER programs_updated_at BEFORE UPDATE ON programs
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+CREATE INDEX IF NOT EXISTS programs_updated_at_idx ON programs (updated_at);
+DROP TRIGGER IF EXISTS students_updated_at ON students;
+CREATE TRIGGER students_updated_at BEFORE UPDATE ON students
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+CREATE INDEX IF NOT EXISTS students_updated_at_idx ON students (updated_at);
+DROP TRIGGER IF EXISTS lecturers_updated_at ON lecturers;
+CREATE TRIGGER lecturers_updated_at BEFORE UPDATE ON lecturers
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+CREATE INDEX IF NOT EXISTS lecturers_updated_at_idx ON lecturers (updated_at);
+DROP TRIGGER IF EXISTS rooms_updated_at ON rooms;
+CREATE TRIGGER rooms_updated_at BEFORE UPDATE ON rooms
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+CREATE INDEX IF NOT EXISTS rooms_updated_at_idx ON rooms (updated_at);
+DROP TRIGGER IF EXISTS courses_updated_at ON courses;
+CREATE TRIGGER courses_updated_at BEFORE UPDATE ON courses
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+CREATE INDEX IF NOT EXISTS courses_updated_at_idx ON courses (updated_at);
+DROP TRIGGER IF EXISTS semesters_updated_at ON semesters;
+CREATE TRIGGER semesters_updated_at BEFORE UPDATE ON semesters
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+CREATE INDEX IF NOT EXISTS semesters_updated_at_idx ON semesters (updated_at);
+DROP TRIGGER IF EXISTS class_schedules_updated_at ON class_schedules;
+CREATE TRIGGER class_schedules_updated_at BEFORE UPDATE ON class_schedules
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+CREATE INDEX IF NOT EXISTS class_schedules_updated_at_idx ON class_schedules (updated_at);
+DROP TRIGGER IF EXISTS registrations_updated_at ON registrations;
+CREATE TRIGGER registrations_updated_at BEFORE UPDATE ON registrations
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+CREATE INDEX IF NOT EXISTS registrations_updated_at_idx ON registrations (updated_at);
+DROP TRIGGER IF EXISTS grades_updated_at ON grades;
+CREATE TRIGGER grades_updated_at BEFORE UPDATE ON grades
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+CREATE INDEX IF NOT EXISTS grades_updated_at_idx ON grades (updated_at);
+DROP TRIGGER IF EXISTS semester_fees_updated_at ON semester_fees;
+CREATE TRIGGER semester_fees_updated_at BEFORE UPDATE ON semester_fees
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+CREATE INDEX IF NOT EXISTS semester_fees_updated_at_idx ON semester_fees (updated_at);
+DROP TRIGGER IF EXISTS academic_records_updated_at ON academic_records;
+CREATE TRIGGER academic_records_updated_at BEFORE UPDATE ON academic_records
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+CREATE INDEX IF NOT EXISTS academic_records_updated_at_idx ON academic_records (updated_at);
@@ -133,6 +133,7 @@ CREATE TABLE fact_attendance (
     course_id INTEGER NOT NULL,
     class_id INTEGER NOT NULL,
     room_id INTEGER NOT NULL,
+    semester_id INTEGER NOT NULL,
     attendance_date DATE,
     check_in_time TIME,
     CONSTRAINT fact_attendance_unique_constraint UNIQUE (student_id, class_id, attendance_date),
@@ -1,191 +1,309 @@
-import uuid
-from datetime import datetime
-from typing import List, Tuple
-
-
-def calculate_gpa(grades, courses, registrations=None) -> Tuple[float, int]:
-    """Helper function to calculate GPA based on grades and courses"""
-    if not grades:
-        return 0.0, 0
-
-    total_points = 0
+from collections import defaultdict
+from typing import Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from src.generator.columnar import (
+    column,
+    date_column,
+    now_seconds,
+    rows,
+    timestamp_array,
+    uuid4_array,
+)
+from src.generator.tables import finish_table
+
+# Indonesian university grade points (E = 0.0)
+grade_points = {
+    "A": 4.0,
+    "A-": 3.7,
+    "B+": 3.3,
+    "B": 3.0,
+    "B-": 2.7,
+    "C+": 2.3,
+    "C": 2.0,
+    "D": 1.0,
+    "E": 0.0,
+}
+
+
+def _grade_totals(grades, course_by_registration, credits_by_course):
+    """Sum grade points × credits, credits and passed credits over grades"""
+    total_points = 0.0
     total_credits = 0
+    credits_passed = 0
 
     for grade in grades:
-        # Get the course for this grade
-        course_id = None
-        if registrations:  # Check if registrations is provided
-            for registration in registrations:
-                if registration["id"] == grade["registration_id"]:
-                    course_id = registration["course_id"]
-                    break
-
+        course_id = course_by_registration.get(grade["registration_id"])
         if course_id is None:
             continue
 
-        # Find the course credits
-        course_credits = 0
-        for course in courses:
-            if course["id"] == course_id:
-                course_credits = course["credits"]
-                break
-
-        # Calculate grade points
+        course_credits = credits_by_course.get(course_id, 0)
         letter_grade = grade["letter_grade"]
-        grade_point = 0.0
-
-        if letter_grade == "A":
-            grade_point = 4.0
-        elif letter_grade == "A-":
-            grade_point = 3.7
-        elif letter_grade == "B+":
-            grade_point = 3.3
-        elif letter_grade == "B":
-            grade_point = 3.0
-        elif letter_grade == "B-":
-            grade_point = 2.7
-        elif letter_grade == "C+":
-            grade_point = 2.3
-        elif letter_grade == "C":
-            grade_point = 2.0
-        elif letter_grade == "D":
-            grade_point = 1.0
-        # E = 0.0
-
-        # Add to totals
-        total_points += grade_point * course_credits
+
+        total_points += grade_points.get(letter_grade, 0.0) * course_credits
         total_credits += course_credits
+        # Only count grades better than F/E as passed
+        if letter_grade != "E":
+            credits_passed += course_credits
+
+    return total_points, total_credits, credits_passed
+
+
+def calculate_gpa(grades, courses, registrations=None) -> Tuple[float, int]:
+    """Helper function to calculate GPA based on grades and courses"""
+    if not grades or not registrations:
+        return 0.0, 0
+
+    course_by_registration = {r["id"]: r["course_id"] for r in registrations}
+    credits_by_course = {c["id"]: c["credits"] for c in courses}
+    total_points, total_credits, _ = _grade_totals(
+        grades, course_by_registration, credits_by_course
+    )
 
     if total_credits == 0:
         return 0.0, 0
 
-    gpa = total_points / total_credits
-    return gpa, total_credits
+    return total_points / total_credits, total_credits
 
 
 def generate_academic_record(
     students, semesters, registrations, grades, courses
-) -> List[dict]:
+) -> pa.Table:
     """
     Generate academic record entries for students
 
+    Registrations, grades and course credits are joined once through hash
+    indexes, so the cost grows linearly with the number of registrations.
+
     Args:
-        students: List of student dicts from student_faker
-        semesters: List of semester dicts from semester_faker
-        registrations: List of registration dicts from registration_faker
-        grades: List of grade dicts from grade_faker
-        courses: List of course dicts from course_faker
+        students: Student table from student_faker
+        semesters: Semester table from semester_faker
+        registrations: Registration table from registration_faker
+        grades: Grade table from grade_faker
+        courses: Course table from course_faker
 
     Returns:
-        List of dicts with keys: record_id, id, student_id, semester_id, semester_gpa,
+        Arrow table with columns: record_id, id, student_id, semester_id, semester_gpa,
                                 cumulative_gpa, semester_credits, credits_passed,
                                 total_credits, created_at, updated_at
     """
     result = []
     counter = 1
-    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    # Track student's cumulative data
-    student_data = {}
+    students, semesters, registrations, grades, courses = map(
+        rows, (students, semesters, registrations, grades, courses)
+    )
+
+    # Hash indexes, built once
+    credits_by_course = {c["id"]: c["credits"] for c in courses}
+    course_by_registration = {r["id"]: r["course_id"] for r in registrations}
+    grades_by_registration = defaultdict(list)
+    for grade in grades:
+        grades_by_registration[grade["registration_id"]].append(grade)
 
     # Group registrations by student and semester
-    student_semester_registrations = {}
+    student_semester_registrations = defaultdict(lambda: defaultdict(list))
     for reg in registrations:
-        student_id = reg["student_id"]
-        semester_id = reg["semester_id"]
+        student_semester_registrations[reg["student_id"]][reg["semester_id"]].append(
+            reg["id"]
+        )
 
-        if student_id not in student_semester_registrations:
-            student_semester_registrations[student_id] = {}
-
-        if semester_id not in student_semester_registrations[student_id]:
-            student_semester_registrations[student_id][semester_id] = []
-
-        student_semester_registrations[student_id][semester_id].append(reg["id"])
+    # Sort semesters chronologically
+    sorted_semesters = sorted(semesters, key=lambda x: x["start_date"])
 
     # Process each student
     for student in students:
         student_id = student["id"]
-        student_data[student_id] = {"cumulative_gpa": 0.0, "total_credits": 0}
+        if student_id not in student_semester_registrations:
+            continue
 
-        # Sort semesters chronologically
-        sorted_semesters = sorted(semesters, key=lambda x: x["start_date"])
+        semester_registrations = student_semester_registrations[student_id]
+        total_points = 0.0
+        total_credits = 0
 
-        # Process each semester
+        # Process each semester the student registered in
         for semester in sorted_semesters:
             semester_id = semester["id"]
-
-            # Skip if student has no registrations in this semester
-            if (
-                student_id not in student_semester_registrations
-                or semester_id not in student_semester_registrations[student_id]
-            ):
+            if semester_id not in semester_registrations:
                 continue
 
-            # Get student's registrations for this semester
-            semester_reg_ids = student_semester_registrations[student_id][semester_id]
-
-            # Get grades for these registrations
             semester_grades = [
-                g for g in grades if g["registration_id"] in semester_reg_ids
+                grade
+                for reg_id in semester_registrations[semester_id]
+                for grade in grades_by_registration.get(reg_id, ())
             ]
-
-            # Calculate semester GPA
-            semester_gpa, semester_credits = calculate_gpa(
-                semester_grades, courses, registrations
+            semester_points, semester_credits, credits_passed = _grade_totals(
+                semester_grades, course_by_registration, credits_by_course
+            )
+            semester_gpa = (
+                semester_points / semester_credits if semester_credits else 0.0
             )
 
-            # Calculate credits passed (only count grades better than F/E)
-            credits_passed = 0
-            for grade in semester_grades:
-                if grade["letter_grade"] != "E":
-                    # Find the course credits
-                    reg_id = grade["registration_id"]
-                    course_id = None
-                    for reg in registrations:
-                        if reg["id"] == reg_id:
-                            course_id = reg["course_id"]
-                            break
-
-                    if course_id:
-                        for course in courses:
-                            if course["id"] == course_id:
-                                credits_passed += course["credits"]
-                                break
-
-            # Update student's cumulative data
-            prev_total = student_data[student_id]["total_credits"]
-            new_total = prev_total + semester_credits
-
-            if new_total > 0:
-                # Weighted average for cumulative GPA
-                prev_gpa = student_data[student_id]["cumulative_gpa"]
-                new_gpa = (
-                    (prev_gpa * prev_total) + (semester_gpa * semester_credits)
-                ) / new_total
-            else:
-                new_gpa = 0.0
-
-            student_data[student_id]["cumulative_gpa"] = new_gpa
-            student_data[student_id]["total_credits"] = new_total
-
-            # Create academic record
-            # Use current_time for both created_at and updated_at to maintain consistency
+            # Cumulative GPA is the credit-weighted average of all semesters so far
+            total_points += semester_points
+            total_credits += semester_credits
+            cumulative_gpa = total_points / total_credits if total_credits else 0.0
 
             result.append(
                 {
-                    "record_id": str(uuid.uuid4()),
                     "id": counter,
                     "student_id": student_id,
                     "semester_id": semester_id,
                     "semester_gpa": round(semester_gpa, 2),
-                    "cumulative_gpa": round(new_gpa, 2),
+                    "cumulative_gpa": round(cumulative_gpa, 2),
                     "semester_credits": semester_credits,
                     "credits_passed": credits_passed,
-                    "total_credits": new_total,
-                    "created_at": current_time,
-                    "updated_at": current_time,
+                    "total_credits": total_credits,
                 }
             )
             counter += 1
 
-    return result
+    return finish_table("academic_records", result)
+
+
+def generate_academic_record_arrow(
+    students,
+    semesters,
+    registrations,
+    grades,
+    courses,
+    rng=None,
+    id_start=1,
+    current_time=None,
+) -> pa.Table:
+    """
+    Columnar equivalent of generate_academic_record
+
+    Grades are hash-joined to registrations and course credits, aggregated
+    with one Arrow group-by per (student, semester), and cumulative totals
+    come from a per-student running sum over the sorted groups.
+
+    Args:
+        students: Student dicts or Arrow table (id)
+        semesters: Semester dicts or Arrow table (id, start_date)
+        registrations: Registration dicts or Arrow table
+                       (id, student_id, course_id, semester_id)
+        grades: Grade dicts or Arrow table (registration_id, letter_grade)
+        courses: Course dicts or Arrow table (id, credits)
+        rng: numpy Generator, a fresh unseeded one is used by default
+        id_start: First value of the sequential id column
+        current_time: created_at/updated_at value, defaults to now
+
+    Returns:
+        Arrow table with the same columns as generate_academic_record
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+
+    registration_table = pa.table(
+        {
+            "registration_id": column(registrations, "id").astype(np.int64),
+            "student_id": column(registrations, "student_id").astype(np.int64),
+            "semester_id": column(registrations, "semester_id").astype(np.int64),
+            "course_id": column(registrations, "course_id").astype(np.int64),
+        }
+    )
+    course_table = pa.table(
+        {
+            "course_id": column(courses, "id").astype(np.int64),
+            "credits": column(courses, "credits").astype(np.int64),
+        }
+    )
+
+    letters = pa.array(column(grades, "letter_grade"), pa.string())
+    letter_index = pc.index_in(letters, value_set=pa.array(list(grade_points)))
+    points = np.array(list(grade_points.values()))[
+        pc.fill_null(letter_index, len(grade_points) - 1).to_numpy()
+    ]
+    grade_table = pa.table(
+        {
+            "registration_id": column(grades, "registration_id").astype(np.int64),
+            "points": points,
+            "passed": pc.not_equal(letters, "E"),
+        }
+    )
+
+    # Join grades -> registrations -> course credits once
+    graded = grade_table.join(registration_table, "registration_id").join(
+        course_table, "course_id"
+    )
+    credits = graded.column("credits")
+    graded = graded.append_column(
+        "weighted", pc.multiply(graded.column("points"), credits)
+    ).append_column("passed_credits", pc.if_else(graded.column("passed"), credits, 0))
+    totals = graded.group_by(["student_id", "semester_id"]).aggregate(
+        [("weighted", "sum"), ("credits", "sum"), ("passed_credits", "sum")]
+    )
+
+    # Every registered (student, semester) gets a record, graded or not
+    groups = (
+        registration_table.group_by(["student_id", "semester_id"])
+        .aggregate([])
+        .join(totals, ["student_id", "semester_id"], join_type="left outer")
+    )
+
+    student_ids = column(students, "id").astype(np.int64)
+    semester_ids = column(semesters, "id").astype(np.int64)
+    semester_rank = np.argsort(
+        np.argsort(date_column(semesters, "start_date"), kind="stable")
+    )
+
+    group_student = groups.column("student_id").to_numpy()
+    group_semester = groups.column("semester_id").to_numpy()
+
+    # Restrict to the requested students, ordered as given then by semester
+    student_sorter = np.argsort(student_ids)
+    student_pos = np.searchsorted(student_ids, group_student, sorter=student_sorter)
+    student_pos = np.minimum(student_pos, len(student_ids) - 1)
+    keep = student_ids[student_sorter[student_pos]] == group_student
+    student_pos = student_sorter[student_pos]
+
+    semester_sorter = np.argsort(semester_ids)
+    semester_pos = semester_sorter[
+        np.searchsorted(semester_ids, group_semester, sorter=semester_sorter)
+    ]
+    order = np.lexsort((semester_rank[semester_pos], student_pos))
+    order = order[keep[order]]
+
+    group_student = group_student[order]
+    weighted = pc.fill_null(groups.column("weighted_sum"), 0).to_numpy()[order]
+    semester_credits = pc.fill_null(groups.column("credits_sum"), 0).to_numpy()[order]
+    credits_passed = pc.fill_null(groups.column("passed_credits_sum"), 0).to_numpy()[
+        order
+    ]
+
+    # Per-student running totals: global cumsum minus the value before each
+    # student's first row
+    n = len(order)
+    starts = np.ones(n, dtype=bool)
+    starts[1:] = group_student[1:] != group_student[:-1]
+    start_index = np.maximum.accumulate(np.where(starts, np.arange(n), 0))
+    cum_points = np.cumsum(weighted)
+    cum_credits = np.cumsum(semester_credits)
+    total_points = cum_points - cum_points[start_index] + weighted[start_index]
+    total_credits = (
+        cum_credits - cum_credits[start_index] + semester_credits[start_index]
+    )
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        semester_gpa = np.where(semester_credits > 0, weighted / semester_credits, 0.0)
+        cumulative_gpa = np.where(total_credits > 0, total_points / total_credits, 0.0)
+
+    current_time = current_time if current_time is not None else now_seconds()
+
+    return pa.table(
+        {
+            "record_id": uuid4_array(rng, n),
+            "id": pa.array(np.arange(id_start, id_start + n, dtype=np.int64)),
+            "student_id": pa.array(group_student),
+            "semester_id": pa.array(group_semester[order]),
+            "semester_gpa": pa.array(np.round(semester_gpa, 2)),
+            "cumulative_gpa": pa.array(np.round(cumulative_gpa, 2)),
+            "semester_credits": pa.array(semester_credits),
+            "credits_passed": pa.array(credits_passed),
+            "total_credits": pa.array(total_credits),
+            "created_at": timestamp_array(current_time, n),
+            "updated_at": timestamp_array(current_time, n),
+        }
+    )
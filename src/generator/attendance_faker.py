@@ -10,30 +10,52 @@ through ETL processes.
 
 import random
 from datetime import datetime, timedelta
-from typing import Dict, List
+
+import numpy as np
+import pyarrow as pa
 from faker import Faker
 
+from src.generator.class_schedule_faker import days_of_week
+from src.generator.columnar import Rows, column, date_column, rows, seconds_column
+from src.generator.tables import finish_table
+
+# Weekday (Monday = 0) of the class schedule day names
+weekdays = {
+    **{day: i for i, day in enumerate(days_of_week)},
+    "Monday": 0,
+    "Tuesday": 1,
+    "Wednesday": 2,
+    "Thursday": 3,
+    "Friday": 4,
+    "Saturday": 5,
+    "Sunday": 6,
+}
+
 
 def generate_attendance(
     fake: Faker,
-    students: List[Dict],
-    class_schedules: List[Dict],
-    semesters: List[Dict],
+    students: Rows,
+    class_schedules: Rows,
+    semesters: Rows,
     count=None,
-) -> List[Dict]:
+) -> pa.Table:
     """
     Generate attendance records for class sessions
 
     Args:
-        students: List of student records
-        class_schedules: List of class schedule records
-        semesters: List of semester records
+        students: Student table
+        class_schedules: Class schedule table
+        semesters: Semester table
         count: Maximum number of attendance records to generate
         (default: automatic based on class schedule)
 
     Returns:
-        List of attendance records (limited to count if specified)
+        Arrow table of attendance records (limited to count if specified), with
+        the columns of generate_attendance_arrow
     """
+    students, class_schedules, semesters = map(
+        rows, (students, class_schedules, semesters)
+    )
     # If count is None, we'll generate an average of 14 meetings per class_schedule
     if count is None:
         count = len(class_schedules) * 14
@@ -74,16 +96,7 @@ def generate_attendance(
         meeting_date = fake.date_between_dates(semester_start, semester_end)
 
         # Align meeting day with class_schedule day_of_week
-        day_mapping = {
-            "Monday": 0,
-            "Tuesday": 1,
-            "Wednesday": 2,
-            "Thursday": 3,
-            "Friday": 4,
-            "Saturday": 5,
-            "Sunday": 6,
-        }
-        target_day = day_mapping.get(class_schedule["day_of_week"], 0)
+        target_day = weekdays.get(class_schedule["day_of_week"], 0)
         current_day = meeting_date.weekday()
         days_diff = (target_day - current_day) % 7
         meeting_date = meeting_date + timedelta(days=days_diff)
@@ -101,13 +114,16 @@ def generate_attendance(
             base_time = datetime.strptime(meeting_time, "%H:%M:%S")
             # Students usually arrive within 10 minutes before to 5 minutes after class start
             time_variation = timedelta(minutes=random.randint(-10, 5))
-            check_in_time = (base_time + time_variation).time().strftime("%H:%M:%S")
+            check_in_time = (base_time + time_variation).time()
 
             # Create attendance record
             attendance_record = {
+                "id": records_count + 1,
                 "student_id": student_id,
                 "course_id": course_id,
                 "class_schedule_id": class_schedule["id"],
+                "room_id": class_schedule["room_id"],
+                "semester_id": semester_id,
                 "meeting_date": meeting_date,
                 "check_in_time": check_in_time,
             }
@@ -120,4 +136,112 @@ def generate_attendance(
                 print(f"Generated {records_count} attendance records so far...")
 
     print(f"Completed generating {len(attendance_records)} attendance records")
-    return attendance_records
+    return finish_table("attendance", attendance_records)
+
+
+def generate_attendance_arrow(
+    registrations: Rows,
+    class_schedules: Rows,
+    semesters: Rows,
+    rng=None,
+    sessions=14,
+    presence_rate=0.8,
+) -> pa.Table:
+    """
+    Columnar attendance: one row per registration and attended meeting
+
+    Every registration is assigned one of the class schedules of its course
+    and semester, whose weekly meetings start on the schedule's weekday from
+    the semester start. Each meeting is attended with presence_rate and the
+    check-in time is 10 minutes before to 5 minutes after class start.
+
+    Ids are derived from the registration id and the meeting number, so
+    blocks of registrations can be generated independently.
+
+    Args:
+        registrations: Registration dicts or Arrow table
+                      (id, student_id, course_id, semester_id)
+        class_schedules: Class schedule dicts or Arrow table
+                        (id, course_id, semester_id, room_id, day_of_week, start_time)
+        semesters: Semester dicts or Arrow table (id, start_date)
+        rng: numpy Generator, a fresh unseeded one is used by default
+        sessions: Meetings per class
+        presence_rate: Probability of a student attending a meeting
+
+    Returns:
+        Arrow table with columns: id, student_id, course_id, class_schedule_id,
+                                room_id, semester_id, meeting_date, check_in_time
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    registration_ids = column(registrations, "id").astype(np.int64)
+    student_ids = column(registrations, "student_id").astype(np.int64)
+    course_ids = column(registrations, "course_id").astype(np.int64)
+    semester_ids = column(registrations, "semester_id").astype(np.int64)
+
+    schedule_ids = column(class_schedules, "id").astype(np.int64)
+    schedule_courses = column(class_schedules, "course_id").astype(np.int64)
+    schedule_semesters = column(class_schedules, "semester_id").astype(np.int64)
+    room_ids = column(class_schedules, "room_id").astype(np.int64)
+    weekday = np.array(
+        [weekdays.get(d, 0) for d in column(class_schedules, "day_of_week")],
+        dtype=np.int64,
+    )
+    start_seconds = seconds_column(class_schedules, "start_time")
+
+    # Class schedules grouped by (course, semester), CSR-style
+    n_semester_keys = max(
+        semester_ids.max(initial=0), schedule_semesters.max(initial=0)
+    )
+    schedule_key = schedule_courses * (n_semester_keys + 1) + schedule_semesters
+    order = np.argsort(schedule_key, kind="stable")
+    sorted_key = schedule_key[order]
+    key = course_ids * (n_semester_keys + 1) + semester_ids
+    lo = np.searchsorted(sorted_key, key, "left")
+    count = np.searchsorted(sorted_key, key, "right") - lo
+
+    # Registrations without a class are not attended
+    has_class = count > 0
+    schedule = order[
+        lo[has_class]
+        + (rng.random(has_class.sum()) * count[has_class]).astype(np.int64)
+    ]
+    registration_ids = registration_ids[has_class]
+    student_ids = student_ids[has_class]
+    semester_ids = semester_ids[has_class]
+
+    # First meeting: the schedule's weekday on/after the semester start
+    semester_order = np.argsort(column(semesters, "id").astype(np.int64))
+    semester_start = date_column(semesters, "start_date")[semester_order]
+    start = semester_start[
+        np.searchsorted(
+            column(semesters, "id").astype(np.int64)[semester_order], semester_ids
+        )
+    ]
+    # 1970-01-01 was a Thursday (weekday 3)
+    start_weekday = (start.astype(np.int64) + 3) % 7
+    first_meeting = start + ((weekday[schedule] - start_weekday) % 7).astype(
+        "timedelta64[D]"
+    )
+
+    # One candidate row per registration and meeting, keep the attended ones
+    meeting = np.tile(np.arange(sessions, dtype=np.int64), len(schedule))
+    row = np.repeat(np.arange(len(schedule)), sessions)
+    attended = rng.random(len(row)) < presence_rate
+    meeting, row = meeting[attended], row[attended]
+
+    meeting_date = first_meeting[row] + (7 * meeting).astype("timedelta64[D]")
+    # Students usually arrive within 10 minutes before to 5 minutes after class start
+    check_in = start_seconds[schedule[row]] + 60 * rng.integers(-10, 6, len(row))
+
+    return pa.table(
+        {
+            "id": pa.array((registration_ids[row] - 1) * sessions + meeting + 1),
+            "student_id": pa.array(student_ids[row]),
+            "course_id": pa.array(schedule_courses[schedule[row]]),
+            "class_schedule_id": pa.array(schedule_ids[schedule[row]]),
+            "room_id": pa.array(room_ids[schedule[row]]),
+            "semester_id": pa.array(semester_ids[row]),
+            "meeting_date": pa.array(meeting_date),
+            "check_in_time": pa.array(check_in.astype(np.int32), pa.time32("s")),
+        }
+    )
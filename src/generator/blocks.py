@@ -0,0 +1,217 @@
+"""
+Block-wise (sharded) generation of the large tables.
+
+Registrations, grades, semester fees, academic records and attendance only
+ever relate a row to a single student, so they can be generated independently per
+contiguous block of students. Blocks run in worker processes that attach
+to the reference tables published through src.generator.shared.
+
+Every block is a self-contained shard: the plan depends only on the table
+sizes and the batch size, each block owns a disjoint id range reserved up
+front, and its random stream is a SeedSequence child of the run seed keyed
+by the block index. Regenerating block k therefore gives the same output
+on any machine and with any number of workers.
+"""
+
+import os
+import random
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+
+from src.generator.academic_record_faker import generate_academic_record_arrow
+from src.generator.attendance_faker import generate_attendance_arrow
+from src.generator.columnar import now_seconds
+from src.generator.grade_faker import generate_grade_arrow
+from src.generator.registration_faker import (
+    generate_registration,
+    generate_registration_arrow,
+)
+from src.generator.semester_fees_faker import generate_semester_fees_arrow
+from src.generator.shared import SharedTables, attach
+
+BLOCK_TABLES = ["registrations", "grades", "semester_fees", "academic_records"]
+SHARED_TABLES = ["students", "courses", "semesters", "programs", "class_schedules"]
+
+
+class Block(NamedTuple):
+    index: int
+    start: int  # students[start:stop]
+    stop: int
+    registrations: int
+    # Registration (and grade) ids: [registration_id_start, +registrations)
+    registration_id_start: int
+    # Fee and academic record ids: [row_id_start, +students × semesters)
+    row_id_start: int
+
+
+def plan_student_blocks(
+    n_students: int, n_registrations: int, n_semesters: int, batch_size: int
+) -> List[Block]:
+    """
+    Split students into contiguous blocks that each get about batch_size
+    registrations, and reserve each block's id ranges.
+    """
+    per_student = n_registrations / max(n_students, 1)
+    block_size = max(1, int(batch_size / per_student)) if per_student else n_students
+    block_size = max(block_size, 1)
+
+    blocks = []
+    for index, start in enumerate(range(0, n_students, block_size)):
+        stop = min(start + block_size, n_students)
+        # Registrations are spread over blocks in proportion to their students
+        registration_start = round(n_registrations * start / n_students)
+        registration_stop = round(n_registrations * stop / n_students)
+        blocks.append(
+            Block(
+                index=index,
+                start=start,
+                stop=stop,
+                registrations=registration_stop - registration_start,
+                registration_id_start=registration_start + 1,
+                # At most one fee/record per student and semester
+                row_id_start=start * n_semesters + 1,
+            )
+        )
+    return blocks
+
+
+def block_seed(entropy: int, index: int) -> np.random.SeedSequence:
+    """The block's child of the run seed, same as SeedSequence(entropy).spawn"""
+    return np.random.SeedSequence(entropy, spawn_key=(index,))
+
+
+def generate_block(
+    paths: Dict[str, str],
+    block: Block,
+    entropy: int,
+    current_time: np.datetime64,
+    attendance: bool = False,
+) -> Dict[str, pa.Table]:
+    """Generate the large tables for one block of students"""
+    students = attach(paths["students"]).slice(block.start, block.stop - block.start)
+    courses = attach(paths["courses"])
+    semesters = attach(paths["semesters"])
+
+    rng = np.random.default_rng(block_seed(entropy, block.index))
+
+    registrations = generate_registration_arrow(
+        students,
+        courses,
+        semesters,
+        block.registrations,
+        rng,
+        block.registration_id_start,
+        current_time,
+    )
+    # Grade ids follow their registration's id
+    grades = generate_grade_arrow(
+        registrations, rng, block.registration_id_start, current_time
+    )
+    semester_fees = generate_semester_fees_arrow(
+        students,
+        semesters,
+        attach(paths["programs"]),
+        rng,
+        block.row_id_start,
+        current_time,
+    )
+    academic_records = generate_academic_record_arrow(
+        students,
+        semesters,
+        registrations,
+        grades,
+        courses,
+        rng,
+        block.row_id_start,
+        current_time,
+    )
+
+    tables = {
+        "registrations": registrations,
+        "grades": grades,
+        "semester_fees": semester_fees,
+        "academic_records": academic_records,
+    }
+    if attendance:
+        # A stream of its own, so the other tables are the same with or
+        # without attendance
+        attendance_rng = np.random.default_rng(
+            np.random.SeedSequence(entropy, spawn_key=(block.index, 1))
+        )
+        tables["attendance"] = generate_attendance_arrow(
+            registrations,
+            attach(paths["class_schedules"]),
+            semesters,
+            attendance_rng,
+        )
+    return tables
+
+
+def generate_registration_chunk(
+    paths: Dict[str, str], n: int, id_start: int, seed: int
+) -> pa.Table:
+    """Run the dict-based registration generator on shared reference tables"""
+    random.seed(seed)
+    return generate_registration(
+        attach(paths["students"]),
+        attach(paths["courses"]),
+        attach(paths["semesters"]),
+        n,
+        id_start,
+    )
+
+
+def iter_blocks(
+    reference: Dict[str, pa.Table],
+    n_registrations: int,
+    batch_size: int,
+    workers: Optional[int] = None,
+    entropy: Optional[int] = None,
+    current_time: Optional[np.datetime64] = None,
+    only: Optional[Iterable[int]] = None,
+    attendance: bool = False,
+) -> Iterator[Tuple[Block, Dict[str, pa.Table]]]:
+    """
+    Generate the large tables block by block across a process pool and
+    yield (block, tables) in block order.
+
+    The reference tables are published once through shared memory, and at
+    most two blocks per worker are in flight so memory stays bounded.
+    `only` restricts generation to the given block indexes, `attendance`
+    adds an attendance table to every block.
+    """
+    blocks = plan_student_blocks(
+        len(reference["students"]),
+        n_registrations,
+        len(reference["semesters"]),
+        batch_size,
+    )
+    if only is not None:
+        wanted = set(only)
+        blocks = [block for block in blocks if block.index in wanted]
+
+    entropy = entropy if entropy is not None else np.random.SeedSequence().entropy
+    current_time = current_time if current_time is not None else now_seconds()
+    workers = workers or os.cpu_count()
+
+    with SharedTables() as shared, ProcessPoolExecutor(workers) as executor:
+        paths = {name: shared.publish(name, reference[name]) for name in SHARED_TABLES}
+        window = 2 * workers
+        pending = deque()
+
+        for block in blocks:
+            future = executor.submit(
+                generate_block, paths, block, entropy, current_time, attendance
+            )
+            pending.append((block, future))
+            if len(pending) >= window:
+                block, future = pending.popleft()
+                yield block, future.result()
+
+        while pending:
+            block, future = pending.popleft()
+            yield block, future.result()
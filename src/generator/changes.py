@@ -0,0 +1,307 @@
+"""
+Incremental change batches on top of a generated snapshot.
+
+A change batch is what the SIAK source sees when a new semester starts:
+
+- the new semester is added
+- students who finished their studies, or dropped out, are deactivated
+- active students register for courses in the new semester
+- outstanding courses of the previous semester are graded or withdrawn,
+  and that semester's academic records are recomputed
+- outstanding semester fees are paid and the new semester is billed
+
+Each table's changes are split into insert, update and delete sets. Updates
+and deletes carry whole rows (updates with a bumped updated_at), so a batch
+can be merged by id into a snapshot, a lake table or the source database.
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from src.generator.academic_record_faker import generate_academic_record_arrow
+from src.generator.columnar import (
+    cast_array,
+    cast_table,
+    column,
+    date_column,
+    now_seconds,
+    timestamp_array,
+)
+from src.generator.grade_faker import generate_grade_arrow
+from src.generator.registration_faker import generate_registration_arrow
+from src.generator.semester_faker import generate_next_semester
+from src.generator.semester_fees_faker import generate_semester_fees_arrow
+
+# Tables a change batch touches, in foreign key order
+CHANGE_TABLES = [
+    "semesters",
+    "students",
+    "registrations",
+    "grades",
+    "semester_fees",
+    "academic_records",
+]
+OPERATIONS = ["insert", "update", "delete"]
+
+# {table: {operation: rows}}
+ChangeBatch = Dict[str, Dict[str, pa.Table]]
+
+# Students graduate after 8 semesters, a few drop out every semester
+study_semesters = 8
+graduation_rate = 0.9
+dropout_rate = 0.01
+# Share of the previous semester's ungraded registrations that are withdrawn
+withdrawal_rate = 0.3
+# Share of the outstanding fees paid when the semester starts
+payment_rate = 0.8
+
+
+def conform(table: pa.Table, schema: pa.Schema) -> pa.Table:
+    """Cast generated rows to the column order and types of a snapshot table"""
+    return cast_table(table, schema)
+
+
+def touch(table: pa.Table, current_time: np.datetime64) -> pa.Table:
+    """Set updated_at of every row to current_time"""
+    index = table.schema.get_field_index("updated_at")
+    field = table.schema.field(index)
+    updated_at = timestamp_array(current_time, table.num_rows)
+    return table.set_column(index, field, cast_array(updated_at, field.type))
+
+
+def set_column(table: pa.Table, name: str, values) -> pa.Table:
+    index = table.schema.get_field_index(name)
+    field = table.schema.field(index)
+    return table.set_column(index, field, pa.array(values).cast(field.type))
+
+
+def next_id(table: pa.Table) -> int:
+    return (pc.max(table.column("id")).as_py() or 0) + 1
+
+
+def generate_change_batch(
+    tables: Dict[str, pa.Table],
+    rng: Optional[np.random.Generator] = None,
+    current_time: Optional[np.datetime64] = None,
+    n_registrations: Optional[int] = None,
+) -> ChangeBatch:
+    """
+    Generate the changes of starting a new semester
+
+    Args:
+        tables: Snapshot of at least semesters, students, programs, courses,
+                registrations, grades, semester_fees and academic_records
+        rng: numpy Generator, a fresh unseeded one is used by default
+        current_time: created_at/updated_at of the changes, defaults to now
+        n_registrations: New registrations (default: as many as the previous
+                         semester had)
+
+    Returns:
+        Dict of table name to {"insert" | "update" | "delete": rows}, rows
+        having the snapshot table's schema
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    current_time = current_time if current_time is not None else now_seconds()
+    batch: ChangeBatch = {name: {} for name in CHANGE_TABLES}
+
+    semesters = tables["semesters"]
+    students = tables["students"]
+    registrations = tables["registrations"]
+    grades = tables["grades"]
+    fees = tables["semester_fees"]
+    records = tables["academic_records"]
+
+    # The new semester follows the latest one
+    previous = semesters.slice(
+        int(np.argmax(date_column(semesters, "start_date"))), 1
+    ).to_pylist()[0]
+    previous_id = previous["id"]
+    new_semester = conform(
+        generate_next_semester(
+            {**previous, "id": next_id(semesters) - 1}, current_time, rng
+        ),
+        semesters.schema,
+    )
+    batch["semesters"]["insert"] = new_semester
+    semester_id = next_id(semesters)
+
+    # Graduations and dropouts
+    semester_start = date_column(new_semester, "start_date")[0]
+    enrolled_days = (semester_start - date_column(students, "enrollment_date")).astype(
+        np.int64
+    )
+    active = column(students, "is_active").astype(bool)
+    leaving = active & (
+        (
+            (enrolled_days >= study_semesters * 182)
+            & (rng.random(students.num_rows) < graduation_rate)
+        )
+        | (rng.random(students.num_rows) < dropout_rate)
+    )
+    batch["students"]["update"] = touch(
+        set_column(students.filter(leaving), "is_active", [False] * leaving.sum()),
+        current_time,
+    )
+    active_students = students.filter(active & ~leaving)
+
+    # Registrations of the previous semester still waiting for a grade are
+    # either graded now or withdrawn
+    previous_registrations = registrations.filter(
+        column(registrations, "semester_id") == previous_id
+    )
+    outstanding = previous_registrations.filter(
+        ~np.isin(
+            column(previous_registrations, "id"), column(grades, "registration_id")
+        )
+    )
+    withdrawn = rng.random(outstanding.num_rows) < withdrawal_rate
+    batch["registrations"]["delete"] = outstanding.filter(withdrawn)
+    new_grades = conform(
+        generate_grade_arrow(
+            outstanding.filter(~withdrawn),
+            rng,
+            next_id(grades),
+            current_time,
+            ungraded_rate=0,
+        ),
+        grades.schema,
+    )
+    batch["grades"]["insert"] = new_grades
+
+    n_registrations = (
+        n_registrations
+        if n_registrations is not None
+        else previous_registrations.num_rows
+    )
+    batch["registrations"]["insert"] = conform(
+        generate_registration_arrow(
+            active_students,
+            tables["courses"],
+            new_semester,
+            n_registrations,
+            rng,
+            next_id(registrations),
+            current_time,
+        ),
+        registrations.schema,
+    )
+
+    # Records of the students whose outstanding courses were settled are
+    # recomputed, and registered students get one for the new semester; both
+    # over the students' whole history
+    settled = np.unique(column(outstanding, "student_id"))
+    affected = np.union1d(
+        settled, column(batch["registrations"]["insert"], "student_id")
+    )
+    history = pa.concat_tables(
+        [
+            registrations.filter(
+                np.isin(column(registrations, "student_id"), affected)
+                & ~np.isin(
+                    column(registrations, "id"),
+                    column(batch["registrations"]["delete"], "id"),
+                )
+            ),
+            batch["registrations"]["insert"],
+        ]
+    )
+    all_grades = pa.concat_tables([grades, new_grades])
+    recomputed = generate_academic_record_arrow(
+        students.filter(np.isin(column(students, "id"), affected)),
+        pa.concat_tables([semesters, new_semester]),
+        history,
+        all_grades.filter(
+            np.isin(column(all_grades, "registration_id"), column(history, "id"))
+        ),
+        tables["courses"],
+        rng,
+        next_id(records),
+        current_time,
+    )
+    batch["academic_records"]["insert"] = conform(
+        recomputed.filter(column(recomputed, "semester_id") == semester_id),
+        records.schema,
+    )
+
+    keys = ["student_id", "semester_id"]
+    values = [
+        name
+        for name in recomputed.column_names
+        if name not in ("record_id", "id", "created_at", "updated_at")
+    ]
+    recomputed = recomputed.filter(column(recomputed, "semester_id") == previous_id)
+    settled_records = records.filter(
+        (column(records, "semester_id") == previous_id)
+        & np.isin(column(records, "student_id"), settled)
+    )
+    batch["academic_records"]["update"] = touch(
+        conform(
+            settled_records.drop_columns(
+                [name for name in values if name not in keys]
+            ).join(recomputed.select(values), keys),
+            records.schema,
+        ),
+        current_time,
+    )
+    # Students whose outstanding courses were all withdrawn
+    batch["academic_records"]["delete"] = settled_records.join(
+        recomputed.select(keys), keys, join_type="left anti"
+    ).select(records.schema.names)
+
+    # Outstanding fees are paid within the two weeks before the new semester
+    # starts; a business date, unlike current_time
+    unpaid = fees.filter(pc.is_null(fees.column("payment_timestamp")))
+    paying = unpaid.filter(rng.random(unpaid.num_rows) < payment_rate)
+    seconds_ago = rng.integers(1, 14 * 86400, paying.num_rows)
+    batch["semester_fees"]["update"] = touch(
+        set_column(
+            paying,
+            "payment_timestamp",
+            semester_start.astype("datetime64[s]")
+            - seconds_ago.astype("timedelta64[s]"),
+        ),
+        current_time,
+    )
+    batch["semester_fees"]["insert"] = conform(
+        generate_semester_fees_arrow(
+            active_students,
+            new_semester,
+            tables["programs"],
+            rng,
+            next_id(fees),
+            current_time,
+        ),
+        fees.schema,
+    )
+
+    return {
+        name: {op: rows for op, rows in changes.items() if rows.num_rows}
+        for name, changes in batch.items()
+    }
+
+
+def merge_change_batch(
+    tables: Dict[str, pa.Table], batch: ChangeBatch
+) -> Dict[str, pa.Table]:
+    """Apply a change batch to a snapshot, matching rows by id"""
+    merged = dict(tables)
+    for name, changes in batch.items():
+        table = tables[name]
+        replaced = [
+            column(changes[op], "id") for op in ("update", "delete") if op in changes
+        ]
+        if replaced:
+            table = table.filter(
+                pc.invert(
+                    pc.is_in(
+                        table.column("id"), value_set=pa.array(np.concatenate(replaced))
+                    )
+                )
+            )
+        merged[name] = pa.concat_tables(
+            [table] + [changes[op] for op in ("update", "insert") if op in changes]
+        )
+    return merged
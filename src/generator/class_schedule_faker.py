@@ -1,6 +1,13 @@
+import logging
+import math
 import random
-import uuid
 from datetime import datetime, time
+from typing import List, Optional, Tuple
+
+from src.generator.columnar import rows
+from src.generator.tables import finish_table
+
+logger = logging.getLogger(__name__)
 
 # UI uses Monday-Friday (Senin-Jumat) with occasional Saturday classes
 days_of_week = ["Senin", "Selasa", "Rabu", "Kamis", "Jumat", "Sabtu"]
@@ -26,74 +33,177 @@ class_time_slots = [
     (time(16, 0), time(18, 30)),  # Extended late afternoon: 16:00 - 18:30 (3 SKS)
 ]
 
+# Bitmasks over class_time_slots: regular slots are indices 0-6, extended 7-10
+regular_slots = sum(1 << s for s in range(7))
+extended_slots = sum(1 << s for s in range(7, len(class_time_slots)))
+
+# For each slot, the mask of slots whose time range overlaps it (itself included)
+slot_overlaps = [
+    sum(
+        1 << j
+        for j, (other_start, other_end) in enumerate(class_time_slots)
+        if start < other_end and other_start < end
+    )
+    for start, end in class_time_slots
+]
+
+# Set bit positions of every possible slot mask, to pick a free slot in O(1)
+_mask_slots = [
+    tuple(s for s in range(len(class_time_slots)) if mask >> s & 1)
+    for mask in range(1 << len(class_time_slots))
+]
+
+
+class SlotIndex:
+    """
+    Free-slot index for a set of rooms over a set of semesters.
+
+    Every (semester, room, day) cell keeps a bitmap of the slots that are
+    blocked, i.e. taken or overlapping a taken slot, so an extended session
+    also blocks the regular sessions it runs into. Cells that still have a
+    free regular (or extended) slot on some day are kept in an open list
+    with swap-removal, so allocation never retries. Free slots of each kind
+    are counted as they get blocked.
+    """
+
+    def __init__(self, n_semesters: int, n_rooms: int, n_days: int = 6):
+        self.n_rooms = n_rooms
+        self.n_days = n_days
+        n_cells = n_semesters * n_rooms
+        self.blocked = [[0] * n_days for _ in range(n_cells)]
+        self.open = {
+            mask: list(range(n_cells)) for mask in (regular_slots, extended_slots)
+        }
+        self.position = {mask: list(range(n_cells)) for mask in self.open}
+        self.free = {mask: mask.bit_count() * n_cells * n_days for mask in self.open}
+
+    def free_slots(self, extended: bool) -> int:
+        """
+        Free slots of the given kind, summed over all cells and days
+
+        Slots of one kind never overlap each other, so this is exactly how
+        many more sessions of that kind fit, as long as none of the other
+        kind is allocated in between.
+        """
+        return self.free[extended_slots if extended else regular_slots]
+
+    def allocate(
+        self, extended: bool, weights: List[int]
+    ) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Take a random free slot of the given kind.
+
+        Args:
+            extended: Whether to allocate an extended (3 SKS) slot
+            weights: Relative weight of each day
+
+        Returns:
+            (semester position, room position, day position, slot index), or
+            None when no room has a free slot of that kind left
+        """
+        options = extended_slots if extended else regular_slots
+        open_cells = self.open[options]
+        if not open_cells:
+            return None
+
+        cell = random.choice(open_cells)
+        blocked = self.blocked[cell]
+        # Only days with a free slot of this kind can be picked
+        day_weights = [w if options & ~blocked[d] else 0 for d, w in enumerate(weights)]
+        day = random.choices(range(self.n_days), weights=day_weights)[0]
+        slot = random.choice(_mask_slots[options & ~blocked[day]])
+
+        newly_blocked = slot_overlaps[slot] & ~blocked[day]
+        for mask in self.free:
+            self.free[mask] -= (newly_blocked & mask).bit_count()
+        blocked[day] |= slot_overlaps[slot]
+        for mask in self.open:
+            if not any(mask & ~b for b in blocked):
+                self._close(mask, cell)
+
+        semester, room = divmod(cell, self.n_rooms)
+        return semester, room, day, slot
+
+    def _close(self, mask: int, cell: int) -> None:
+        open_cells, position = self.open[mask], self.position[mask]
+        i = position[cell]
+        if i < 0:
+            return
+        last = open_cells.pop()
+        if last != cell:
+            open_cells[i] = last
+            position[last] = i
+        position[cell] = -1
+
 
 def generate_class_schedule(courses, lecturers, rooms, semesters, n=200):
     """
     Generate n random class schedule entries
 
     Args:
-        courses: List of course dicts from course_faker
-        lecturers: List of lecturer dicts from lecturer_faker
-        rooms: List of room dicts from room_faker
-        semesters: List of semester dicts from semester_faker
+        courses: Course table from course_faker
+        lecturers: Lecturer table from lecturer_faker
+        rooms: Room table from room_faker
+        semesters: Semester table from semester_faker
         n: Number of class schedules to generate
 
     Returns:
-        List of dicts with keys: schedule_id, id, course_id, lecturer_id, room_id, semester_id,
+        Arrow table with columns: schedule_id, id, course_id, lecturer_id, room_id, semester_id,
                                 day_of_week, start_time, end_time, start_time_delta, end_time_delta,
                                 created_at, updated_at
     """
     result = []
-    used_slots = set()  # To avoid room and time conflicts
-    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    courses, lecturers, rooms, semesters = map(
+        rows, (courses, lecturers, rooms, semesters)
+    )
 
-    for i in range(1, n + 1):
-        # Select random entities
+    index = SlotIndex(len(semesters), len(rooms), len(days_of_week))
+
+    # Draw every course first and split them by the kind of slot they need:
+    # extended for 3+ credits
+    drawn = {True: [], False: []}
+    for _ in range(n):
         course = random.choice(courses)
+        drawn[course.get("credits", 2) >= 3].append(course)
+    regular_per_extended = len(drawn[False]) / max(len(drawn[True]), 1)
+
+    # Extended sessions go first, as long as the regular slots left still
+    # hold the regular courses drawn alongside them. Regular ones then take
+    # what is left, so when rooms run out both kinds are cut in proportion
+    # and the course mix stays that of the catalog.
+    allocations = []
+    for course in drawn[True]:
+        needed = math.ceil((len(allocations) + 1) * regular_per_extended)
+        if not index.free_slots(True) or index.free_slots(False) < needed:
+            break
+        allocations.append((course, index.allocate(True, day_weights)))
+    n_extended = len(allocations)
+    n_regular = len(drawn[False])
+    if n_extended < len(drawn[True]):
+        n_regular = math.ceil(n_extended * regular_per_extended)
+    n_regular = min(n_regular, index.free_slots(False))
+    allocations.extend(
+        (course, index.allocate(False, day_weights))
+        for course in drawn[False][:n_regular]
+    )
+
+    if len(allocations) < n:
+        logger.warning(
+            f"{len(rooms)} rooms over {len(semesters)} semesters fit "
+            f"{len(allocations)} of {n} class schedules ({n_extended} of "
+            f"{len(drawn[True])} extended, {n_regular} of {len(drawn[False])} "
+            "regular), generating those"
+        )
+    # Mix both kinds again before numbering
+    random.shuffle(allocations)
+
+    for course, allocation in allocations:
         lecturer = random.choice(lecturers)
-        room = random.choice(rooms)
-        semester = random.choice(semesters)
-
-        # Maximum attempts to find a non-conflicting slot
-        max_attempts = 50
-        attempts = 0
-
-        while attempts < max_attempts:
-            # Select day with weighted probability (less classes on Friday, minimal on Saturday)
-            day = random.choices(days_of_week, weights=day_weights, k=1)[0]
-
-            # Select time slot based on course credits if available
-            course_credits = 2  # Default to 2 credits if not found
-            for c in courses:
-                if c["id"] == course["id"] and "credits" in c:
-                    course_credits = c["credits"]
-                    break
-
-            # Choose appropriate time slot based on credits
-            if course_credits >= 3:
-                # Use extended slots for 3+ credit courses
-                slot_options = class_time_slots[
-                    7:
-                ]  # Extended slots are at indices 7-10
-            else:
-                # Use regular slots for 1-2 credit courses
-                slot_options = class_time_slots[:7]  # Regular slots are at indices 0-6
-
-            start_time, end_time = random.choice(slot_options)
-
-            # Create a unique key for this time slot and room
-            slot_key = f"{semester['id']}-{room['id']}-{day}-{start_time}"
-
-            # Check if this slot is already used
-            if slot_key not in used_slots:
-                used_slots.add(slot_key)
-                break
-
-            attempts += 1
-
-        # If we couldn't find a non-conflicting slot, skip this entry
-        if attempts >= max_attempts:
-            continue
+        semester_pos, room_pos, day_pos, slot = allocation
+        semester = semesters[semester_pos]
+        room = rooms[room_pos]
+        day = days_of_week[day_pos]
+        start_time, end_time = class_time_slots[slot]
 
         # Create timestamp versions of start_time and end_time for Delta Lake compatibility
         # Using a reference date (2000-01-01) to convert time to timestamp
@@ -103,24 +213,17 @@ def generate_class_schedule(courses, lecturers, rooms, semesters, n=200):
 
         result.append(
             {
-                "schedule_id": str(uuid.uuid4()),
-                "id": i,
+                "id": len(result) + 1,
                 "course_id": course["id"],
                 "lecturer_id": lecturer["id"],
                 "room_id": room["id"],
                 "semester_id": semester["id"],
                 "day_of_week": day,
-                "start_time": start_time.strftime("%H:%M:%S"),
-                "end_time": end_time.strftime("%H:%M:%S"),
-                "start_time_delta": start_time_delta.strftime("%Y-%m-%d %H:%M:%S"),
-                "end_time_delta": end_time_delta.strftime("%Y-%m-%d %H:%M:%S"),
-                "created_at": current_time,
-                "updated_at": current_time,
+                "start_time": start_time,
+                "end_time": end_time,
+                "start_time_delta": start_time_delta,
+                "end_time_delta": end_time_delta,
             }
         )
 
-        # Stop if we've generated enough schedules
-        if len(result) >= n:
-            break
-
-    return result
+    return finish_table("class_schedules", result)
@@ -0,0 +1,173 @@
+"""
+Helpers shared by the NumPy-backed (columnar) generators.
+
+The columnar generators draw whole columns at once and hand back Arrow
+tables instead of lists of dicts. Reference inputs (students, courses,
+semesters, ...) can be given either as the usual list of dicts or as an
+Arrow table.
+
+Generated tables use compact types (see src.generator.tables): UUIDs are
+arrow.uuid (16-byte fixed-size binary), timestamps are timestamp[s] and the
+created_at/updated_at stamp shared by a whole table is dictionary encoded.
+cast_array converts between those and the plain types of files read back.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Union
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+Rows = Union[List[Dict], pa.Table]
+
+UUID_TYPE = pa.uuid()
+TIMESTAMP_TYPE = pa.timestamp("s")
+# A value repeated over the whole table, e.g. created_at
+STAMP_TYPE = pa.dictionary(pa.int32(), TIMESTAMP_TYPE)
+
+# Positions of the hex digits inside the canonical 8-4-4-4-12 UUID string
+_UUID_HEX_POSITIONS = [i for i in range(36) if i not in (8, 13, 18, 23)]
+
+
+def column(data: Rows, name: str) -> np.ndarray:
+    """Return a single column of a list of dicts or an Arrow table as NumPy."""
+    if isinstance(data, (pa.Table, pa.RecordBatch)):
+        return data.column(name).to_numpy(zero_copy_only=False)
+    return np.array([row[name] for row in data])
+
+
+def date_column(data: Rows, name: str) -> np.ndarray:
+    """Return a "YYYY-MM-DD" (or date32) column as datetime64[D]."""
+    return column(data, name).astype("datetime64[D]")
+
+
+def seconds_column(data: Rows, name: str) -> np.ndarray:
+    """Return a time32 (or "HH:MM:SS") column as seconds since midnight."""
+    if isinstance(data, (pa.Table, pa.RecordBatch)) and pa.types.is_time(
+        data.schema.field(name).type
+    ):
+        seconds = data.column(name).cast(pa.time32("s")).cast(pa.int32())
+        return seconds.to_numpy().astype(np.int64)
+    return np.array(
+        [
+            sum(int(part) * f for part, f in zip(str(t).split(":"), (3600, 60, 1)))
+            for t in column(data, name)
+        ],
+        dtype=np.int64,
+    )
+
+
+def now_seconds() -> np.datetime64:
+    """Current wall-clock time truncated to seconds, like the dict generators."""
+    return np.datetime64(datetime.now().replace(microsecond=0), "s")
+
+
+def timestamp_array(value: np.datetime64, n: int) -> pa.DictionaryArray:
+    """A timestamp column repeating the same value n times, dictionary encoded."""
+    return pa.DictionaryArray.from_arrays(
+        pa.array(np.zeros(n, dtype=np.int32)),
+        pa.array([np.datetime64(value, "s")], TIMESTAMP_TYPE),
+    )
+
+
+def counter_uniform(counter: np.ndarray, stream: int = 0) -> np.ndarray:
+    """
+    Uniform floats in [0, 1) that depend only on (counter, stream).
+
+    A splitmix64 hash of the counter, so values keyed by e.g. a student id
+    stay the same across calls, blocks and runs without touching any RNG
+    state.
+    """
+    offset = ((stream + 1) * 0x9E3779B97F4A7C15) % 2**64
+    z = counter.astype(np.uint64) * np.uint64(0xD1B54A32D192ED03) + np.uint64(offset)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    z ^= z >> np.uint64(31)
+    return (z >> np.uint64(11)).astype(np.float64) * 2.0**-53
+
+
+def uuid4_array(rng: np.random.Generator, n: int) -> pa.ExtensionArray:
+    """Generate n random version-4 UUIDs as an arrow.uuid array."""
+    raw = rng.integers(0, 256, size=(n, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40  # version 4
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80  # RFC 4122 variant
+    storage = pa.Array.from_buffers(pa.binary(16), n, [None, pa.py_buffer(raw)])
+    return pa.ExtensionArray.from_storage(UUID_TYPE, storage)
+
+
+def uuid_strings(array: pa.ExtensionArray) -> pa.Array:
+    """Format an arrow.uuid array as canonical UUID strings without a Python loop."""
+    storage = array.storage
+    n = len(storage)
+    raw = np.frombuffer(storage.buffers()[1], dtype=np.uint8)[
+        16 * storage.offset : 16 * (storage.offset + n)
+    ]
+
+    hex_digits = np.frombuffer(raw.tobytes().hex().encode(), dtype=np.uint8)
+    chars = np.full((n, 36), ord("-"), dtype=np.uint8)
+    chars[:, _UUID_HEX_POSITIONS] = hex_digits.reshape(n, 32)
+
+    # Fall back to 64-bit offsets once the character buffer outgrows int32
+    if 36 * n < 2**31:
+        offsets = np.arange(0, 36 * n + 1, 36, dtype=np.int32)
+        array_type = pa.string()
+    else:
+        offsets = np.arange(0, 36 * n + 1, 36, dtype=np.int64)
+        array_type = pa.large_string()
+
+    strings = pa.Array.from_buffers(
+        array_type, n, [None, pa.py_buffer(offsets), pa.py_buffer(chars)]
+    )
+    if array.null_count:
+        strings = pc.if_else(array.is_valid(), strings, None)
+    return strings
+
+
+def cast_array(
+    array: Union[pa.Array, pa.ChunkedArray], target: pa.DataType
+) -> Union[pa.Array, pa.ChunkedArray]:
+    """
+    Cast a column, also from arrow.uuid to strings and between dictionary
+    encoded and plain values, which Arrow's cast does not cover.
+    """
+    if isinstance(array, pa.ChunkedArray):
+        return pa.chunked_array(
+            [cast_array(chunk, target) for chunk in array.chunks], target
+        )
+    if array.type == target:
+        return array
+    if pa.types.is_dictionary(array.type):
+        return cast_array(array.dictionary_decode(), target)
+    if pa.types.is_dictionary(target):
+        return cast_array(array, target.value_type).dictionary_encode()
+    if array.type == UUID_TYPE:
+        return cast_array(uuid_strings(array), target)
+    return array.cast(target)
+
+
+def cast_table(table: pa.Table, schema: pa.Schema) -> pa.Table:
+    """Select and cast the columns of a table to a schema, see cast_array."""
+    return pa.table(
+        [cast_array(table.column(field.name), field.type) for field in schema],
+        schema=schema,
+    )
+
+
+def rows(data: Rows) -> List[Dict]:
+    """
+    Rows of a table as the dicts the per-row generators read: UUIDs, dates,
+    times and timestamps become strings, as they used to be generated.
+    """
+    if not isinstance(data, pa.Table):
+        return data
+    columns = {}
+    for field in data.schema:
+        value_type = (
+            field.type.value_type if pa.types.is_dictionary(field.type) else field.type
+        )
+        if value_type == UUID_TYPE or pa.types.is_temporal(value_type):
+            columns[field.name] = cast_array(data.column(field.name), pa.string())
+        else:
+            columns[field.name] = data.column(field.name)
+    return pa.table(columns).to_pylist()
@@ -1,9 +1,10 @@
 import random
-import uuid
-from datetime import datetime
 
 from faker import Faker
 
+from src.generator.columnar import rows
+from src.generator.tables import finish_table
+
 # Course name templates and prefixes by faculty at UI
 
 # Course prefix codes by faculty - these come before the numeric code
@@ -332,15 +333,15 @@ def generate_course(fake: Faker, programs, n=100):
     Generate n random course entries using UI's course code format
 
     Args:
-        programs: List of program dicts from program_faker
+        programs: Program table from program_faker
         n: Number of courses to generate
 
     Returns:
-        List of dicts with keys: course_id, id, course_code, course_name, credits, program_id, created_at, updated_at
+        Arrow table with columns: course_id, id, course_code, course_name, credits, program_id, created_at, updated_at
     """
     result = []
     used_codes = set()
-    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    programs = rows(programs)
 
     for i in range(1, n + 1):
         # Select a random program
@@ -454,15 +455,12 @@ def generate_course(fake: Faker, programs, n=100):
 
         result.append(
             {
-                "course_id": str(uuid.uuid4()),
                 "id": i,
                 "course_code": course_code,
                 "course_name": course_name,
                 "credits": credits,
                 "program_id": program_id,
-                "created_at": current_time,
-                "updated_at": current_time,
             }
         )
 
-    return result
+    return finish_table("courses", result)
@@ -0,0 +1,135 @@
+"""
+Dependency-graph scheduling of table generators.
+
+Every table is a TableTask that declares the tables it reads. run_tasks
+starts each task on a process pool as soon as its inputs exist, so
+independent tables (rooms, semesters, lecturers, ...) are generated
+concurrently and the total time approaches the critical path
+(faculties -> programs -> courses -> class schedules).
+"""
+
+import logging
+import random
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+from faker import Faker
+
+logger = logging.getLogger(__name__)
+
+
+class TableTask(NamedTuple):
+    name: str
+    # Module-level generator function, called as
+    # generate([fake,] *inputs, n) in a worker process; returns an Arrow
+    # table (see src.generator.tables)
+    generate: Callable[..., pa.Table]
+    inputs: Tuple[str, ...] = ()
+    n: Optional[int] = None
+    uses_faker: bool = True
+
+
+def task_seed(entropy: int, name: str) -> int:
+    """
+    Seed of a task, keyed by its name so it does not depend on scheduling.
+    The spawn key has two words so it never equals a block's key.
+    """
+    seed = np.random.SeedSequence(entropy, spawn_key=(zlib.crc32(name.encode()), 0))
+    return int(seed.generate_state(1)[0])
+
+
+def run_task(
+    task: TableTask, inputs: List[pa.Table], seed: int, locale: str
+) -> pa.Table:
+    """Run one generator with its own seeded random module and Faker"""
+    random.seed(seed)
+    args = [*inputs] if task.n is None else [*inputs, task.n]
+    if task.uses_faker:
+        fake = Faker(locale)
+        fake.seed_instance(seed)
+        args.insert(0, fake)
+    return task.generate(*args)
+
+
+def check_tasks(tasks: List[TableTask]) -> None:
+    """Reject unknown inputs and cycles before anything is started"""
+    names = {task.name for task in tasks}
+    for task in tasks:
+        missing = set(task.inputs) - names
+        if missing:
+            raise ValueError(f"{task.name} depends on unknown tables {missing}")
+
+    done = set()
+    remaining = list(tasks)
+    while remaining:
+        ready = [t for t in remaining if set(t.inputs) <= done]
+        if not ready:
+            cycle = [t.name for t in remaining]
+            raise ValueError(f"Tables {cycle} depend on each other")
+        done.update(t.name for t in ready)
+        remaining = [t for t in remaining if t.name not in done]
+
+
+def run_tasks(
+    tasks: List[TableTask],
+    entropy: int,
+    workers: Optional[int] = None,
+    on_result: Optional[Callable[[str, pa.Table], None]] = None,
+    locale: str = "id_ID",
+) -> Dict[str, pa.Table]:
+    """
+    Run table generators in dependency order across a process pool
+
+    Args:
+        tasks: Table tasks, in the order results should be returned
+        entropy: Root seed; every task gets a child seed keyed by its name
+        workers: Worker processes (default: CPU count)
+        on_result: Called with (name, table) as soon as a table is generated,
+            always after the tables it depends on
+        locale: Faker locale
+
+    Returns:
+        Dict of table name to table, in task order
+    """
+    check_tasks(tasks)
+    order = {task.name: i for i, task in enumerate(tasks)}
+    results: Dict[str, pa.Table] = {}
+    pending = list(tasks)
+    running = {}
+
+    with ProcessPoolExecutor(workers) as executor:
+
+        def submit_ready():
+            for task in [t for t in pending if all(i in results for i in t.inputs)]:
+                pending.remove(task)
+                logger.info(f"Generating {task.name}")
+                future = executor.submit(
+                    run_task,
+                    task,
+                    [results[i] for i in task.inputs],
+                    task_seed(entropy, task.name),
+                    locale,
+                )
+                running[future] = task
+
+        submit_ready()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            finished = []
+            for future in sorted(done, key=lambda f: order[running[f].name]):
+                task = running.pop(future)
+                results[task.name] = future.result()
+                finished.append(task.name)
+
+            # Start the dependents before handing results out, so workers
+            # stay busy while the caller writes
+            submit_ready()
+            for name in finished:
+                logger.info(f"Generated {len(results[name])} {name}")
+                if on_result is not None:
+                    on_result(name, results[name])
+
+    return {task.name: results[task.name] for task in tasks}
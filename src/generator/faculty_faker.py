@@ -1,8 +1,7 @@
-import uuid
-from datetime import datetime
-
 from faker import Faker
 
+from src.generator.tables import finish_table
+
 # Accurate list of UI's faculties (as of 2023)
 faculty_options = [
     ("FH", "Fakultas Hukum"),
@@ -27,10 +26,9 @@ faculty_options = [
 def generate_faculty(fake: Faker, n=1):
     """
     Generate n random faculty entries
-    Returns list of dicts with keys: faculty_id, faculty_code, faculty_name, created_at, updated_at
+    Returns Arrow table with columns: faculty_id, id, faculty_code, faculty_name, created_at, updated_at
     """
     result = []
-    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
     # Use all predefined faculties first
     used_faculty_codes = set()
@@ -39,12 +37,9 @@ def generate_faculty(fake: Faker, n=1):
         used_faculty_codes.add(faculty_code)
         result.append(
             {
-                "faculty_id": str(uuid.uuid4()),
                 "id": i + 1,
                 "faculty_code": faculty_code,
                 "faculty_name": faculty_name,
-                "created_at": current_time,
-                "updated_at": current_time,
             }
         )
 
@@ -58,13 +53,10 @@ def generate_faculty(fake: Faker, n=1):
 
         result.append(
             {
-                "faculty_id": str(uuid.uuid4()),
                 "id": i + 1,
                 "faculty_code": new_code,
                 "faculty_name": f"Fakultas {fake.word().capitalize()}",
-                "created_at": current_time,
-                "updated_at": current_time,
             }
         )
 
-    return result
+    return finish_table("faculties", result)
@@ -1,6 +1,16 @@
 import random
-import uuid
-from datetime import datetime
+
+import numpy as np
+import pyarrow as pa
+
+from src.generator.columnar import (
+    column,
+    now_seconds,
+    rows,
+    timestamp_array,
+    uuid4_array,
+)
+from src.generator.tables import finish_table
 
 # Indonesian university grading scale
 grade_ranges = [
@@ -15,33 +25,34 @@ grade_ranges = [
     (0, 44.99, "E", 0.0),  # E range (fail)
 ]
 
+# Grade distribution weights - shape resembles a normal distribution
+# Most students get Bs, fewer get As and Cs, very few get Ds or Es
+grade_weights = {
+    "A": 10,
+    "A-": 15,
+    "B+": 20,
+    "B": 25,
+    "B-": 15,
+    "C+": 7,
+    "C": 5,
+    "D": 2,
+    "E": 1,
+}
 
-def generate_grade(registrations):
+
+def generate_grade(registrations, id_start=1):
     """
     Generate grade entries for registrations
 
     Args:
-        registrations: List of registration dicts from registration_faker
+        registrations: Registration table from registration_faker
+        id_start: id of the first registration's grade (offset for batches)
 
     Returns:
-        List of dicts with keys: grade_id, id, registration_id, final_grade, letter_grade, created_at, updated_at
+        Arrow table with columns: grade_id, id, registration_id, final_grade, letter_grade, created_at, updated_at
     """
     result = []
-    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    # Grade distribution weights - shape resembles a normal distribution
-    # Most students get Bs, fewer get As and Cs, very few get Ds or Es
-    grade_weights = {
-        "A": 10,
-        "A-": 15,
-        "B+": 20,
-        "B": 25,
-        "B-": 15,
-        "C+": 7,
-        "C": 5,
-        "D": 2,
-        "E": 1,
-    }
+    registrations = rows(registrations)
 
     letter_options = list(grade_weights.keys())
     weights = list(grade_weights.values())
@@ -66,14 +77,62 @@ def generate_grade(registrations):
 
         result.append(
             {
-                "grade_id": str(uuid.uuid4()),
-                "id": i + 1,
+                "id": id_start + i,
                 "registration_id": registration["id"],
                 "final_grade": final_grade,
                 "letter_grade": letter_grade,
-                "created_at": current_time,
-                "updated_at": current_time,
             }
         )
 
-    return result
+    return finish_table("grades", result)
+
+
+def generate_grade_arrow(
+    registrations, rng=None, id_start=1, current_time=None, ungraded_rate=0.1
+) -> pa.Table:
+    """
+    Columnar equivalent of generate_grade
+
+    Letters are drawn for all registrations at once and the numeric grade is
+    sampled from per-letter min/max arrays, so there is no per-row scan of
+    grade_ranges.
+
+    Args:
+        registrations: Registration dicts or Arrow table (id)
+        rng: numpy Generator, a fresh unseeded one is used by default
+        id_start: id of the first registration's grade (offset for batches)
+        current_time: created_at/updated_at value, defaults to now
+        ungraded_rate: Share of registrations left without a grade
+
+    Returns:
+        Arrow table with columns: grade_id, id, registration_id, final_grade,
+                                letter_grade, created_at, updated_at
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    registration_ids = column(registrations, "id").astype(np.int64)
+
+    letters = np.array(list(grade_weights))
+    weights = np.array(list(grade_weights.values()), dtype=np.float64)
+    bounds = {letter: (g_min, g_max) for g_min, g_max, letter, _ in grade_ranges}
+    min_grades = np.array([bounds[letter][0] for letter in letters], dtype=float)
+    max_grades = np.array([bounds[letter][1] for letter in letters], dtype=float)
+
+    # For some registrations, leave the grade unset (courses in progress)
+    graded = np.flatnonzero(rng.random(len(registration_ids)) >= ungraded_rate)
+    n = len(graded)
+
+    letter = rng.choice(len(letters), size=n, p=weights / weights.sum())
+    final_grade = np.round(rng.uniform(min_grades[letter], max_grades[letter]), 2)
+    current_time = current_time if current_time is not None else now_seconds()
+
+    return pa.table(
+        {
+            "grade_id": uuid4_array(rng, n),
+            "id": pa.array(id_start + graded.astype(np.int64)),
+            "registration_id": pa.array(registration_ids[graded]),
+            "final_grade": pa.array(final_grade),
+            "letter_grade": pa.array(letters[letter]),
+            "created_at": timestamp_array(current_time, n),
+            "updated_at": timestamp_array(current_time, n),
+        }
+    )
@@ -1,24 +1,25 @@
 import random
-import uuid
-from datetime import datetime
 
 from faker import Faker
 
+from src.generator.columnar import rows
+from src.generator.tables import finish_table
+
 
 def generate_lecturer(fake: Faker, faculties, n=30):
     """
     Generate n random lecturer entries
 
     Args:
-        faculties: List of faculty dicts from faculty_faker
+        faculties: Faculty table from faculty_faker
         n: Number of lecturers to generate
 
     Returns:
-        List of dicts with keys: lecturer_id, id, nip, name, email, faculty_id, created_at, updated_at
+        Arrow table with columns: lecturer_id, id, nip, name, email, faculty_id, created_at, updated_at
     """
     result = []
     used_nips = set()
-    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    faculties = rows(faculties)
 
     for i in range(1, n + 1):
         # Select a random faculty
@@ -115,15 +116,12 @@ def generate_lecturer(fake: Faker, faculties, n=30):
 
         result.append(
             {
-                "lecturer_id": str(uuid.uuid4()),
                 "id": i,
                 "nip": nip,
                 "name": name,
                 "email": email,
                 "faculty_id": faculty_id,
-                "created_at": current_time,
-                "updated_at": current_time,
             }
         )
 
-    return result
+    return finish_table("lecturers", result)
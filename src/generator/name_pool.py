@@ -0,0 +1,70 @@
+"""
+Cached pools of Faker names.
+
+Calling fake.name_male()/fake.name_female() once per student dominates
+student generation. Instead a pool of names per gender is generated once
+with a fixed seed, stored as a Parquet file keyed by locale and size, and
+students sample from it.
+"""
+
+import os
+from typing import Dict, List, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from faker import Faker
+
+DEFAULT_POOL_SIZE = 20_000
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "siak-generator")
+
+
+def build_name_pool(locale: str, size: int = DEFAULT_POOL_SIZE) -> pa.Table:
+    """Generate `size` male and `size` female names for a locale"""
+    fake = Faker(locale)
+    # A fixed seed makes the pool a function of (locale, size) only, so a
+    # cached pool is the same as a freshly built one
+    fake.seed_instance(0)
+    return pa.table(
+        {
+            "gender": ["male"] * size + ["female"] * size,
+            "name": [fake.name_male() for _ in range(size)]
+            + [fake.name_female() for _ in range(size)],
+        }
+    )
+
+
+def load_name_pool(
+    locale: str,
+    size: int = DEFAULT_POOL_SIZE,
+    cache_dir: Optional[str] = None,
+) -> Dict[str, List[str]]:
+    """
+    Get the name pool for a locale, building and caching it on first use
+
+    Args:
+        locale: Faker locale, e.g. "id_ID"
+        size: Number of names per gender
+        cache_dir: Directory of the cached pools, ~/.cache/siak-generator by default
+
+    Returns:
+        Dict mapping "male" and "female" to lists of names
+    """
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    path = os.path.join(cache_dir, f"names_{locale}_{size}.parquet")
+
+    if os.path.exists(path):
+        table = pq.read_table(path)
+    else:
+        table = build_name_pool(locale, size)
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write then rename so concurrent runs never read a partial file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+
+    genders = table.column("gender").to_pylist()
+    names = table.column("name").to_pylist()
+    pool = {"male": [], "female": []}
+    for gender, name in zip(genders, names):
+        pool[gender].append(name)
+    return pool
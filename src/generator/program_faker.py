@@ -1,9 +1,10 @@
 import random
-import uuid
-from datetime import datetime
 
 from faker import Faker
 
+from src.generator.columnar import rows
+from src.generator.tables import finish_table
+
 # Accurate programs by faculty at UI (as of 2023)
 program_options = {
     "FH": [
@@ -132,16 +133,16 @@ program_options = {
 def generate_program(fake: Faker, faculties, n=10):
     """
     Generate n random program entries
-    Returns list of dicts with keys: program_id, id, program_code, program_name, faculty_id, created_at, updated_at
+    Returns Arrow table with columns: program_id, id, program_code, program_name, faculty_id, created_at, updated_at
 
     Args:
-        faculties: List of faculty dicts from faculty_faker
+        faculties: Faculty table from faculty_faker
         n: Number of programs to generate
     """
     result = []
     program_id = 1
     used_codes = set()
-    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    faculties = rows(faculties)
 
     # First, add standard programs for each faculty
     for faculty in faculties:
@@ -158,20 +159,17 @@ def generate_program(fake: Faker, faculties, n=10):
                 used_codes.add(program_code)
                 result.append(
                     {
-                        "program_id": str(uuid.uuid4()),
                         "id": program_id,
                         "program_code": program_code,
                         "program_name": program_name,
                         "faculty_id": faculty_id,
-                        "created_at": current_time,
-                        "updated_at": current_time,
                     }
                 )
                 program_id += 1
 
                 # Stop if we've reached the requested number
                 if len(result) >= n:
-                    return result
+                    return finish_table("programs", result)
 
     # If we need more programs, generate random ones
     while len(result) < n:
@@ -191,15 +189,12 @@ def generate_program(fake: Faker, faculties, n=10):
 
         result.append(
             {
-                "program_id": str(uuid.uuid4()),
                 "id": program_id,
                 "program_code": program_code,
                 "program_name": program_name,
                 "faculty_id": faculty_id,
-                "created_at": current_time,
-                "updated_at": current_time,
             }
         )
         program_id += 1
 
-    return result
+    return finish_table("programs", result)
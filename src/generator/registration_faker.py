@@ -1,27 +1,40 @@
 import random
-import uuid
 from datetime import datetime, timedelta
 
+import numpy as np
+import pyarrow as pa
 
-def generate_registration(students, courses, semesters, n=500):
+from src.generator.columnar import (
+    column,
+    date_column,
+    now_seconds,
+    rows,
+    timestamp_array,
+    uuid4_array,
+)
+from src.generator.tables import finish_table
+
+
+def generate_registration(students, courses, semesters, n=500, id_start=1):
     """
     Generate n random registration entries
 
     Args:
-        students: List of student dicts from student_faker
-        courses: List of course dicts from course_faker
-        semesters: List of semester dicts from semester_faker
+        students: Student table from student_faker
+        courses: Course table from course_faker
+        semesters: Semester table from semester_faker
         n: Number of registrations to generate
+        id_start: First value of the sequential id column
 
     Returns:
-        List of dicts with keys: registration_id, id, student_id, course_id, semester_id,
+        Arrow table with columns: registration_id, id, student_id, course_id, semester_id,
                                 registration_timestamp, created_at, updated_at
     """
     result = []
     used_registrations = (
         set()
     )  # To avoid duplicate student-course-semester combinations
-    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    students, courses, semesters = map(rows, (students, courses, semesters))
 
     # Try to create exactly n registrations
     attempt_count = 0
@@ -71,17 +84,155 @@ def generate_registration(students, courses, semesters, n=500):
 
         result.append(
             {
-                "registration_id": str(uuid.uuid4()),
-                "id": len(result) + 1,
+                "id": id_start + len(result),
                 "student_id": student["id"],
                 "course_id": course["id"],
                 "semester_id": semester["id"],
                 "registration_timestamp": registration_timestamp.strftime(
                     "%Y-%m-%d %H:%M:%S"
                 ),
-                "created_at": current_time,
-                "updated_at": current_time,
             }
         )
 
-    return result
+    return finish_table("registrations", result)
+
+
+class RegistrationIndex:
+    """
+    Lookup arrays shared by every draw of the columnar registration generator.
+
+    Built once per call instead of once per attempt:
+        - courses grouped by program_id (a CSR-style offset index)
+        - semesters sorted by start date, as datetime64 ordinals
+        - for each student, the first semester starting on/after enrollment
+    """
+
+    def __init__(self, students, courses, semesters):
+        self.student_ids = column(students, "id").astype(np.int64)
+        student_programs = column(students, "program_id").astype(np.int64)
+        enrollment = date_column(students, "enrollment_date")
+
+        self.course_ids = column(courses, "id").astype(np.int64)
+        course_programs = column(courses, "program_id").astype(np.int64)
+        self.course_order = np.argsort(course_programs, kind="stable")
+        sorted_programs = course_programs[self.course_order]
+        self.program_lo = np.searchsorted(sorted_programs, student_programs, "left")
+        self.program_count = (
+            np.searchsorted(sorted_programs, student_programs, "right")
+            - self.program_lo
+        )
+
+        semester_start = date_column(semesters, "start_date")
+        semester_order = np.argsort(semester_start, kind="stable")
+        self.semester_ids = column(semesters, "id").astype(np.int64)[semester_order]
+        self.semester_start = semester_start[semester_order]
+        self.first_semester = np.searchsorted(self.semester_start, enrollment, "left")
+
+    def draw(self, rng: np.random.Generator, m: int):
+        """Draw m candidate (student, course, semester) positions."""
+        n_semesters = len(self.semester_ids)
+
+        student = rng.integers(0, len(self.student_ids), m)
+        course = rng.integers(0, len(self.course_ids), m)
+
+        # 80% chance to take courses from their own program (if it has any)
+        count = self.program_count[student]
+        own = (rng.random(m) < 0.8) & (count > 0)
+        offset = (rng.random(own.sum()) * count[own]).astype(np.int64)
+        course[own] = self.course_order[self.program_lo[student[own]] + offset]
+
+        # Only semesters starting on/after the student's enrollment are valid
+        first = self.first_semester[student]
+        semester = first + (rng.random(m) * (n_semesters - first)).astype(np.int64)
+        valid = first < n_semesters
+
+        return student[valid], course[valid], semester[valid]
+
+
+def generate_registration_arrow(
+    students, courses, semesters, n=500, rng=None, id_start=1, current_time=None
+) -> pa.Table:
+    """
+    Columnar equivalent of generate_registration
+
+    Draws candidates in bulk arrays and de-duplicates student-course-semester
+    combinations with a single integer key, so the cost grows with n instead
+    of n × courses.
+
+    Args:
+        students: Student dicts or Arrow table (id, program_id, enrollment_date)
+        courses: Course dicts or Arrow table (id, program_id)
+        semesters: Semester dicts or Arrow table (id, start_date)
+        n: Number of registrations to generate
+        rng: numpy Generator, a fresh unseeded one is used by default
+        id_start: First value of the sequential id column
+        current_time: created_at/updated_at value, defaults to now
+
+    Returns:
+        Arrow table with columns: registration_id, id, student_id, course_id,
+                                semester_id, registration_timestamp, created_at,
+                                updated_at
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    index = RegistrationIndex(students, courses, semesters)
+    n_courses = len(index.course_ids)
+    n_semesters = len(index.semester_ids)
+
+    keys = np.empty(0, dtype=np.int64)  # Sorted keys of accepted registrations
+    picks = []
+    produced = 0
+    attempt_count = 0
+    max_attempts = n * 3  # Same attempt budget as the dict generator
+    accept_rate = 0.8
+
+    while produced < n and attempt_count < max_attempts:
+        # Oversample by the last observed acceptance rate, duplicates and
+        # invalid semesters are dropped
+        m = int((n - produced) / max(accept_rate, 0.05) * 1.1) + 64
+        m = min(m, max_attempts - attempt_count)
+        attempt_count += m
+
+        student, course, semester = index.draw(rng, m)
+        key = (student * n_courses + course) * n_semesters + semester
+
+        # Keep the first occurrence of every key, in draw order
+        order = np.argsort(key, kind="stable")
+        sorted_key = key[order]
+        is_first = np.ones(len(sorted_key), dtype=bool)
+        is_first[1:] = sorted_key[1:] != sorted_key[:-1]
+        first = np.sort(order[is_first])
+
+        # Drop keys accepted in an earlier round
+        if len(keys):
+            pos = np.minimum(np.searchsorted(keys, key[first]), len(keys) - 1)
+            first = first[keys[pos] != key[first]]
+        first = first[: n - produced]
+
+        accept_rate = len(first) / m
+        keys = np.sort(np.concatenate([keys, key[first]]))
+        picks.append((student[first], course[first], semester[first]))
+        produced += len(first)
+
+    student = np.concatenate([p[0] for p in picks]) if picks else np.empty(0, int)
+    course = np.concatenate([p[1] for p in picks]) if picks else np.empty(0, int)
+    semester = np.concatenate([p[2] for p in picks]) if picks else np.empty(0, int)
+
+    # Registration date is between 1-4 weeks before semester start
+    days_before = rng.integers(7, 29, produced).astype("timedelta64[D]")
+    registration_timestamp = (index.semester_start[semester] - days_before).astype(
+        "datetime64[s]"
+    )
+    current_time = current_time if current_time is not None else now_seconds()
+
+    return pa.table(
+        {
+            "registration_id": uuid4_array(rng, produced),
+            "id": pa.array(np.arange(id_start, id_start + produced, dtype=np.int64)),
+            "student_id": pa.array(index.student_ids[student]),
+            "course_id": pa.array(index.course_ids[course]),
+            "semester_id": pa.array(index.semester_ids[semester]),
+            "registration_timestamp": pa.array(registration_timestamp),
+            "created_at": timestamp_array(current_time, produced),
+            "updated_at": timestamp_array(current_time, produced),
+        }
+    )
@@ -1,6 +1,30 @@
 import random
-import uuid
 from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy as np
+import pyarrow as pa
+
+from src.generator.tables import finish_table
+
+semester_types = [
+    {
+        "name": "Ganjil",
+        "code": "1",
+        "start_month": 8,
+        "start_day": 22,
+        "end_month": 12,
+        "end_day": 16,
+    },
+    {
+        "name": "Genap",
+        "code": "2",
+        "start_month": 1,
+        "start_day": 27,
+        "end_month": 5,
+        "end_day": 19,
+    },
+]
 
 
 def generate_semester(n=18, start_year=2018, end_year=2027):
@@ -13,10 +37,9 @@ def generate_semester(n=18, start_year=2018, end_year=2027):
         end_year: Ending academic year
 
     Returns:
-        List of dicts with keys: semester_id, id, semester_code, semester_name, start_date, end_date, created_at, updated_at
+        Arrow table with columns: semester_id, id, semester_code, semester_name, start_date, end_date, created_at, updated_at
     """
     result = []
-    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
     # UI uses format: Semester [Ganjil/Genap] YYYY/YYYY
     # or the shorter code: [1/2]/YYYY
@@ -27,25 +50,6 @@ def generate_semester(n=18, start_year=2018, end_year=2027):
     # Genap/Even (2): Late January/Early February to mid-May
     # Plus there are shorter semesters (Pendek/Short) between regular ones
 
-    semester_types = [
-        {
-            "name": "Ganjil",
-            "code": "1",
-            "start_month": 8,
-            "start_day": 22,
-            "end_month": 12,
-            "end_day": 16,
-        },
-        {
-            "name": "Genap",
-            "code": "2",
-            "start_month": 1,
-            "start_day": 27,
-            "end_month": 5,
-            "end_day": 19,
-        },
-    ]
-
     current_id = 1
 
     for year in range(start_year, end_year + 1):
@@ -91,14 +95,11 @@ def generate_semester(n=18, start_year=2018, end_year=2027):
             # semester_code is naturally unique due to format: code/year
             result.append(
                 {
-                    "semester_id": str(uuid.uuid4()),
                     "id": current_id,
                     "semester_code": semester_code,
                     "semester_name": semester_name,
-                    "start_date": start_date.strftime("%Y-%m-%d"),
-                    "end_date": end_date.strftime("%Y-%m-%d"),
-                    "created_at": current_time,
-                    "updated_at": current_time,
+                    "start_date": start_date.date(),
+                    "end_date": end_date.date(),
                 }
             )
 
@@ -112,4 +113,54 @@ def generate_semester(n=18, start_year=2018, end_year=2027):
         if len(result) >= n:
             break
 
-    return result
+    return finish_table("semesters", result)
+
+
+def generate_next_semester(
+    last_semester: dict,
+    current_time: Optional[np.datetime64] = None,
+    rng: Optional[np.random.Generator] = None,
+) -> pa.Table:
+    """
+    Generate the semester following last_semester on the same calendar,
+    without the random date variation
+
+    Args:
+        last_semester: Semester dict with id and semester_code ("1/2022")
+        current_time: created_at/updated_at value, defaults to now
+        rng: numpy Generator of the UUID
+
+    Returns:
+        Arrow table of one semester, with the columns of generate_semester
+    """
+    code, year = last_semester["semester_code"].split("/")
+    # Ganjil is followed by Genap of the same academic year, Genap by the
+    # next year's Ganjil
+    if code == "1":
+        semester, year = semester_types[1], int(year)
+    else:
+        semester, year = semester_types[0], int(year) + 1
+
+    # Even semesters start in the second calendar year of the academic year
+    calendar_year = year if semester["code"] == "1" else year + 1
+    start_date = datetime(calendar_year, semester["start_month"], semester["start_day"])
+    end_date = datetime(calendar_year, semester["end_month"], semester["end_day"])
+    while start_date.weekday() >= 5:
+        start_date += timedelta(days=1)
+    while end_date.weekday() >= 5:
+        end_date += timedelta(days=1)
+
+    return finish_table(
+        "semesters",
+        [
+            {
+                "id": last_semester["id"] + 1,
+                "semester_code": f"{semester['code']}/{year}",
+                "semester_name": f"Semester {semester['name']} {year}/{year + 1}",
+                "start_date": start_date.date(),
+                "end_date": end_date.date(),
+            }
+        ],
+        current_time,
+        rng,
+    )
@@ -1,67 +1,87 @@
 import random
-import uuid
 from datetime import datetime, timedelta
 
+import numpy as np
+import pyarrow as pa
 
-def generate_semester_fees(students, semesters, programs=None):
+from src.generator.columnar import (
+    column,
+    counter_uniform,
+    date_column,
+    now_seconds,
+    rows,
+    timestamp_array,
+    uuid4_array,
+)
+from src.generator.tables import finish_table
+
+# UI uses UKT (Uang Kuliah Tunggal) system with 8 levels based on family income
+# Each program has different UKT ranges
+# The values below approximate the 2023-2024 UKT rates at UI
+program_base_fees = {
+    # Health/Medical programs (highest fees)
+    "FK": {
+        "min": 1000000,  # UKT level 1
+        "max": 30000000,  # UKT level 8
+        "avg": 15000000,  # Average UKT
+        "std_dev": 7000000,  # Standard deviation
+    },
+    "FG": {"min": 1000000, "max": 28000000, "avg": 14000000, "std_dev": 6500000},
+    "FF": {"min": 1000000, "max": 24000000, "avg": 12000000, "std_dev": 5500000},
+    "FKM": {"min": 1000000, "max": 22000000, "avg": 11000000, "std_dev": 5000000},
+    "FKUI": {"min": 1000000, "max": 22000000, "avg": 11000000, "std_dev": 5000000},
+    # Technical/Science programs (high-mid range)
+    "FT": {"min": 1000000, "max": 20000000, "avg": 10000000, "std_dev": 4500000},
+    "FASILKOM": {
+        "min": 1000000,
+        "max": 19000000,
+        "avg": 9500000,
+        "std_dev": 4500000,
+    },
+    "FMIPA": {"min": 1000000, "max": 17000000, "avg": 8500000, "std_dev": 4000000},
+    # Business/Economics (mid range)
+    "FEB": {"min": 1000000, "max": 17000000, "avg": 8500000, "std_dev": 4000000},
+    # Law/Humanities (mid-low range)
+    "FH": {"min": 1000000, "max": 15000000, "avg": 7500000, "std_dev": 3500000},
+    "FISIP": {"min": 1000000, "max": 14000000, "avg": 7000000, "std_dev": 3500000},
+    "FIB": {"min": 1000000, "max": 13000000, "avg": 6500000, "std_dev": 3000000},
+    "FPsi": {"min": 1000000, "max": 15000000, "avg": 7500000, "std_dev": 3500000},
+    "FIA": {"min": 1000000, "max": 14000000, "avg": 7000000, "std_dev": 3500000},
+    "FIK": {"min": 1000000, "max": 17000000, "avg": 8500000, "std_dev": 4000000},
+    # Vocational programs
+    "Vokasi": {"min": 1000000, "max": 12000000, "avg": 6000000, "std_dev": 3000000},
+    # Default for other programs
+    "DEFAULT": {
+        "min": 1000000,
+        "max": 16000000,
+        "avg": 8000000,
+        "std_dev": 4000000,
+    },
+}
+
+# Different UKT level distribution - most students in mid-range UKT
+ukt_levels = [1, 2, 3, 4, 5, 6, 7, 8]  # 8 UKT levels
+ukt_weights = [5, 10, 15, 20, 25, 15, 7, 3]  # Most students in levels 3-5
+
+
+def generate_semester_fees(students, semesters, programs=None, id_start=1):
     """
     Generate semester fees entries for students
 
     Args:
-        students: List of student dicts from student_faker
-        semesters: List of semester dicts from semester_faker
+        students: Student table from student_faker
+        semesters: Semester table from semester_faker
+        programs: Program table from program_faker
+        id_start: First value of the sequential id column
 
     Returns:
-        List of dicts with keys: fee_id, id, student_id, semester_id, fee_amount,
+        Arrow table with columns: fee_id, id, student_id, semester_id, fee_amount,
                                 payment_timestamp, created_at, updated_at
     """
     result = []
-    counter = 1
-    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    # UI uses UKT (Uang Kuliah Tunggal) system with 8 levels based on family income
-    # Each program has different UKT ranges
-    # The values below approximate the 2023-2024 UKT rates at UI
-    program_base_fees = {
-        # Health/Medical programs (highest fees)
-        "FK": {
-            "min": 1000000,  # UKT level 1
-            "max": 30000000,  # UKT level 8
-            "avg": 15000000,  # Average UKT
-            "std_dev": 7000000,  # Standard deviation
-        },
-        "FG": {"min": 1000000, "max": 28000000, "avg": 14000000, "std_dev": 6500000},
-        "FF": {"min": 1000000, "max": 24000000, "avg": 12000000, "std_dev": 5500000},
-        "FKM": {"min": 1000000, "max": 22000000, "avg": 11000000, "std_dev": 5000000},
-        "FKUI": {"min": 1000000, "max": 22000000, "avg": 11000000, "std_dev": 5000000},
-        # Technical/Science programs (high-mid range)
-        "FT": {"min": 1000000, "max": 20000000, "avg": 10000000, "std_dev": 4500000},
-        "FASILKOM": {
-            "min": 1000000,
-            "max": 19000000,
-            "avg": 9500000,
-            "std_dev": 4500000,
-        },
-        "FMIPA": {"min": 1000000, "max": 17000000, "avg": 8500000, "std_dev": 4000000},
-        # Business/Economics (mid range)
-        "FEB": {"min": 1000000, "max": 17000000, "avg": 8500000, "std_dev": 4000000},
-        # Law/Humanities (mid-low range)
-        "FH": {"min": 1000000, "max": 15000000, "avg": 7500000, "std_dev": 3500000},
-        "FISIP": {"min": 1000000, "max": 14000000, "avg": 7000000, "std_dev": 3500000},
-        "FIB": {"min": 1000000, "max": 13000000, "avg": 6500000, "std_dev": 3000000},
-        "FPsi": {"min": 1000000, "max": 15000000, "avg": 7500000, "std_dev": 3500000},
-        "FIA": {"min": 1000000, "max": 14000000, "avg": 7000000, "std_dev": 3500000},
-        "FIK": {"min": 1000000, "max": 17000000, "avg": 8500000, "std_dev": 4000000},
-        # Vocational programs
-        "Vokasi": {"min": 1000000, "max": 12000000, "avg": 6000000, "std_dev": 3000000},
-        # Default for other programs
-        "DEFAULT": {
-            "min": 1000000,
-            "max": 16000000,
-            "avg": 8000000,
-            "std_dev": 4000000,
-        },
-    }
+    counter = id_start
+    students, semesters = rows(students), rows(semesters)
+    programs = rows(programs) if programs is not None else None
 
     # For each student, generate fees for the semesters they're enrolled in
     for student in students:
@@ -99,18 +119,6 @@ def generate_semester_fees(students, semesters, programs=None):
                 student_seed = student["id"]
                 random.seed(student_seed)
 
-                # Different UKT level distribution - most students in mid-range UKT
-                ukt_levels = [1, 2, 3, 4, 5, 6, 7, 8]  # 8 UKT levels
-                ukt_weights = [
-                    5,
-                    10,
-                    15,
-                    20,
-                    25,
-                    15,
-                    7,
-                    3,
-                ]  # Most students in levels 3-5
                 student_ukt_level = random.choices(ukt_levels, weights=ukt_weights)[0]
 
                 # Calculate fee based on UKT level
@@ -148,16 +156,111 @@ def generate_semester_fees(students, semesters, programs=None):
 
                 result.append(
                     {
-                        "fee_id": str(uuid.uuid4()),
                         "id": counter,
                         "student_id": student["id"],
                         "semester_id": semester["id"],
                         "fee_amount": fee_amount,
                         "payment_timestamp": payment_timestamp,
-                        "created_at": current_time,
-                        "updated_at": current_time,
                     }
                 )
                 counter += 1
 
-    return result
+    return finish_table("semester_fees", result)
+
+
+def generate_semester_fees_arrow(
+    students,
+    semesters,
+    programs=None,
+    rng=None,
+    id_start=1,
+    current_time=None,
+) -> pa.Table:
+    """
+    Columnar equivalent of generate_semester_fees
+
+    A student's UKT level and its ±2% variation come from a counter-based
+    hash of the student id instead of reseeding the global RNG, so they stay
+    the same across semesters, blocks and runs. Fee structures are looked up
+    through a program -> faculty array and eligible semesters are found with
+    a single date comparison.
+
+    Args:
+        students: Student dicts or Arrow table (id, program_id, enrollment_date)
+        semesters: Semester dicts or Arrow table (id, start_date)
+        programs: Program dicts or Arrow table (id, program_code)
+        rng: numpy Generator for the payments, a fresh unseeded one by default
+        id_start: First value of the sequential id column
+        current_time: created_at/updated_at value, defaults to now
+
+    Returns:
+        Arrow table with columns: fee_id, id, student_id, semester_id, fee_amount,
+                                payment_timestamp, created_at, updated_at
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    student_ids = column(students, "id").astype(np.int64)
+    student_programs = column(students, "program_id").astype(np.int64)
+    enrollment = date_column(students, "enrollment_date")
+    semester_ids = column(semesters, "id").astype(np.int64)
+    semester_start = date_column(semesters, "start_date")
+
+    # Fee structure rows, indexed by faculty
+    faculty_codes = list(program_base_fees)
+    min_fees = np.array([program_base_fees[f]["min"] for f in faculty_codes])
+    max_fees = np.array([program_base_fees[f]["max"] for f in faculty_codes])
+    default = faculty_codes.index("DEFAULT")
+
+    # Program -> faculty, the faculty code being the program code's prefix
+    faculty = np.full(len(student_ids), default)
+    if programs is not None and len(programs):
+        program_ids = column(programs, "id").astype(np.int64)
+        program_faculty = np.array(
+            [
+                faculty_codes.index(code[:2])
+                if code and len(code) >= 2 and code[:2] in program_base_fees
+                else default
+                for code in column(programs, "program_code")
+            ]
+        )
+        order = np.argsort(program_ids)
+        pos = np.minimum(
+            np.searchsorted(program_ids[order], student_programs), len(order) - 1
+        )
+        found = program_ids[order][pos] == student_programs
+        faculty[found] = program_faculty[order][pos[found]]
+
+    # Per-student UKT level (1-8) and variation within the level
+    cumulative = np.cumsum(ukt_weights) / sum(ukt_weights)
+    level = np.searchsorted(cumulative, counter_uniform(student_ids, 0), "right")
+    variation = 0.98 + 0.04 * counter_uniform(student_ids, 1)
+    step = (max_fees[faculty] - min_fees[faculty]) / 7  # 7 steps for 8 levels
+    student_fee = (min_fees[faculty] + level * step) * variation
+    # Round to nearest thousand (common in Indonesian fee structures)
+    student_fee = (np.round(student_fee / 1000) * 1000).astype(np.int64)
+
+    # Only semesters starting on/after the student's enrollment, student-major
+    student, semester = np.nonzero(semester_start[None, :] >= enrollment[:, None])
+    n = len(student)
+
+    # 95% of fees are paid, usually 1-30 days before semester start between
+    # 08:00 and 17:59
+    paid = rng.random(n) < 0.95
+    days_before = rng.integers(1, 31, n).astype("timedelta64[D]")
+    minutes = rng.integers(8 * 60, 18 * 60, n).astype("timedelta64[m]")
+    payment_timestamp = (semester_start[semester] - days_before).astype(
+        "datetime64[s]"
+    ) + minutes
+    current_time = current_time if current_time is not None else now_seconds()
+
+    return pa.table(
+        {
+            "fee_id": uuid4_array(rng, n),
+            "id": pa.array(np.arange(id_start, id_start + n, dtype=np.int64)),
+            "student_id": pa.array(student_ids[student]),
+            "semester_id": pa.array(semester_ids[semester]),
+            "fee_amount": pa.array(student_fee[student]),
+            "payment_timestamp": pa.array(payment_timestamp, mask=~paid),
+            "created_at": timestamp_array(current_time, n),
+            "updated_at": timestamp_array(current_time, n),
+        }
+    )
@@ -0,0 +1,53 @@
+"""
+Zero-copy handoff of reference tables to generator worker processes.
+
+Tables are converted to Arrow once and written as IPC files (under /dev/shm
+when available). Workers memory-map them, so every process reads the same
+pages instead of unpickling its own copy of the students, courses, ... lists.
+"""
+
+import os
+import shutil
+import tempfile
+from functools import lru_cache
+from typing import Dict, Optional
+
+import pyarrow as pa
+
+
+class SharedTables:
+    """Publish Arrow tables as memory-mapped IPC files"""
+
+    def __init__(self, directory: Optional[str] = None):
+        if directory is None and os.path.isdir("/dev/shm"):
+            directory = "/dev/shm"
+        self.directory = tempfile.mkdtemp(prefix="siak-generator-", dir=directory)
+        self.paths: Dict[str, str] = {}
+
+    def publish(self, name: str, table: pa.Table) -> str:
+        path = os.path.join(self.directory, f"{name}.arrow")
+        with pa.OSFile(path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        self.paths[name] = path
+        return path
+
+    def close(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+@lru_cache(maxsize=None)
+def attach(path: str) -> pa.Table:
+    """
+    Memory-map a published table. The returned buffers point into the
+    mapped file, nothing is copied; the mapping stays open for the life of
+    the process so repeated tasks reuse it.
+    """
+    source = pa.memory_map(path, "r")
+    return pa.ipc.open_file(source).read_all()
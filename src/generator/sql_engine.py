@@ -0,0 +1,557 @@
+"""
+Pure-SQL generation of the large tables inside DuckDB.
+
+The reference tables still come from the Python fakers. They are registered
+in DuckDB next to small lookup tables built from the fakers' constants:
+grade weights and ranges, UKT level weights and program_base_fees.
+Registrations, grades, semester fees and academic records are then
+generated with range(), joins and window functions, and written with
+COPY ... TO, which DuckDB parallelizes over all threads.
+
+Randomness is counter based: uniform(key, stream) hashes a row key with the
+stream number and the run seed. A row's values therefore depend only on its
+key, not on thread scheduling, and a run is reproducible from its seed.
+UUIDs are built from the same hashes, so they are reproducible as well.
+
+The distributions and constraints follow the columnar generators:
+
+- registrations: 80% from the student's own program, only semesters
+  starting on/after enrollment, unique (student, course, semester),
+  registered 1-4 weeks before the semester starts
+- grades: 10% ungraded, letters by grade_weights, a uniform final grade
+  within the letter's range
+- semester fees: one per student and semester from enrollment on, a per
+  student UKT level and ±2% variation, 95% paid 1-30 days before the
+  semester starts
+- academic records: one per registered (student, semester), semester and
+  cumulative GPA over the graded credits
+"""
+
+import logging
+import os
+from typing import Dict, Optional
+
+import duckdb
+import numpy as np
+import pyarrow as pa
+
+from src.generator.academic_record_faker import grade_points
+from src.generator.grade_faker import grade_ranges, grade_weights
+from src.generator.semester_fees_faker import (
+    program_base_fees,
+    ukt_levels,
+    ukt_weights,
+)
+from src.utils.writer import (
+    PARQUET_COMPRESSION,
+    TEXT_COMPRESSION,
+    WRITERS,
+    WriterOptions,
+)
+
+logger = logging.getLogger(__name__)
+
+SQL_TABLES = ["registrations", "grades", "semester_fees", "academic_records"]
+
+# Streams of uniform(), one per random column
+STREAMS = {
+    "registration_student": 1,
+    "registration_own_program": 2,
+    "registration_own_course": 3,
+    "registration_course": 4,
+    "registration_semester": 5,
+    "registration_days_before": 6,
+    "grade_graded": 10,
+    "grade_letter": 11,
+    "grade_final": 12,
+    "fee_level": 20,
+    "fee_variation": 21,
+    "fee_paid": 22,
+    "fee_days_before": 23,
+    "fee_minutes": 24,
+}
+# Streams of the two UUID halves, per table
+UUID_STREAMS = {
+    "registrations": 100,
+    "grades": 102,
+    "semester_fees": 104,
+    "academic_records": 106,
+}
+
+# Same attempt budget and oversampling as generate_registration_arrow
+max_attempts_factor = 3
+oversample = 1.1
+
+
+def sql_seed(entropy: int) -> int:
+    """A 64-bit seed of the run entropy, for DuckDB's hash()"""
+    return int(np.random.SeedSequence(entropy).generate_state(1, np.uint64)[0])
+
+
+def create_macros(conn: duckdb.DuckDBPyConnection, seed: int) -> None:
+    """Seeded uniform() and uuid4() macros over DuckDB's hash()"""
+    conn.execute(f"""
+        CREATE OR REPLACE MACRO hash64(key, stream) AS
+            hash(key, stream, {seed}::UBIGINT)
+    """)
+    conn.execute("""
+        CREATE OR REPLACE MACRO uniform(key, stream) AS
+            (hash64(key, stream) >> 11)::DOUBLE / 9007199254740992
+    """)
+    conn.execute("""
+        CREATE OR REPLACE MACRO hex64(key, stream) AS
+            lower(lpad(to_hex(hash64(key, stream)), 16, '0'))
+    """)
+    # Version 4 and the RFC 4122 variant are written over the hash bits
+    conn.execute("""
+        CREATE OR REPLACE MACRO uuid4(key, stream) AS (
+            substr(hex64(key, stream), 1, 8) || '-'
+            || substr(hex64(key, stream), 9, 4) || '-4'
+            || substr(hex64(key, stream), 14, 3) || '-'
+            || substr('89ab', (hash64(key, stream + 1) >> 62)::INTEGER + 1, 1)
+            || substr(hex64(key, stream + 1), 2, 3) || '-'
+            || substr(hex64(key, stream + 1), 5, 12)
+        )::UUID
+    """)
+
+
+def weighted_case(draw: str, values: list, weights: list) -> str:
+    """SQL CASE picking values[i] with probability weights[i] for a uniform draw"""
+    cumulative = np.cumsum(weights) / sum(weights)
+    branches = " ".join(
+        f"WHEN {draw} < {float(bound)!r} THEN {value!r}"
+        for value, bound in zip(values[:-1], cumulative[:-1])
+    )
+    return f"CASE {branches} ELSE {values[-1]!r} END"
+
+
+def register_reference(
+    conn: duckdb.DuckDBPyConnection, reference: Dict[str, pa.Table]
+) -> None:
+    """Register the reference columns the SQL reads, and the lookup tables"""
+    columns = {
+        "students": ["id", "program_id", "enrollment_date"],
+        "courses": ["id", "program_id", "credits"],
+        "semesters": ["id", "start_date"],
+        "programs": ["id", "program_code"],
+    }
+    for name, names in columns.items():
+        conn.register(f"ref_{name}", reference[name].select(names))
+
+    bounds = {letter: (g_min, g_max) for g_min, g_max, letter, _ in grade_ranges}
+    conn.register(
+        "grade_scale",
+        pa.table(
+            {
+                "letter_grade": list(grade_weights),
+                "min_grade": [float(bounds[letter][0]) for letter in grade_weights],
+                "max_grade": [float(bounds[letter][1]) for letter in grade_weights],
+                "points": [grade_points[letter] for letter in grade_weights],
+            }
+        ),
+    )
+    conn.register(
+        "fee_structures",
+        pa.table(
+            {
+                "faculty_code": list(program_base_fees),
+                "min_fee": [f["min"] for f in program_base_fees.values()],
+                "max_fee": [f["max"] for f in program_base_fees.values()],
+            }
+        ),
+    )
+
+    # Position-indexed students, courses and semesters for the random picks
+    conn.execute("""
+        CREATE OR REPLACE TABLE semester_index AS
+        SELECT
+            row_number() OVER (ORDER BY start_date, id) - 1 AS rank,
+            id,
+            start_date
+        FROM ref_semesters
+    """)
+    conn.execute("""
+        CREATE OR REPLACE TABLE course_index AS
+        SELECT row_number() OVER (ORDER BY id) - 1 AS pos, id
+        FROM ref_courses
+    """)
+    conn.execute("""
+        CREATE OR REPLACE TABLE program_courses AS
+        SELECT
+            program_id,
+            row_number() OVER (PARTITION BY program_id ORDER BY id) - 1 AS k,
+            id AS course_id
+        FROM ref_courses
+    """)
+    conn.execute("""
+        CREATE OR REPLACE TABLE student_index AS
+        SELECT
+            row_number() OVER (ORDER BY s.id) - 1 AS pos,
+            s.id,
+            s.program_id,
+            -- First semester starting on/after enrollment
+            (
+                SELECT count(*) FROM semester_index se
+                WHERE se.start_date < s.enrollment_date
+            ) AS first_semester,
+            (
+                SELECT count(*) FROM program_courses pc
+                WHERE pc.program_id = s.program_id
+            ) AS program_courses
+        FROM ref_students s
+    """)
+
+
+def generate_registrations(
+    conn: duckdb.DuckDBPyConnection, n: int, current_time: str
+) -> int:
+    """
+    Create the registrations table
+
+    Candidates are drawn in rounds over consecutive attempt numbers. Each
+    round keeps the first attempt of every new (student, course, semester),
+    until n registrations are accepted or the attempt budget is spent.
+    """
+    n_students = conn.execute("SELECT count(*) FROM student_index").fetchone()[0]
+    n_courses = conn.execute("SELECT count(*) FROM course_index").fetchone()[0]
+    n_semesters = conn.execute("SELECT count(*) FROM semester_index").fetchone()[0]
+
+    conn.execute("""
+        CREATE OR REPLACE TABLE accepted (
+            attempt BIGINT, student_id BIGINT, course_id BIGINT,
+            semester_id BIGINT, start_date DATE
+        )
+    """)
+    produced = 0
+    attempt = 0
+    max_attempts = n * max_attempts_factor
+    accept_rate = 0.8
+    s = STREAMS
+    while produced < n and attempt < max_attempts and n_students and n_courses:
+        m = int((n - produced) / max(accept_rate, 0.05) * oversample) + 64
+        m = min(m, max_attempts - attempt)
+        conn.execute(f"""
+            INSERT INTO accepted
+            SELECT attempt, student_id, course_id, semester_id, start_date
+            FROM (
+                SELECT
+                    a.range AS attempt,
+                    st.id AS student_id,
+                    CASE
+                        WHEN uniform(a.range, {s["registration_own_program"]}) < 0.8
+                            AND pc.course_id IS NOT NULL
+                        THEN pc.course_id
+                        ELSE co.id
+                    END AS course_id,
+                    se.id AS semester_id,
+                    se.start_date
+                FROM range({attempt}, {attempt + m}) a
+                JOIN student_index st ON st.pos = floor(
+                    uniform(a.range, {s["registration_student"]}) * {n_students}
+                )
+                JOIN course_index co ON co.pos = floor(
+                    uniform(a.range, {s["registration_course"]}) * {n_courses}
+                )
+                LEFT JOIN program_courses pc
+                    ON pc.program_id = st.program_id
+                    AND pc.k = floor(
+                        uniform(a.range, {s["registration_own_course"]})
+                        * st.program_courses
+                    )
+                JOIN semester_index se ON se.rank = st.first_semester + floor(
+                    uniform(a.range, {s["registration_semester"]})
+                    * ({n_semesters} - st.first_semester)
+                )
+                WHERE st.first_semester < {n_semesters}
+            ) candidates
+            WHERE NOT EXISTS (
+                SELECT 1 FROM accepted r
+                WHERE r.student_id = candidates.student_id
+                    AND r.course_id = candidates.course_id
+                    AND r.semester_id = candidates.semester_id
+            )
+            QUALIFY row_number() OVER (
+                PARTITION BY student_id, course_id, semester_id ORDER BY attempt
+            ) = 1
+            ORDER BY attempt
+            LIMIT {n - produced}
+        """)
+        accepted = conn.execute("SELECT count(*) FROM accepted").fetchone()[0]
+        accept_rate = (accepted - produced) / m
+        produced = accepted
+        attempt += m
+
+    conn.execute(f"""
+        CREATE OR REPLACE TABLE registrations AS
+        SELECT
+            uuid4(id, {UUID_STREAMS["registrations"]}) AS registration_id,
+            id,
+            student_id,
+            course_id,
+            semester_id,
+            -- Registered 1-4 weeks before the semester starts
+            (
+                start_date - (
+                    7 + floor(uniform(id, {s["registration_days_before"]}) * 22)
+                )::INTEGER
+            )::TIMESTAMP AS registration_timestamp,
+            TIMESTAMP '{current_time}' AS created_at,
+            TIMESTAMP '{current_time}' AS updated_at
+        FROM (
+            SELECT row_number() OVER (ORDER BY attempt) AS id, *
+            FROM accepted
+        )
+        ORDER BY id
+    """)
+    conn.execute("DROP TABLE accepted")
+    return produced
+
+
+def generate_grades(conn: duckdb.DuckDBPyConnection, current_time: str) -> None:
+    """Create the grades table, grade ids following their registration's id"""
+    s = STREAMS
+    letter = weighted_case(
+        f"uniform(r.id, {s['grade_letter']})",
+        list(grade_weights),
+        list(grade_weights.values()),
+    )
+    conn.execute(f"""
+        CREATE OR REPLACE TABLE grades AS
+        SELECT
+            uuid4(g.id, {UUID_STREAMS["grades"]}) AS grade_id,
+            g.id,
+            g.registration_id,
+            round(
+                sc.min_grade
+                + uniform(g.id, {s["grade_final"]}) * (sc.max_grade - sc.min_grade),
+                2
+            ) AS final_grade,
+            g.letter_grade,
+            TIMESTAMP '{current_time}' AS created_at,
+            TIMESTAMP '{current_time}' AS updated_at
+        FROM (
+            SELECT r.id, r.id AS registration_id, {letter} AS letter_grade
+            FROM registrations r
+            -- Courses in progress have no grade yet
+            WHERE uniform(r.id, {s["grade_graded"]}) >= 0.1
+        ) g
+        JOIN grade_scale sc USING (letter_grade)
+        ORDER BY g.id
+    """)
+
+
+def semester_fees_query(current_time: str) -> str:
+    """SELECT of the semester fees of every student from enrollment on"""
+    s = STREAMS
+    level = weighted_case(
+        f"uniform(st.id, {s['fee_level']})",
+        [level - 1 for level in ukt_levels],
+        ukt_weights,
+    )
+    return f"""
+        SELECT
+            uuid4(id, {UUID_STREAMS["semester_fees"]}) AS fee_id,
+            id,
+            student_id,
+            semester_id,
+            fee_amount,
+            -- 95% paid, 1-30 days before the semester starts, 08:00-17:59
+            CASE WHEN uniform(id, {s["fee_paid"]}) < 0.95 THEN
+                (
+                    start_date
+                    - (1 + floor(uniform(id, {s["fee_days_before"]}) * 30))::INTEGER
+                )::TIMESTAMP
+                + to_minutes(
+                    (480 + floor(uniform(id, {s["fee_minutes"]}) * 600))::BIGINT
+                )
+            END AS payment_timestamp,
+            TIMESTAMP '{current_time}' AS created_at,
+            TIMESTAMP '{current_time}' AS updated_at
+        FROM (
+            SELECT
+                row_number() OVER (ORDER BY st.id, se.id) AS id,
+                st.id AS student_id,
+                se.id AS semester_id,
+                se.start_date,
+                -- UKT level and variation are per student
+                (
+                    round(
+                        (
+                            coalesce(f.min_fee, d.min_fee)
+                            + ({level})
+                            * (
+                                coalesce(f.max_fee, d.max_fee)
+                                - coalesce(f.min_fee, d.min_fee)
+                            ) / 7
+                        )
+                        * (0.98 + 0.04 * uniform(st.id, {s["fee_variation"]}))
+                        / 1000
+                    ) * 1000
+                )::BIGINT AS fee_amount
+            FROM ref_students st
+            JOIN ref_semesters se ON se.start_date >= st.enrollment_date
+            LEFT JOIN ref_programs p ON p.id = st.program_id
+            LEFT JOIN fee_structures f ON f.faculty_code = left(p.program_code, 2)
+            JOIN fee_structures d ON d.faculty_code = 'DEFAULT'
+        )
+        ORDER BY id
+    """
+
+
+def academic_records_query(current_time: str) -> str:
+    """SELECT of one record per registered (student, semester)"""
+    return f"""
+        WITH totals AS (
+            SELECT
+                r.student_id,
+                r.semester_id,
+                sum(sc.points * c.credits) AS weighted,
+                sum(c.credits) AS credits,
+                -- Only grades better than E count as passed
+                sum(CASE WHEN g.letter_grade <> 'E' THEN c.credits ELSE 0 END)
+                    AS passed
+            FROM grades g
+            JOIN registrations r ON r.id = g.registration_id
+            JOIN ref_courses c ON c.id = r.course_id
+            JOIN grade_scale sc ON sc.letter_grade = g.letter_grade
+            GROUP BY r.student_id, r.semester_id
+        ),
+        student_semesters AS (
+            SELECT
+                r.student_id,
+                r.semester_id,
+                se.start_date,
+                coalesce(t.weighted, 0) AS weighted,
+                coalesce(t.credits, 0)::BIGINT AS semester_credits,
+                coalesce(t.passed, 0)::BIGINT AS credits_passed
+            FROM (SELECT DISTINCT student_id, semester_id FROM registrations) r
+            LEFT JOIN totals t USING (student_id, semester_id)
+            JOIN ref_semesters se ON se.id = r.semester_id
+        ),
+        running AS (
+            SELECT
+                row_number() OVER (
+                    ORDER BY student_id, start_date, semester_id
+                ) AS id,
+                *,
+                sum(weighted) OVER history AS total_points,
+                sum(semester_credits) OVER history AS total_credits
+            FROM student_semesters
+            WINDOW history AS (
+                PARTITION BY student_id ORDER BY start_date, semester_id
+                ROWS UNBOUNDED PRECEDING
+            )
+        )
+        SELECT
+            uuid4(id, {UUID_STREAMS["academic_records"]}) AS record_id,
+            id,
+            student_id,
+            semester_id,
+            -- Half to even, like numpy.round in the columnar generator
+            round_even(
+                CASE WHEN semester_credits > 0 THEN weighted / semester_credits
+                ELSE 0 END,
+                2
+            )::DOUBLE AS semester_gpa,
+            round_even(
+                CASE WHEN total_credits > 0 THEN total_points / total_credits
+                ELSE 0 END,
+                2
+            )::DOUBLE AS cumulative_gpa,
+            semester_credits,
+            credits_passed,
+            total_credits::BIGINT AS total_credits,
+            TIMESTAMP '{current_time}' AS created_at,
+            TIMESTAMP '{current_time}' AS updated_at
+        FROM running
+        ORDER BY id
+    """
+
+
+def copy_target(
+    save_format: str, output_dir: str, name: str, options: WriterOptions
+) -> tuple:
+    """
+    (path, COPY options) of a table, named like the batch writers' files
+
+    DuckDB has no equivalent of the use_dictionary and data_page_size
+    writer options, they are ignored.
+    """
+    if save_format not in WRITERS:
+        raise ValueError(f"Unsupported output format: {save_format}")
+    path = os.path.join(output_dir, f"{name}.{WRITERS[save_format].extension}")
+    compression = options.compression
+
+    if save_format == "parquet":
+        compression = compression or "snappy"
+        if compression not in PARQUET_COMPRESSION:
+            raise ValueError(f"Unsupported parquet compression: {compression}")
+        copy_options = ["FORMAT parquet", f"COMPRESSION {compression}"]
+        if options.compression_level is not None:
+            copy_options.append(f"COMPRESSION_LEVEL {options.compression_level}")
+        if options.row_group_size:
+            copy_options.append(f"ROW_GROUP_SIZE {options.row_group_size}")
+        return path, copy_options
+
+    if compression not in (None, "none", *TEXT_COMPRESSION):
+        raise ValueError(f"Unsupported {save_format} compression: {compression}")
+    copy_options = ["FORMAT csv", "HEADER"] if save_format == "csv" else ["FORMAT json"]
+    if compression in TEXT_COMPRESSION:
+        path += f".{TEXT_COMPRESSION[compression]}"
+        copy_options.append(f"COMPRESSION {compression}")
+    return path, copy_options
+
+
+def write_sql_tables(
+    reference: Dict[str, pa.Table],
+    n_registrations: int,
+    save_format: str,
+    output_dir: str,
+    entropy: int,
+    current_time: np.datetime64,
+    workers: Optional[int] = None,
+    options: Optional[WriterOptions] = None,
+) -> Dict[str, int]:
+    """
+    Generate the large tables in DuckDB and write them with COPY ... TO
+
+    Args:
+        reference: Reference tables from generate_reference_data
+        n_registrations: Number of registrations to generate
+        save_format: parquet, csv or json (newline-delimited)
+        output_dir: Directory of the <table>.<ext> files
+        entropy: Run seed
+        current_time: created_at/updated_at of the rows
+        workers: DuckDB threads (default: CPU count)
+        options: Compression, compression level and row group size
+
+    Returns:
+        Dict of table name to rows written
+    """
+    options = options or WriterOptions()
+    current_time = str(np.datetime64(current_time, "s")).replace("T", " ")
+    os.makedirs(output_dir, exist_ok=True)
+
+    counts = {}
+    with duckdb.connect() as conn:
+        conn.execute(f"SET threads = {workers or os.cpu_count()}")
+        create_macros(conn, sql_seed(entropy))
+        register_reference(conn, reference)
+
+        logger.info("Generating registrations and grades")
+        generate_registrations(conn, n_registrations, current_time)
+        generate_grades(conn, current_time)
+
+        queries = {
+            "registrations": "SELECT * FROM registrations",
+            "grades": "SELECT * FROM grades",
+            "semester_fees": semester_fees_query(current_time),
+            "academic_records": academic_records_query(current_time),
+        }
+        for name in SQL_TABLES:
+            path, copy_options = copy_target(save_format, output_dir, name, options)
+            (counts[name],) = conn.execute(
+                f"COPY ({queries[name]}) TO '{path}' ({', '.join(copy_options)})"
+            ).fetchone()
+            logger.info(f"Saved {counts[name]} records to {path}")
+    return counts
@@ -1,121 +1,121 @@
 import random
-import uuid
-from datetime import datetime
+from datetime import date, datetime
 
 from faker import Faker
 
+from src.generator.columnar import rows
+from src.generator.name_pool import load_name_pool
+from src.generator.tables import finish_table
+
+# Faculty numeric codes in UI (approximate) - ALL NUMERIC
+faculty_code_map = {
+    "FH": "1",
+    "FK": "2",
+    "FG": "3",
+    "FKM": "4",
+    "FF": "5",
+    "FIK": "6",
+    "FMIPA": "7",
+    "FT": "8",
+    "FASILKOM": "9",
+    "FEB": "0",  # Often 0 or 10
+    "FIB": "1",  # Changed from "A" to numeric
+    "FISIP": "2",  # Changed from "B" to numeric
+    "FPsi": "3",  # Changed from "C" to numeric
+    "FIA": "4",  # Changed from "D" to numeric
+    "FKUI": "5",  # Changed from "E" to numeric
+    "Vokasi": "6",  # Changed from "V" to numeric
+}
+
+
+def npm_program_code(program_code):
+    """
+    Faculty and program digits of a program's NPM, e.g. "0" and "65"
+
+    NPM format for UI: [2-digit year][1-digit faculty code][2-digit program code][5-digit serial]
+    Example: 2106501234 (21 = year 2021, 0 = FEB faculty code, 65 = program code, 01234 = serial)
+    """
+    # First 2 chars of program code is faculty
+    numeric_faculty_code = faculty_code_map.get(program_code[:2], "0")[0]
+
+    # Program code (typically 2 digits) - ensure it's numeric
+    code = program_code[2:4] if len(program_code) > 2 else "00"
+    # Replace letters with their position in alphabet (A=1, B=2, etc)
+    program_digits = "".join(
+        c if c.isdigit() else str(ord(c.upper()) - ord("A") + 1) if c.isalpha() else "0"
+        for c in code
+    )
+    # Ensure it's exactly 2 digits
+    program_digits = program_digits.zfill(2)[:2]
+
+    return numeric_faculty_code, program_digits
+
 
 def generate_student(fake: Faker, programs, n=100, start_year=2018, end_year=2023):
     """
     Generate n random student entries
 
     Args:
-        programs: List of program dicts from program_faker
+        programs: Program table from program_faker
         n: Number of students to generate
         start_year: Earliest enrollment year
         end_year: Latest enrollment year
 
     Returns:
-        List of dicts with keys: student_id, id, npm, username, name, email, enrollment_date, program_id, is_active, created_at, updated_at
+        Arrow table with columns: student_id, id, npm, username, name, email, enrollment_date, program_id, is_active, created_at, updated_at
     """
-    result = []
-    usernames = set()
-    used_npms = set()
-    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    for i in range(1, n + 1):
-        # Select a random program
-        program = random.choice(programs)
-        program_id = program["id"]
+    columns = {
+        name: []
+        for name in [
+            "npm",
+            "username",
+            "name",
+            "email",
+            "enrollment_date",
+            "program_id",
+            "is_active",
+        ]
+    }
+    current_year = datetime.now().year
+    programs = rows(programs)
+
+    # Next free NPM serial per (year, faculty, program) prefix and next
+    # suffix per base username, so uniqueness never needs probing
+    npm_serials = {}
+    username_counts = {}
+    npm_codes = {p["id"]: npm_program_code(p["program_code"]) for p in programs}
+    names = load_name_pool(fake.locales[0])
+
+    # Draw every random column up front
+    student_programs = random.choices(programs, k=n)
+    enrollment_years = random.choices(range(start_year, end_year + 1), k=n)
+    genders = random.choices(["male", "female"], k=n)
+    name_picks = random.choices(range(len(names["male"])), k=n)
+    enrollment_months = random.choices([8, 9], k=n)  # August or September
+    enrollment_days = random.choices(range(1, 29), k=n)
+    graduation_draws = [random.random() for _ in range(n)]
+
+    for i in range(n):
+        program_id = student_programs[i]["id"]
 
         # Generate enrollment year and NPM (Nomor Pokok Mahasiswa)
-        enrollment_year = random.randint(start_year, end_year)
+        enrollment_year = enrollment_years[i]
         year_code = str(enrollment_year)[-2:]  # Last 2 digits of year
 
-        # NPM format for UI: [2-digit year][1-digit faculty code][2-digit program code][4-digit serial]
-        # Example: 2106501234 (21 = year 2021, 0 = FEB faculty code, 65 = program code, 1234 = serial)
-
-        # Map faculty code from program
-        faculty_code = program["program_code"][
-            :2
-        ]  # First 2 chars of program code is faculty
-
-        # Faculty numeric codes in UI (approximate) - ALL NUMERIC
-        faculty_code_map = {
-            "FH": "1",
-            "FK": "2",
-            "FG": "3",
-            "FKM": "4",
-            "FF": "5",
-            "FIK": "6",
-            "FMIPA": "7",
-            "FT": "8",
-            "FASILKOM": "9",
-            "FEB": "0",  # Often 0 or 10
-            "FIB": "1",  # Changed from "A" to numeric
-            "FISIP": "2",  # Changed from "B" to numeric
-            "FPsi": "3",  # Changed from "C" to numeric
-            "FIA": "4",  # Changed from "D" to numeric
-            "FKUI": "5",  # Changed from "E" to numeric
-            "Vokasi": "6",  # Changed from "V" to numeric
-        }
-
-        numeric_faculty_code = faculty_code_map.get(faculty_code, "0")
-        if (
-            len(numeric_faculty_code) > 1
-        ):  # Take only the first digit/letter if more than one
-            numeric_faculty_code = numeric_faculty_code[0]
-
-        # Program code (typically 2 digits) - ensure it's numeric
-        program_code = (
-            program["program_code"][2:4] if len(program["program_code"]) > 2 else "00"
-        )
-        # Replace any non-numeric characters with digits
-        program_digits = ""
-        for char in program_code:
-            if char.isdigit():
-                program_digits += char
-            else:
-                # Replace letters with their position in alphabet (A=1, B=2, etc)
-                if char.isalpha():
-                    program_digits += str(ord(char.upper()) - ord("A") + 1)
-                else:
-                    program_digits += "0"  # Default for special characters
-
-        # Ensure it's exactly 2 digits
-        if len(program_digits) < 2:
-            program_digits = program_digits.zfill(2)  # Pad with leading zeros
-        elif len(program_digits) > 2:
-            program_digits = program_digits[:2]  # Take first two digits
-
-        # Generate serial number - ensure uniqueness within each program+year
-        serial = f"{(i % 10000):04d}"  # 4-digit serial number
-
-        # Generate completely numeric NPM
-        npm = f"{year_code}{numeric_faculty_code}{program_digits}{serial}"
-
-        # Replace any remaining non-numeric characters (just to be safe)
-        npm = "".join(c if c.isdigit() else "0" for c in npm)
-
-        # Ensure it's exactly 10 digits
-        npm = npm.zfill(10)[
-            :10
-        ]  # Pad with leading zeros if needed and limit to 10 chars
-
-        # Ensure NPM is unique
-        counter = 1
-        base_npm = npm
-        while npm in used_npms:
-            # Modify last 4 digits to make it unique
-            serial_num = (int(base_npm[-4:]) + counter) % 10000
-            npm = base_npm[:-4] + f"{serial_num:04d}"
-            counter += 1
-
-        used_npms.add(npm)
-
-        # Generate name and gender
-        gender = random.choice(["male", "female"])
-        name = fake.name_male() if gender == "male" else fake.name_female()
+        numeric_faculty_code, program_digits = npm_codes[program_id]
+        prefix = f"{year_code}{numeric_faculty_code}{program_digits}"
+        serial = npm_serials.get(prefix, 0)
+        if serial >= 100000:
+            raise ValueError(f"NPM serials exhausted for prefix {prefix}")
+        npm_serials[prefix] = serial + 1
+
+        # Generate completely numeric NPM, exactly 10 digits. The serial takes
+        # the digit that used to be zero padding, so a (year, faculty,
+        # program) prefix holds 100k students
+        npm = f"{prefix}{serial:05d}"
+
+        # Pick a name from the pool of the student's gender
+        name = names[genders[i]][name_picks[i]]
 
         # Generate username (lowercase first letter of first name + lastname)
         name_parts = name.split()
@@ -123,44 +123,31 @@ def generate_student(fake: Faker, programs, n=100, start_year=2018, end_year=202
         last_name = name_parts[-1].lower()
         base_username = f"{first_initial}{last_name}"
 
-        # Ensure username is unique
-        username = base_username
-        counter = 1
-        while username in usernames:
-            username = f"{base_username}{counter}"
-            counter += 1
-        usernames.add(username)
+        # Ensure username is unique: base, base1, base2, ...
+        count = username_counts.get(base_username, 0)
+        username_counts[base_username] = count + 1
+        username = f"{base_username}{count}" if count else base_username
 
         # Generate email
         email = f"{username}@mahasiswa.ui.ac.id"
 
         # Generate enrollment date
-        enrollment_month = random.choice([8, 9])  # August or September enrollment
-        enrollment_day = random.randint(1, 28)
-        enrollment_date = datetime(
-            enrollment_year, enrollment_month, enrollment_day
-        ).strftime("%Y-%m-%d")
+        enrollment_date = date(
+            enrollment_year, enrollment_months[i], enrollment_days[i]
+        )
 
         # Determine if student is active (students from earlier years may have graduated)
-        years_enrolled = datetime.now().year - enrollment_year
+        years_enrolled = current_year - enrollment_year
         is_active = True
         if years_enrolled >= 4:  # Standard 4-year program
-            is_active = random.random() > 0.8  # 80% chance they've graduated
-
-        result.append(
-            {
-                "student_id": str(uuid.uuid4()),
-                "id": i,
-                "npm": npm,
-                "username": username,
-                "name": name,
-                "email": email,
-                "enrollment_date": enrollment_date,
-                "program_id": program_id,
-                "is_active": is_active,
-                "created_at": current_time,
-                "updated_at": current_time,
-            }
-        )
+            is_active = graduation_draws[i] > 0.8  # 80% chance they've graduated
+
+        columns["npm"].append(npm)
+        columns["username"].append(username)
+        columns["name"].append(name)
+        columns["email"].append(email)
+        columns["enrollment_date"].append(enrollment_date)
+        columns["program_id"].append(program_id)
+        columns["is_active"].append(is_active)
 
-    return result
+    return finish_table("students", {"id": list(range(1, n + 1)), **columns})
@@ -0,0 +1,204 @@
+"""
+Output protocol of the table generators.
+
+Every generator returns a pyarrow.Table with its table's schema in
+TABLE_SCHEMAS instead of a list of dicts:
+
+- UUID keys are arrow.uuid, 16 bytes instead of a 36-character string
+- dates are date32, class times time32[s] and timestamps timestamp[s]
+- created_at/updated_at, one value per generated table, are dictionary
+  encoded, so the column is a single value plus int32 indices
+
+Such tables cross the process pool and shared memory as Arrow buffers and
+reach the writers without a per-row conversion. Run-end encoding would be
+smaller still for the constants, but neither the Parquet nor the CSV writer
+accepts it.
+
+Generators that build rows one at a time collect plain values and call
+finish_table; generators that read rows one at a time convert their Arrow
+inputs with src.generator.columnar.rows.
+"""
+
+import random
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pyarrow as pa
+
+from src.generator.columnar import (
+    STAMP_TYPE,
+    TIMESTAMP_TYPE,
+    UUID_TYPE,
+    cast_array,
+    now_seconds,
+    timestamp_array,
+    uuid4_array,
+)
+
+
+def stamped(*fields) -> pa.Schema:
+    """Schema of the fields followed by created_at and updated_at"""
+    return pa.schema([*fields, ("created_at", STAMP_TYPE), ("updated_at", STAMP_TYPE)])
+
+
+TABLE_SCHEMAS: Dict[str, pa.Schema] = {
+    "faculties": stamped(
+        ("faculty_id", UUID_TYPE),
+        ("id", pa.int64()),
+        ("faculty_code", pa.string()),
+        ("faculty_name", pa.string()),
+    ),
+    "programs": stamped(
+        ("program_id", UUID_TYPE),
+        ("id", pa.int64()),
+        ("program_code", pa.string()),
+        ("program_name", pa.string()),
+        ("faculty_id", pa.int64()),
+    ),
+    "lecturers": stamped(
+        ("lecturer_id", UUID_TYPE),
+        ("id", pa.int64()),
+        ("nip", pa.string()),
+        ("name", pa.string()),
+        ("email", pa.string()),
+        ("faculty_id", pa.int64()),
+    ),
+    "students": stamped(
+        ("student_id", UUID_TYPE),
+        ("id", pa.int64()),
+        ("npm", pa.string()),
+        ("username", pa.string()),
+        ("name", pa.string()),
+        ("email", pa.string()),
+        ("enrollment_date", pa.date32()),
+        ("program_id", pa.int64()),
+        ("is_active", pa.bool_()),
+    ),
+    "rooms": stamped(
+        ("room_id", UUID_TYPE),
+        ("id", pa.int64()),
+        ("room_code", pa.string()),
+        ("building", pa.string()),
+        ("capacity", pa.int64()),
+    ),
+    "courses": stamped(
+        ("course_id", UUID_TYPE),
+        ("id", pa.int64()),
+        ("course_code", pa.string()),
+        ("course_name", pa.string()),
+        ("credits", pa.int64()),
+        ("program_id", pa.int64()),
+    ),
+    "semesters": stamped(
+        ("semester_id", UUID_TYPE),
+        ("id", pa.int64()),
+        ("semester_code", pa.string()),
+        ("semester_name", pa.string()),
+        ("start_date", pa.date32()),
+        ("end_date", pa.date32()),
+    ),
+    "class_schedules": stamped(
+        ("schedule_id", UUID_TYPE),
+        ("id", pa.int64()),
+        ("course_id", pa.int64()),
+        ("lecturer_id", pa.int64()),
+        ("room_id", pa.int64()),
+        ("semester_id", pa.int64()),
+        ("day_of_week", pa.string()),
+        ("start_time", pa.time32("s")),
+        ("end_time", pa.time32("s")),
+        ("start_time_delta", TIMESTAMP_TYPE),
+        ("end_time_delta", TIMESTAMP_TYPE),
+    ),
+    "registrations": stamped(
+        ("registration_id", UUID_TYPE),
+        ("id", pa.int64()),
+        ("student_id", pa.int64()),
+        ("course_id", pa.int64()),
+        ("semester_id", pa.int64()),
+        ("registration_timestamp", TIMESTAMP_TYPE),
+    ),
+    "grades": stamped(
+        ("grade_id", UUID_TYPE),
+        ("id", pa.int64()),
+        ("registration_id", pa.int64()),
+        ("final_grade", pa.float64()),
+        ("letter_grade", pa.string()),
+    ),
+    "semester_fees": stamped(
+        ("fee_id", UUID_TYPE),
+        ("id", pa.int64()),
+        ("student_id", pa.int64()),
+        ("semester_id", pa.int64()),
+        ("fee_amount", pa.int64()),
+        ("payment_timestamp", TIMESTAMP_TYPE),
+    ),
+    "academic_records": stamped(
+        ("record_id", UUID_TYPE),
+        ("id", pa.int64()),
+        ("student_id", pa.int64()),
+        ("semester_id", pa.int64()),
+        ("semester_gpa", pa.float64()),
+        ("cumulative_gpa", pa.float64()),
+        ("semester_credits", pa.int64()),
+        ("credits_passed", pa.int64()),
+        ("total_credits", pa.int64()),
+    ),
+    # Attendance comes from another system: no UUID key and no stamps
+    "attendance": pa.schema(
+        [
+            ("id", pa.int64()),
+            ("student_id", pa.int64()),
+            ("course_id", pa.int64()),
+            ("class_schedule_id", pa.int64()),
+            ("room_id", pa.int64()),
+            ("semester_id", pa.int64()),
+            ("meeting_date", pa.date32()),
+            ("check_in_time", pa.time32("s")),
+        ]
+    ),
+}
+
+
+def finish_table(
+    name: str,
+    data: Union[Dict[str, list], List[Dict]],
+    current_time: Optional[np.datetime64] = None,
+    rng: Optional[np.random.Generator] = None,
+) -> pa.Table:
+    """
+    Build a generator's output table from plain values
+
+    Columns missing from data are filled in: the UUID key with random
+    UUIDs and created_at/updated_at with current_time. Every column is cast
+    to its type in TABLE_SCHEMAS[name].
+
+    Args:
+        name: Table name
+        data: Dict of column lists, or list of row dicts
+        current_time: created_at/updated_at value, defaults to now
+        rng: numpy Generator of the UUIDs, by default one seeded from the
+             random module so seeded generators stay reproducible
+
+    Returns:
+        Arrow table with the schema TABLE_SCHEMAS[name]
+    """
+    schema = TABLE_SCHEMAS[name]
+    table = pa.Table.from_pylist(data) if isinstance(data, list) else pa.table(data)
+    n = table.num_rows
+    current_time = current_time if current_time is not None else now_seconds()
+    rng = rng if rng is not None else np.random.default_rng(random.getrandbits(64))
+
+    columns = []
+    for field in schema:
+        if field.name in table.column_names:
+            columns.append(cast_array(table.column(field.name), field.type))
+        elif field.type == UUID_TYPE:
+            columns.append(uuid4_array(rng, n))
+        elif field.type == STAMP_TYPE:
+            columns.append(timestamp_array(current_time, n))
+        elif n == 0:
+            columns.append(pa.array([], field.type))
+        else:
+            raise ValueError(f"{name} rows have no {field.name} column")
+    return pa.table(columns, schema=schema)
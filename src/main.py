@@ -1,10 +1,12 @@
+import argparse
 import logging
 import os
 
 import duckdb
 from dotenv import load_dotenv
 
-from pipeline.extract import extract
+from pipeline.cdc import ingest
+from pipeline.extract import extract, extract_to_staging
 from pipeline.load_iceberg import load_iceberg
 from pipeline.transform import transform
 from utils.logging import setup_logging
@@ -15,7 +17,13 @@ setup_logging()
 logger = logging.getLogger(__name__)
 
 
-def main():
+def main(
+    full_refresh: bool = False,
+    cdc: bool = False,
+    staging_cache: bool = False,
+    all_columns: bool = False,
+    rebuild: bool = False,
+):
     logger.info("🚀 Starting ETL Pipeline")
     os.makedirs("data/duckdb", exist_ok=True)
 
@@ -32,10 +40,15 @@ def main():
     db_con.execute("ATTACH DATABASE '' AS p_siak (TYPE POSTGRES, READ_ONLY);")
 
     logger.info("📥 Extracting data...")
-    extract(db_con)
+    if cdc:
+        ingest(db_con, prune_columns=not all_columns)
+    elif staging_cache:
+        extract_to_staging(db_con, prune_columns=not all_columns)
+    else:
+        extract(db_con, full_refresh=full_refresh, prune_columns=not all_columns)
 
     logger.info("🔄 Transforming data...")
-    transform(db_con)
+    transform(db_con, full_refresh=full_refresh or rebuild)
 
     logger.info("📤 Loading data with Delta table...")
     # load_delta(db_con)
@@ -48,4 +61,41 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Run the SIAK ETL pipeline")
+    parser.add_argument(
+        "--full-refresh",
+        action="store_true",
+        help="Copy every PostgreSQL table whole instead of only the rows "
+        "updated since the previous run, and rebuild every transformed table",
+    )
+    parser.add_argument(
+        "--cdc",
+        action="store_true",
+        help="Apply the changes from the logical replication slot instead of "
+        "polling updated_at (needs wal_level=logical)",
+    )
+    parser.add_argument(
+        "--staging-cache",
+        action="store_true",
+        help="Snapshot the PostgreSQL tables into Parquet under STAGING_PATH "
+        "and reuse the snapshots of unchanged tables",
+    )
+    parser.add_argument(
+        "--all-columns",
+        action="store_true",
+        help="Extract every column, also the ones the transform step does not read",
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Rebuild every transformed table whole instead of merging the "
+        "changed rows, without copying the PostgreSQL tables again",
+    )
+    args = parser.parse_args()
+    main(
+        full_refresh=args.full_refresh,
+        cdc=args.cdc,
+        staging_cache=args.staging_cache,
+        all_columns=args.all_columns,
+        rebuild=args.rebuild,
+    )
@@ -0,0 +1,353 @@
+"""
+Change data capture from PostgreSQL into the DuckDB staging tables.
+
+Changes are read from a logical replication slot with the built-in pgoutput
+plugin, through the SQL interface (pg_logical_slot_peek_binary_changes), so
+the source only needs wal_level=logical. The slot keeps every change since
+it was created; each run decodes whole transactions, batches them per table
+into Arrow and merges them into the staging tables by id, like the
+incremental extract. Inserts, updates, hard deletes and truncates are all
+captured, and the source never scans a table.
+
+Progress is the end LSN of the last applied transaction. It is stored in
+DuckDB in the same transaction as the changes and only then confirmed to
+the slot, so after a crash in between the already applied transactions are
+skipped instead of applied twice.
+"""
+
+import logging
+import struct
+from typing import Dict, List, Optional, Tuple
+
+import psycopg
+import pyarrow as pa
+from duckdb import DuckDBPyConnection
+from psycopg import sql
+
+from pipeline.extract import extract, staged, staged_columns, tables
+
+logger = logging.getLogger(__name__)
+
+CDC_SLOT = "siak_cdc"
+CDC_PUBLICATION = "siak_cdc"
+CDC_STATE_TABLE = "cdc_state"
+# Changes decoded per round trip; whole transactions are always returned
+BATCH_CHANGES = 100_000
+
+
+def lsn_to_int(lsn: str) -> int:
+    high, low = lsn.split("/")
+    return (int(high, 16) << 32) | int(low, 16)
+
+
+def int_to_lsn(value: int) -> str:
+    return f"{value >> 32:X}/{value & 0xFFFFFFFF:X}"
+
+
+class PgOutputDecoder:
+    """
+    Decoder of pgoutput protocol version 1 messages
+
+    Relation messages precede the first change of a table in every decoding
+    session and are remembered; begin, commit, insert, update, delete and
+    truncate are returned as tuples, everything else as None.
+    """
+
+    def __init__(self):
+        self.relations: Dict[int, Tuple[str, List[str]]] = {}
+        self._data = b""
+        self._pos = 0
+
+    def decode(self, data: bytes) -> Optional[tuple]:
+        self._data, self._pos = data, 1
+        kind = data[:1]
+        if kind == b"B":
+            final_lsn, _, xid = self._unpack("!qqI")
+            return ("begin", final_lsn, xid)
+        if kind == b"C":
+            _, commit_lsn, end_lsn, _ = self._unpack("!bqqq")
+            return ("commit", commit_lsn, end_lsn)
+        if kind == b"R":
+            (oid,) = self._unpack("!I")
+            self._string()  # namespace
+            name = self._string()
+            _, n_columns = self._unpack("!bh")
+            columns = []
+            for _ in range(n_columns):
+                self._unpack("!b")  # flags
+                columns.append(self._string())
+                self._unpack("!Ii")  # type oid, type modifier
+            self.relations[oid] = (name, columns)
+            return None
+        if kind == b"I":
+            (oid,) = self._unpack("!I")
+            self._pos += 1  # "N"
+            return ("insert", *self._row(oid))
+        if kind == b"U":
+            (oid,) = self._unpack("!I")
+            if self._data[self._pos : self._pos + 1] in (b"K", b"O"):
+                self._pos += 1
+                self._tuple()  # old key or row
+            self._pos += 1  # "N"
+            return ("update", *self._row(oid))
+        if kind == b"D":
+            (oid,) = self._unpack("!I")
+            self._pos += 1  # "K" or "O", the key columns are always set
+            return ("delete", *self._row(oid))
+        if kind == b"T":
+            n_relations, _ = self._unpack("!Ib")
+            oids = self._unpack(f"!{n_relations}I")
+            return ("truncate", [self.relations[oid][0] for oid in oids])
+        return None
+
+    def _unpack(self, fmt: str) -> tuple:
+        values = struct.unpack_from(fmt, self._data, self._pos)
+        self._pos += struct.calcsize(fmt)
+        return values
+
+    def _string(self) -> str:
+        end = self._data.index(b"\0", self._pos)
+        value = self._data[self._pos : end].decode()
+        self._pos = end + 1
+        return value
+
+    def _tuple(self) -> List[Optional[str]]:
+        (n_columns,) = self._unpack("!h")
+        values = []
+        for _ in range(n_columns):
+            kind = self._data[self._pos : self._pos + 1]
+            self._pos += 1
+            if kind == b"t":
+                (length,) = self._unpack("!i")
+                values.append(self._data[self._pos : self._pos + length].decode())
+                self._pos += length
+            elif kind == b"n":
+                values.append(None)
+            else:
+                # "u": an unchanged TOASTed value; SIAK rows are never TOASTed
+                raise ValueError(f"Unsupported pgoutput column kind {kind!r}")
+        return values
+
+    def _row(self, oid: int) -> Tuple[str, Dict[str, Optional[str]]]:
+        name, columns = self.relations[oid]
+        return name, dict(zip(columns, self._tuple()))
+
+
+def create_cdc_slot(
+    conninfo: str = "", slot: str = CDC_SLOT, publication: str = CDC_PUBLICATION
+) -> bool:
+    """
+    Create the publication of the SIAK tables and the replication slot,
+    unless they exist
+
+    Returns:
+        Whether the slot was created, i.e. the staging tables have to be
+        copied whole once
+    """
+    with psycopg.connect(conninfo, autocommit=True) as conn:
+        if not conn.execute(
+            "SELECT 1 FROM pg_publication WHERE pubname = %s", (publication,)
+        ).fetchone():
+            conn.execute(
+                sql.SQL("CREATE PUBLICATION {} FOR TABLE {}").format(
+                    sql.Identifier(publication),
+                    sql.SQL(", ").join(map(sql.Identifier, tables)),
+                )
+            )
+        if conn.execute(
+            "SELECT 1 FROM pg_replication_slots WHERE slot_name = %s", (slot,)
+        ).fetchone():
+            return False
+        conn.execute(
+            "SELECT pg_create_logical_replication_slot(%s, 'pgoutput')", (slot,)
+        )
+    logger.info(f"Created replication slot {slot} for publication {publication}")
+    return True
+
+
+class ChangeBuffer:
+    """Decoded changes of one round trip, per table, in commit order"""
+
+    def __init__(self):
+        self.rows: Dict[str, List[dict]] = {}
+        self.counts: Dict[str, Dict[str, int]] = {}
+        self.sequence = 0
+
+    def add(self, op: str, table: str, values: Dict[str, Optional[str]]) -> None:
+        self.sequence += 1
+        self.rows.setdefault(table, []).append(
+            {"_seq": self.sequence, "_op": op, **values}
+        )
+        counts = self.counts.setdefault(table, {})
+        counts[op] = counts.get(op, 0) + 1
+
+    def apply(self, duck: DuckDBPyConnection, names: Optional[List[str]] = None):
+        """
+        Merge the buffered changes of the tables (default: all) into their
+        staging tables: the last version of every changed id replaces the
+        staged row, or deletes it
+        """
+        for table in names if names is not None else list(self.rows):
+            rows = self.rows.pop(table, None)
+            if not rows:
+                continue
+            # pgoutput sends every column (only the key of a delete), the
+            # staging table may hold only some of them
+            columns = staged_columns(duck, table)
+            changes = pa.Table.from_pydict(
+                {
+                    name: [row.get(name) for row in rows]
+                    for name in ["_seq", "_op", *columns]
+                }
+            )
+            duck.register("cdc_changes", changes)
+            duck.execute(f"""
+                DELETE FROM {table}
+                WHERE id IN (SELECT CAST(id AS BIGINT) FROM cdc_changes)
+            """)
+            # Text values are cast to the staging table's column types
+            select = ", ".join(f'"{name}"' for name in columns)
+            duck.execute(f"""
+                INSERT INTO {table} BY NAME
+                SELECT {select}
+                FROM (
+                    SELECT * FROM cdc_changes
+                    QUALIFY _seq = MAX(_seq) OVER (PARTITION BY id)
+                )
+                WHERE _op <> 'delete'
+            """)
+            duck.unregister("cdc_changes")
+
+
+def read_cdc_state(duck: DuckDBPyConnection, slot: str) -> Optional[int]:
+    duck.execute(f"""
+        CREATE TABLE IF NOT EXISTS {CDC_STATE_TABLE} (
+            slot_name VARCHAR PRIMARY KEY,
+            lsn VARCHAR,
+            applied_at TIMESTAMP
+        )
+    """)
+    row = duck.execute(
+        f"SELECT lsn FROM {CDC_STATE_TABLE} WHERE slot_name = ?", [slot]
+    ).fetchone()
+    return lsn_to_int(row[0]) if row else None
+
+
+def consume_changes(
+    duck: DuckDBPyConnection,
+    conninfo: str = "",
+    slot: str = CDC_SLOT,
+    publication: str = CDC_PUBLICATION,
+    batch_changes: int = BATCH_CHANGES,
+) -> Dict[str, Dict[str, int]]:
+    """
+    Apply every change in the replication slot to the staging tables
+
+    Args:
+        duck: Connection to the DuckDB database with the staging tables
+        conninfo: PostgreSQL connection string (default: PG* variables)
+        slot: Logical replication slot using pgoutput
+        publication: Publication of the SIAK tables
+        batch_changes: Changes decoded per round trip
+
+    Returns:
+        Dict of table name to {"insert" | "update" | "delete" | "truncate":
+        count} of the applied changes
+    """
+    applied = read_cdc_state(duck, slot)
+    counts: Dict[str, Dict[str, int]] = {}
+    with psycopg.connect(conninfo, autocommit=True) as conn:
+        while True:
+            messages = conn.execute(
+                """
+                SELECT data FROM pg_logical_slot_peek_binary_changes(
+                    %s, NULL, %s,
+                    'proto_version', '1', 'publication_names', %s
+                )
+                """,
+                (slot, batch_changes, publication),
+            ).fetchall()
+            if not messages:
+                break
+
+            decoder = PgOutputDecoder()
+            buffer = ChangeBuffer()
+            end_lsn = None
+            skip = False
+            duck.execute("BEGIN TRANSACTION")
+            try:
+                for (data,) in messages:
+                    change = decoder.decode(bytes(data))
+                    if change is None:
+                        continue
+                    kind = change[0]
+                    if kind == "begin":
+                        # Applied before a crash, but not confirmed to the slot
+                        skip = applied is not None and change[1] < applied
+                    elif kind == "commit":
+                        end_lsn = change[2]
+                    elif skip:
+                        continue
+                    elif kind == "truncate":
+                        buffer.apply(duck, change[1])
+                        for table in change[1]:
+                            duck.execute(f"DELETE FROM {table}")
+                            counts.setdefault(table, {})
+                            counts[table]["truncate"] = (
+                                counts[table].get("truncate", 0) + 1
+                            )
+                    else:
+                        buffer.add(kind, change[1], change[2])
+                buffer.apply(duck)
+                duck.execute(
+                    f"""
+                    INSERT OR REPLACE INTO {CDC_STATE_TABLE}
+                    VALUES (?, ?, now()::TIMESTAMP)
+                    """,
+                    [slot, int_to_lsn(end_lsn)],
+                )
+                duck.execute("COMMIT")
+            except BaseException:
+                duck.execute("ROLLBACK")
+                raise
+            applied = end_lsn
+            conn.execute(
+                "SELECT pg_replication_slot_advance(%s, %s::pg_lsn)",
+                (slot, int_to_lsn(end_lsn)),
+            )
+
+            for table, ops in buffer.counts.items():
+                for op, n in ops.items():
+                    counts.setdefault(table, {})
+                    counts[table][op] = counts[table].get(op, 0) + n
+            logger.info(
+                f"Applied {len(messages):,} change messages up to {int_to_lsn(end_lsn)}"
+            )
+    return counts
+
+
+def ingest(
+    duck: DuckDBPyConnection,
+    conninfo: str = "",
+    slot: str = CDC_SLOT,
+    publication: str = CDC_PUBLICATION,
+    prune_columns: bool = True,
+) -> Dict[str, Dict[str, int]]:
+    """
+    Bring the staging tables up to date through the replication slot
+
+    The first run creates the slot and then copies every table whole with
+    extract; changes that happen during the copy are in the slot, and
+    applying them again by id is harmless. Changes are applied to the
+    columns the staging tables have, see prune_columns of extract.
+    """
+    logger.info("🚀 Starting CDC ingestion")
+    created = create_cdc_slot(conninfo, slot, publication)
+    if created or not all(staged(duck, table) for table in tables):
+        extract(duck, full_refresh=True, prune_columns=prune_columns)
+
+    counts = consume_changes(duck, conninfo, slot, publication)
+    logger.info("📊 CDC summary:")
+    for table, ops in counts.items():
+        logger.info(f"   - {table}: {ops}")
+    return counts
@@ -0,0 +1,218 @@
+"""
+Dependency-graph scheduling of the transform steps.
+
+Every dim or fact table is a TransformNode that declares the tables it
+reads. run_nodes starts each node on its own DuckDB cursor as soon as the
+nodes it reads from are done, so independent steps run concurrently.
+
+A node is skipped when nothing it depends on changed since its last
+successful run: its fingerprint covers the source of its function, the
+fingerprints of its inputs and the version of the code all nodes share (the
+helpers they call and their settings), and is kept in the transform_state
+table. A staging table is fingerprinted by its columns, row count and max
+updated_at (every write bumps updated_at, a delete lowers the count), a view
+by its definition, and a node's output by the node's own fingerprint.
+Nightly transform time then depends on what changed, not on the warehouse
+size.
+"""
+
+import hashlib
+import inspect
+import json
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from duckdb import DuckDBPyConnection
+
+logger = logging.getLogger(__name__)
+
+# Fingerprint of every node's output as of its last successful run
+TRANSFORM_STATE_TABLE = "transform_state"
+
+
+class TransformNode(NamedTuple):
+    name: str
+    # Step function, called as run(cursor); writes the table or view `name`
+    run: Callable[[DuckDBPyConnection], None]
+    # Staging tables, views and other nodes it reads
+    inputs: Tuple[str, ...] = ()
+
+
+def check_nodes(nodes: List[TransformNode]) -> None:
+    """Reject duplicate names and cycles before anything is started"""
+    names = [node.name for node in nodes]
+    duplicates = {name for name in names if names.count(name) > 1}
+    if duplicates:
+        raise ValueError(f"Transform nodes {duplicates} are defined twice")
+
+    done = set()
+    remaining = list(nodes)
+    while remaining:
+        ready = [
+            n for n in remaining if all(i in done or i not in names for i in n.inputs)
+        ]
+        if not ready:
+            cycle = [n.name for n in remaining]
+            raise ValueError(f"Transform nodes {cycle} depend on each other")
+        done.update(n.name for n in ready)
+        remaining = [n for n in remaining if n.name not in done]
+
+
+def relation_fingerprint(duck: DuckDBPyConnection, name: str) -> Optional[str]:
+    """
+    Cheap fingerprint of a table or view in the DuckDB database, None if
+    there is none
+
+    Tables without updated_at are hashed whole.
+    """
+    view = duck.execute(
+        """
+        SELECT sql FROM duckdb_views()
+        WHERE database_name = current_database() AND view_name = ?
+        """,
+        [name],
+    ).fetchone()
+    if view:
+        return view[0]
+    columns = duck.execute(
+        """
+        SELECT list(column_name || ' ' || data_type ORDER BY column_index)
+        FROM duckdb_columns()
+        WHERE database_name = current_database() AND table_name = ?
+        """,
+        [name],
+    ).fetchone()[0]
+    if not columns:
+        return None
+    if "updated_at TIMESTAMP" in columns:
+        values = duck.execute(f"SELECT COUNT(*), MAX(updated_at) FROM {name}")
+    else:
+        values = duck.execute(f"SELECT COUNT(*), bit_xor(hash(t)) FROM {name} t")
+    return json.dumps([columns, list(values.fetchone())], default=str)
+
+
+def relation_exists(duck: DuckDBPyConnection, name: str) -> bool:
+    return bool(
+        duck.execute(
+            """
+            SELECT COUNT(*) FROM information_schema.tables
+            WHERE table_catalog = current_database() AND table_name = ?
+            """,
+            [name],
+        ).fetchone()[0]
+    )
+
+
+def node_fingerprint(
+    node: TransformNode, inputs: Dict[str, Optional[str]], version: str = ""
+) -> str:
+    key = json.dumps(
+        [version, inspect.getsource(node.run), [inputs[i] for i in node.inputs]]
+    )
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+def read_transform_state(duck: DuckDBPyConnection) -> Dict[str, str]:
+    duck.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TRANSFORM_STATE_TABLE} (
+            table_name VARCHAR PRIMARY KEY,
+            fingerprint VARCHAR,
+            transformed_at TIMESTAMP
+        )
+    """)
+    return dict(
+        duck.execute(
+            f"SELECT table_name, fingerprint FROM {TRANSFORM_STATE_TABLE}"
+        ).fetchall()
+    )
+
+
+def run_nodes(
+    duck: DuckDBPyConnection,
+    nodes: List[TransformNode],
+    concurrency: int = 1,
+    full_refresh: bool = False,
+    version: str = "",
+) -> Dict[str, Optional[float]]:
+    """
+    Run transform nodes in dependency order, skipping the unchanged ones
+
+    Args:
+        duck: Connection to the DuckDB database with the staging tables
+        nodes: Transform nodes, in the order results should be returned
+        concurrency: Nodes run at the same time, each on its own cursor
+        full_refresh: Run every node, also the unchanged ones
+        version: Fingerprint of the code shared by the nodes; when it changes
+                 every node runs again
+
+    Returns:
+        Dict of node name to seconds it ran, None for a skipped node
+    """
+    check_nodes(nodes)
+    names = {node.name for node in nodes}
+    stored = read_transform_state(duck)
+    # Staging tables do not change during transform, nodes' outputs only
+    # become inputs once their node is done
+    fingerprints: Dict[str, Optional[str]] = {
+        name: relation_fingerprint(duck, name)
+        for name in sorted({i for node in nodes for i in node.inputs} - names)
+    }
+    results: Dict[str, Optional[float]] = {}
+    pending = list(nodes)
+    running = {}
+
+    def run(node: TransformNode) -> float:
+        # DuckDB connections are not thread safe, every node gets a cursor
+        with duck.cursor() as cursor:
+            start = time.perf_counter()
+            node.run(cursor)
+            return time.perf_counter() - start
+
+    def finish(node: TransformNode, seconds: Optional[float]) -> None:
+        results[node.name] = seconds
+        if seconds is not None:
+            duck.execute(
+                f"""
+                INSERT OR REPLACE INTO {TRANSFORM_STATE_TABLE}
+                VALUES (?, ?, now()::TIMESTAMP)
+                """,
+                [node.name, fingerprints[node.name]],
+            )
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+
+        def submit_ready():
+            # Skipping a node can make its dependents ready, so repeat
+            while True:
+                ready = [
+                    n
+                    for n in pending
+                    if all(i in results or i not in names for i in n.inputs)
+                ]
+                if not ready:
+                    return
+                for node in ready:
+                    pending.remove(node)
+                    fingerprints[node.name] = node_fingerprint(
+                        node, fingerprints, version
+                    )
+                    if (
+                        not full_refresh
+                        and stored.get(node.name) == fingerprints[node.name]
+                        and relation_exists(duck, node.name)
+                    ):
+                        finish(node, None)
+                    else:
+                        running[executor.submit(run, node)] = node
+
+        submit_ready()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                node = running.pop(future)
+                finish(node, future.result())
+            submit_ready()
+
+    return {node.name: results[node.name] for node in nodes}
@@ -1,7 +1,16 @@
+import hashlib
+import json
 import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
 
 from duckdb import DuckDBPyConnection
 
+from pipeline.lineage import log_pruning, required_columns, source_columns
+
 logger = logging.getLogger(__name__)
 
 tables = [
@@ -19,18 +28,546 @@ tables = [
     "academic_records",
 ]
 
+# Attendance does not live in PostgreSQL; it is read straight from the
+# semester-partitioned Parquet written by `generate_data --attendance`
+ATTENDANCE_PATH = os.getenv("ATTENDANCE_PATH", "data/generated/attendance")
+
+# Tables copied at the same time, each on its own DuckDB cursor and therefore
+# its own Postgres scan (1: one after the other)
+EXTRACT_CONCURRENCY = int(os.getenv("EXTRACT_CONCURRENCY", "1"))
+
+# The largest tables start first so they do not end up running alone, and
+# a full copy of one is split into id ranges of about this many rows
+large_tables = ["registrations", "grades", "academic_records", "semester_fees"]
+EXTRACT_PARTITION_ROWS = int(os.getenv("EXTRACT_PARTITION_ROWS", "2000000"))
+
+
+# High-water mark of every staging table: the newest source updated_at it has
+WATERMARK_TABLE = "extract_watermarks"
+# Seconds before the watermark an incremental copy starts reading from.
+# updated_at is the start of the writing transaction, so a row committed
+# after the previous extract can carry an older updated_at than its
+# watermark; rows read twice are merged by id again (default: 3600, the
+# longest expected source transaction)
+WATERMARK_OVERLAP = int(os.getenv("WATERMARK_OVERLAP", "3600"))
+
+# Parquet snapshots of the source tables, <table>/<fingerprint>.parquet, see
+# extract_to_staging
+STAGING_PATH = os.getenv("STAGING_PATH", "data/staging")
+
+
+def select_list(columns: Optional[List[str]]) -> str:
+    """SQL select list of the columns, * for all"""
+    return ", ".join(f'"{name}"' for name in columns) if columns else "*"
+
+
+def staged_columns(duck: DuckDBPyConnection, table: str) -> List[str]:
+    return [d[0] for d in duck.execute(f"SELECT * FROM {table} LIMIT 0").description]
+
+
+def source_has_watermark(duck: DuckDBPyConnection, table: str) -> bool:
+    """Whether the PostgreSQL table has an updated_at column"""
+    return (
+        duck.execute(
+            """
+            SELECT COUNT(*) FROM information_schema.columns
+            WHERE table_catalog = 'p_siak' AND table_name = ?
+                AND column_name = 'updated_at'
+            """,
+            [table],
+        ).fetchone()[0]
+        > 0
+    )
+
+
+def staged(duck: DuckDBPyConnection, table: str) -> bool:
+    """Whether a staging table exists in the DuckDB database"""
+    return (
+        duck.execute(
+            """
+            SELECT COUNT(*) FROM duckdb_tables()
+            WHERE database_name = current_database() AND table_name = ?
+            """,
+            [table],
+        ).fetchone()[0]
+        > 0
+    )
+
+
+def snapshot_view(duck: DuckDBPyConnection, table: str) -> bool:
+    """Whether a table is staged as a view of a Parquet snapshot"""
+    return (
+        duck.execute(
+            """
+            SELECT COUNT(*) FROM duckdb_views()
+            WHERE database_name = current_database() AND view_name = ?
+            """,
+            [table],
+        ).fetchone()[0]
+        > 0
+    )
+
+
+def read_watermark(
+    duck: DuckDBPyConnection,
+    table: str,
+    full_refresh: bool = False,
+    columns: Optional[List[str]] = None,
+) -> Optional[datetime]:
+    """
+    updated_at the next copy of a table can start from, or None if it has
+    to be copied whole; also when the staging table has other columns than
+    the ones to extract now
+
+    A table about to be copied whole loses its watermark first, so a copy
+    that fails halfway is copied whole again by the next run, and the view
+    of a Parquet snapshot by the same name is dropped.
+    """
+    watermark = None
+    if (
+        not full_refresh
+        and staged(duck, table)
+        and source_has_watermark(duck, table)
+        and (columns is None or staged_columns(duck, table) == columns)
+    ):
+        watermark = duck.execute(
+            f"SELECT updated_at FROM {WATERMARK_TABLE} WHERE table_name = ?",
+            [table],
+        ).fetchone()
+    if watermark is None or watermark[0] is None:
+        duck.execute(f"DELETE FROM {WATERMARK_TABLE} WHERE table_name = ?", [table])
+        if snapshot_view(duck, table):
+            duck.execute(f"DROP VIEW {table}")
+        return None
+    return watermark[0]
+
+
+def copy_table(
+    duck: DuckDBPyConnection,
+    table: str,
+    watermark: Optional[datetime] = None,
+    columns: Optional[List[str]] = None,
+) -> int:
+    """
+    Copy one PostgreSQL table into DuckDB
+
+    With a watermark only the rows updated since (less WATERMARK_OVERLAP)
+    are pulled and merged by id: the old versions are deleted and the new
+    ones inserted. Rows deleted
+    in the source are found by comparing row counts, counted by PostgreSQL,
+    and only then anti-joining the source ids, the only column fetched.
+    Without one the table is copied whole.
+    Only the columns (default: all) are pulled.
+
+    Returns:
+        Rows copied
+    """
+    select = select_list(columns)
+    if watermark is None:
+        return duck.execute(
+            f"CREATE OR REPLACE TABLE {table} AS SELECT {select} FROM p_siak.{table}"
+        ).fetchone()[0]
+
+    duck.execute("BEGIN TRANSACTION")
+    try:
+        # The comparison is pushed down to PostgreSQL
+        rows = duck.execute(
+            f"""
+            CREATE OR REPLACE TEMP TABLE {table}_changes AS
+            SELECT {select} FROM p_siak.{table} WHERE updated_at > ?
+            """,
+            [watermark - timedelta(seconds=WATERMARK_OVERLAP)],
+        ).fetchone()[0]
+        duck.execute(f"""
+            DELETE FROM {table} WHERE id IN (SELECT id FROM {table}_changes)
+        """)
+        duck.execute(f"INSERT INTO {table} SELECT * FROM {table}_changes")
+        duck.execute(f"DROP TABLE {table}_changes")
+
+        staged_count = duck.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        if source_count(duck, table) != staged_count:
+            duck.execute(f"""
+                DELETE FROM {table}
+                WHERE id NOT IN (SELECT id FROM {source_ids(table)})
+            """)
+        duck.execute("COMMIT")
+    except BaseException:
+        duck.execute("ROLLBACK")
+        raise
+    return rows
+
+
+def source_count(duck: DuckDBPyConnection, table: str) -> int:
+    """Row count of a PostgreSQL table, computed by PostgreSQL"""
+    return duck.execute(f"""
+        SELECT * FROM postgres_query('p_siak', 'SELECT COUNT(*) FROM {table}')
+    """).fetchone()[0]
+
+
+def source_ids(table: str) -> str:
+    """Relation of the ids of a PostgreSQL table, nothing else is fetched"""
+    return f"postgres_query('p_siak', 'SELECT id FROM {table}')"
+
+
+def table_bounds(duck: DuckDBPyConnection, table: str) -> Tuple[int, int, int]:
+    """
+    (estimated rows, min id, max id) of a PostgreSQL table, computed by
+    PostgreSQL: reltuples from pg_class, the ids from the primary key index.
+    A table that was never analyzed is estimated from its id span.
+    """
+    estimate, low, high = duck.execute(f"""
+        SELECT * FROM postgres_query('p_siak', '
+            SELECT
+                (SELECT reltuples::BIGINT FROM pg_class
+                 WHERE oid = ''{table}''::regclass),
+                (SELECT MIN(id) FROM {table})::BIGINT,
+                (SELECT MAX(id) FROM {table})::BIGINT
+        ')
+    """).fetchone()
+    if low is None:
+        return 0, 0, 0
+    if estimate is None or estimate < 0:
+        estimate = high - low + 1
+    return estimate, low, high
+
+
+def id_ranges(low: int, high: int, partitions: int) -> List[Tuple[Optional[int], ...]]:
+    """
+    Split [low, high] into half-open id ranges; the first and last are
+    unbounded, so rows inserted while the table is copied are not lost
+    """
+    step = -(-(high - low + 1) // partitions)
+    bounds = [low + i * step for i in range(1, partitions)]
+    return list(zip([None] + bounds, bounds + [None]))
+
+
+def copy_range(
+    duck: DuckDBPyConnection,
+    table: str,
+    low: Optional[int],
+    high: Optional[int],
+    columns: Optional[List[str]] = None,
+) -> int:
+    """
+    Append the rows with low <= id < high of a PostgreSQL table to its
+    staging table; the bounds are pushed down to the primary key index
+
+    Returns:
+        Rows copied
+    """
+    conditions = []
+    if low is not None:
+        conditions.append(f"id >= {low}")
+    if high is not None:
+        conditions.append(f"id < {high}")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return duck.execute(
+        f"INSERT INTO {table} SELECT {select_list(columns)} FROM p_siak.{table} {where}"
+    ).fetchone()[0]
 
-def extract(duck: DuckDBPyConnection):
+
+def plan_partitions(
+    duck: DuckDBPyConnection,
+    table: str,
+    concurrency: int,
+    columns: Optional[List[str]] = None,
+) -> List[Tuple[Optional[int], ...]]:
+    """
+    Id ranges a full copy of a large table is split into: one per
+    EXTRACT_PARTITION_ROWS estimated rows, at most concurrency. More than
+    one range replaces the staging table with an empty one to append to.
+    """
+    if concurrency < 2 or table not in large_tables:
+        return []
+    estimate, low, high = table_bounds(duck, table)
+    partitions = min(concurrency, -(-estimate // EXTRACT_PARTITION_ROWS))
+    if partitions < 2:
+        return []
+    duck.execute(f"""
+        CREATE OR REPLACE TABLE {table} AS
+        SELECT {select_list(columns)} FROM p_siak.{table} LIMIT 0
+    """)
+    logger.info(f"Splitting {table} (~{estimate:,} rows) into {partitions} id ranges")
+    return id_ranges(low, high, partitions)
+
+
+def save_watermarks(duck: DuckDBPyConnection) -> None:
+    """Record the newest updated_at of every staging table that has one"""
+    for table in tables:
+        if not source_has_watermark(duck, table):
+            continue
+        duck.execute(
+            f"""
+            INSERT OR REPLACE INTO {WATERMARK_TABLE}
+            SELECT ?, MAX(updated_at), now()::TIMESTAMP FROM {table}
+            """,
+            [table],
+        )
+
+
+def extract(
+    duck: DuckDBPyConnection,
+    concurrency: int = EXTRACT_CONCURRENCY,
+    full_refresh: bool = False,
+    prune_columns: bool = True,
+) -> Dict[str, Tuple[int, float]]:
+    """
+    Copy the SIAK tables from PostgreSQL into DuckDB
+
+    After the first run only the rows changed since the previous one are
+    pulled, see copy_table. Only the columns transform reads are pulled, see
+    pipeline.lineage; a table whose columns changed is copied whole.
+
+    Args:
+        duck: Connection with the PostgreSQL database attached as p_siak
+        concurrency: Tables copied at the same time
+        full_refresh: Copy every table whole, replacing its staging table
+        prune_columns: Leave out the columns transform does not read
+
+    Returns:
+        Dict of table name to (rows copied, seconds) of its copy
+    """
     logger.info("🚀 Starting ETL Extract Process")
 
     # Extract PostgreSQL to DuckDB before transform process
-    logger.info("Extracting data from PostgreSQL")
+    mode = "full refresh" if full_refresh else "incremental"
+    logger.info(f"Extracting data from PostgreSQL ({mode}, {concurrency} at a time)")
+    duck.execute(f"""
+        CREATE TABLE IF NOT EXISTS {WATERMARK_TABLE} (
+            table_name VARCHAR PRIMARY KEY,
+            updated_at TIMESTAMP,
+            extracted_at TIMESTAMP
+        )
+    """)
+    missing = [table for table in tables if not source_has_watermark(duck, table)]
+    if missing and not full_refresh:
+        logger.warning(f"⚠️ No updated_at in {missing}, copying them whole")
+    columns = extract_columns(duck, prune_columns)
+
+    # Every task is a whole-table copy, a merge or an id range of a large
+    # table; all of them share one pool of `concurrency` connections
+    tasks = []
+    for table in sorted(tables, key=lambda table: table not in large_tables):
+        watermark = read_watermark(duck, table, full_refresh, columns[table])
+        ranges = (
+            []
+            if watermark
+            else plan_partitions(duck, table, concurrency, columns[table])
+        )
+        if ranges:
+            tasks += [
+                (table, copy_range, (*bounds, columns[table])) for bounds in ranges
+            ]
+        else:
+            tasks.append((table, copy_table, (watermark, columns[table])))
+
+    def run(task) -> Tuple[int, float, float]:
+        table, copy, args = task
+        # DuckDB connections are not thread safe, every task gets a cursor
+        with duck.cursor() as cursor:
+            task_start = time.perf_counter()
+            rows = copy(cursor, table, *args)
+            task_end = time.perf_counter()
+        if copy is copy_range:
+            low, high = ("" if bound is None else bound for bound in args[:2])
+            logger.info(
+                f"   - {table} ids [{low}, {high}): {rows:,} rows in "
+                f"{task_end - task_start:.1f}s"
+            )
+        return rows, task_start, task_end
+
+    start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(run, tasks))
+    else:
+        results = [run(task) for task in tasks]
+    # Written once every copy succeeded; a failed run is pulled again
+    save_watermarks(duck)
+    elapsed = time.perf_counter() - start
+
+    # Per table: rows of all its tasks, from the first start to the last end
+    stats = {}
     for table in tables:
-        query = f"CREATE TABLE IF NOT EXISTS {table} AS SELECT * FROM p_siak.{table}"
-        duck.execute(query)
+        done = [r for (name, _, _), r in zip(tasks, results) if name == table]
+        stats[table] = (
+            sum(rows for rows, _, _ in done),
+            max(end for _, _, end in done) - min(begin for _, begin, _ in done),
+        )
+
+    logger.info(f"📊 Data extraction summary ({elapsed:.1f}s):")
+    for table, (count, seconds) in stats.items():
+        logger.info(f"   - {table}: {count:,} rows copied in {seconds:.1f}s")
+
+    extract_attendance(duck)
+    return stats
+
+
+def extract_columns(
+    duck: DuckDBPyConnection, prune_columns: bool = True
+) -> Dict[str, List[str]]:
+    """Columns to extract of every table: the ones transform reads, or all"""
+    if not prune_columns:
+        return {
+            table: [name for name, _ in source_columns(duck, table)] for table in tables
+        }
+    columns = required_columns(duck, tables)
+    log_pruning(duck, columns)
+    return columns
+
 
-    # Verify data extraction (just for logging)
-    logger.info("📊 Data extraction summary:")
+def extract_attendance(duck: DuckDBPyConnection) -> None:
+    """Expose the attendance Parquet as the attendance view, if there is any"""
+    # A view, so hundreds of millions of rows are never copied into DuckDB
+    if os.path.isdir(ATTENDANCE_PATH):
+        logger.info(f"Extracting attendance from {ATTENDANCE_PATH}")
+        duck.execute(f"""
+            CREATE OR REPLACE VIEW attendance AS
+            SELECT * FROM read_parquet('{ATTENDANCE_PATH}/**/*.parquet', hive_partitioning = true)
+        """)
+        count = duck.execute("SELECT COUNT(*) FROM attendance").fetchone()[0]
+        logger.info(f"   - attendance: {count:,} rows")
+    else:
+        logger.warning(f"⚠️ No attendance data at {ATTENDANCE_PATH}, skipping")
+
+
+def source_fingerprint(
+    duck: DuckDBPyConnection, table: str, extracted: Optional[List[str]] = None
+) -> str:
+    """
+    Cheap fingerprint of a PostgreSQL table's contents
+
+    Row count, max id and max updated_at are computed by PostgreSQL (the
+    maxima from indexes), together with the table's insert, update and
+    delete counters from pg_stat_user_tables and its column types. Any write
+    changes at least one of them. The extracted columns (default: all) are
+    part of it, so a snapshot is pulled again when transform reads others.
+    """
+    updated_at = (
+        "(SELECT MAX(updated_at) FROM {0})::TEXT"
+        if source_has_watermark(duck, table)
+        else "NULL"
+    ).format(table)
+    values = duck.execute(f"""
+        SELECT * FROM postgres_query('p_siak', '
+            SELECT
+                (SELECT COUNT(*) FROM {table}),
+                (SELECT MAX(id) FROM {table})::BIGINT,
+                {updated_at},
+                s.n_tup_ins, s.n_tup_upd, s.n_tup_del
+            FROM pg_stat_user_tables s
+            WHERE s.relname = ''{table}''
+        ')
+    """).fetchone()
+    columns = duck.execute(
+        """
+        SELECT list(column_name || ' ' || data_type ORDER BY ordinal_position)
+        FROM information_schema.columns
+        WHERE table_catalog = 'p_siak' AND table_name = ?
+        """,
+        [table],
+    ).fetchone()[0]
+    key = json.dumps([list(values or []), columns, extracted], default=str)
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+def snapshot_table(
+    duck: DuckDBPyConnection,
+    table: str,
+    path: str,
+    columns: Optional[List[str]] = None,
+) -> Tuple[int, bool]:
+    """
+    Write the columns (default: all) of a PostgreSQL table to the Parquet
+    snapshot at path, unless it exists, and point the table's view at it
+
+    The snapshot is written under a temporary name and renamed, so a file at
+    path is always complete. Older snapshots of the table are removed.
+
+    Returns:
+        (rows copied, whether the snapshot was reused)
+    """
+    reused = os.path.exists(path)
+    rows = 0
+    if not reused:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        partial = f"{path}.tmp"
+        rows = duck.execute(f"""
+            COPY (SELECT {select_list(columns)} FROM p_siak.{table})
+            TO '{partial}' (FORMAT PARQUET, COMPRESSION ZSTD)
+        """).fetchone()[0]
+        os.replace(partial, path)
+        for name in os.listdir(os.path.dirname(path)):
+            if name != os.path.basename(path):
+                os.remove(os.path.join(os.path.dirname(path), name))
+    if staged(duck, table):
+        duck.execute(f"DROP TABLE {table}")
+    duck.execute(
+        f"CREATE OR REPLACE VIEW {table} AS SELECT * FROM read_parquet('{path}')"
+    )
+    return rows, reused
+
+
+def extract_to_staging(
+    duck: DuckDBPyConnection,
+    staging_path: str = STAGING_PATH,
+    concurrency: int = EXTRACT_CONCURRENCY,
+    prune_columns: bool = True,
+) -> Dict[str, Tuple[int, float]]:
+    """
+    Snapshot the SIAK tables into a Parquet staging area and expose them to
+    transform as views
+
+    Every snapshot is keyed by its table's source_fingerprint; a table whose
+    fingerprint has a snapshot already is not pulled again, also when the
+    DuckDB database was deleted in between.
+
+    Args:
+        duck: Connection with the PostgreSQL database attached as p_siak
+        staging_path: Directory of the snapshots
+        concurrency: Tables pulled at the same time
+        prune_columns: Leave out the columns transform does not read
+
+    Returns:
+        Dict of table name to (rows copied, seconds), 0 rows for a reused
+        snapshot
+    """
+    logger.info("🚀 Starting ETL Extract Process")
+    logger.info(f"Snapshotting PostgreSQL into {staging_path}")
+    staging_path = os.path.abspath(staging_path)
+    columns = extract_columns(duck, prune_columns)
+    paths = {
+        table: os.path.join(
+            staging_path,
+            table,
+            f"{source_fingerprint(duck, table, columns[table])}.parquet",
+        )
+        for table in tables
+    }
+
+    def run(table: str) -> Tuple[int, bool, float]:
+        # DuckDB connections are not thread safe, every table gets a cursor
+        with duck.cursor() as cursor:
+            start = time.perf_counter()
+            rows, reused = snapshot_table(cursor, table, paths[table], columns[table])
+            return rows, reused, time.perf_counter() - start
+
+    order = sorted(tables, key=lambda table: table not in large_tables)
+    start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = dict(zip(order, pool.map(run, order)))
+    else:
+        results = {table: run(table) for table in order}
+    elapsed = time.perf_counter() - start
+
+    logger.info(f"📊 Data extraction summary ({elapsed:.1f}s):")
     for table in tables:
-        count = duck.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
-        logger.info(f"   - {table}: {count:,} rows")
+        rows, reused, seconds = results[table]
+        if reused:
+            logger.info(f"   - {table}: unchanged, reused {paths[table]}")
+        else:
+            logger.info(f"   - {table}: {rows:,} rows copied in {seconds:.1f}s")
+
+    extract_attendance(duck)
+    return {table: (results[table][0], results[table][2]) for table in tables}
@@ -0,0 +1,162 @@
+"""
+Source columns the transform step reads.
+
+The transform SQL is not parsed by hand: every step of TRANSFORMS runs
+against an in-memory DuckDB holding empty tables with the PostgreSQL
+schemas, and each CREATE ... AS SELECT is EXPLAINed first. DuckDB's binder
+resolves aliases, stars and expressions, and its projection pushdown leaves
+exactly the columns each table scan needs. Filter pushdown and statistics
+propagation are disabled for the dry run so columns only used in WHERE
+clauses stay in the scans and empty tables are not optimized away.
+"""
+
+import json
+import logging
+import re
+from typing import Dict, List
+
+import duckdb
+from duckdb import DuckDBPyConnection
+
+from pipeline.transform import TRANSFORMS
+
+logger = logging.getLogger(__name__)
+
+CREATE_AS = re.compile(
+    r"\s*CREATE\s+(?:OR\s+REPLACE\s+)?(?:TABLE|VIEW)\s+\S+\s+AS\s+(.*)",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+class ExplainingConnection:
+    """DuckDB connection that records the table scans of every CREATE AS"""
+
+    def __init__(self, conn: DuckDBPyConnection):
+        self.conn = conn
+        self.scans: Dict[str, set] = {}
+
+    def execute(self, query: str, *args):
+        match = CREATE_AS.match(query)
+        if match:
+            for _, plan in self.conn.execute(
+                f"EXPLAIN (FORMAT JSON) {match.group(1)}", *args
+            ).fetchall():
+                for node in json.loads(plan):
+                    self._collect(node)
+        return self.conn.execute(query, *args)
+
+    def _collect(self, node: dict) -> None:
+        info = node.get("extra_info", {})
+        if "Table" in info:
+            table = info["Table"].split(".")[-1]
+            projections = info.get("Projections") or []
+            if isinstance(projections, str):
+                projections = [projections]
+            self.scans.setdefault(table, set()).update(projections)
+        for child in node.get("children", []):
+            self._collect(child)
+
+
+def source_columns(duck: DuckDBPyConnection, table: str) -> List[tuple]:
+    """(name, type) of a PostgreSQL table's columns, in table order"""
+    return duck.execute(
+        """
+        SELECT column_name, data_type FROM information_schema.columns
+        WHERE table_catalog = 'p_siak' AND table_name = ?
+        ORDER BY ordinal_position
+        """,
+        [table],
+    ).fetchall()
+
+
+def required_columns(
+    duck: DuckDBPyConnection, tables: List[str], keep: List[str] = ("id", "updated_at")
+) -> Dict[str, List[str]]:
+    """
+    Columns of every source table the transform step reads
+
+    Args:
+        duck: Connection with the PostgreSQL database attached as p_siak
+        tables: Source tables
+        keep: Columns always extracted when a table has them (merge key and
+              watermark of the incremental extract)
+
+    Returns:
+        Dict of table name to its needed columns, in table order
+    """
+    schemas = {table: source_columns(duck, table) for table in tables}
+    scratch = duckdb.connect()
+    for table, columns in schemas.items():
+        scratch.execute(
+            f"CREATE TABLE {table} ("
+            + ", ".join(f'"{name}" {type_}' for name, type_ in columns)
+            + ")"
+        )
+    scratch.execute(
+        "SET disabled_optimizers = 'filter_pushdown,statistics_propagation'"
+    )
+
+    used: Dict[str, set] = {}
+    # A dry run on empty tables; its log lines would only be misleading
+    transform_logger = logging.getLogger("pipeline.transform")
+    disabled, transform_logger.disabled = transform_logger.disabled, True
+    try:
+        for node in TRANSFORMS:
+            explaining = ExplainingConnection(scratch)
+            node.run(explaining)
+            # An undeclared input would not make the node run when it changes
+            undeclared = set(explaining.scans) - set(node.inputs)
+            if undeclared:
+                logger.warning(
+                    f"⚠️ {node.name} reads {sorted(undeclared)} but does not "
+                    "declare them as inputs"
+                )
+            for table, names in explaining.scans.items():
+                used.setdefault(table, set()).update(names)
+    finally:
+        transform_logger.disabled = disabled
+        scratch.close()
+
+    return {
+        table: [
+            name for name, _ in columns if name in used.get(table, ()) or name in keep
+        ]
+        for table, columns in schemas.items()
+    }
+
+
+def column_widths(duck: DuckDBPyConnection, table: str) -> tuple:
+    """
+    (estimated rows, {column: average width in bytes}) of a PostgreSQL
+    table from pg_class and pg_stats; no widths for a table never analyzed
+    """
+    rows = duck.execute(f"""
+        SELECT * FROM postgres_query('p_siak', '
+            SELECT
+                (SELECT reltuples::BIGINT FROM pg_class
+                 WHERE oid = ''{table}''::regclass),
+                attname::TEXT,
+                avg_width
+            FROM pg_stats
+            WHERE schemaname = current_schema() AND tablename = ''{table}''
+        ')
+    """).fetchall()
+    estimate = max((row[0] or 0 for row in rows), default=0)
+    return estimate, {name: width for _, name, width in rows}
+
+
+def log_pruning(duck: DuckDBPyConnection, columns: Dict[str, List[str]]) -> None:
+    """Log the columns left out of every table and the bytes that saves"""
+    logger.info("✂️ Columns not extracted (unused by transform):")
+    for table, needed in columns.items():
+        pruned = [name for name, _ in source_columns(duck, table) if name not in needed]
+        if not pruned:
+            continue
+        estimate, widths = column_widths(duck, table)
+        if widths:
+            saved = estimate * sum(widths.get(name, 0) for name in pruned)
+            total = estimate * sum(widths.values())
+            size = f"~{saved / 2**20:,.1f} of {total / 2**20:,.1f} MB"
+        else:
+            size = "size unknown, table not analyzed"
+        logger.info(f"   - {table}: {', '.join(pruned)} ({size})")
@@ -11,6 +11,8 @@ logger = logging.getLogger(__name__)
 
 # MinIO bucket and Delta table paths
 MINIO_BUCKET = "lakehouse"
+# Rows per Arrow batch streamed from DuckDB, tables are never fully in memory
+BATCH_ROWS = 1_000_000
 DELTA_TABLES = [
     "dim_student",
     "dim_course",
@@ -22,7 +24,7 @@ DELTA_TABLES = [
     "fact_grade",
     "fact_fee",
     "fact_academic",
-    # "fact_attendence",
+    "fact_attendance",
     "fact_teaching",
     "fact_room_usage",
 ]
@@ -42,6 +44,7 @@ def create_delta_tables(cfg: dict):
             DeltaTable.create(
                 table_uri=table_uri,
                 schema=schema,
+                partition_by=delta_schema.get_partition_columns(table_name),
                 mode="overwrite",
                 storage_options=cfg,
             )
@@ -60,11 +63,14 @@ def load_to_delta_tables(cfg: dict, duck: DuckDBPyConnection):
     for table_name in DELTA_TABLES:
         try:
             table_uri = f"s3://{MINIO_BUCKET}/delta/{table_name}"
-            data_arrow = duck.execute(f"SELECT * FROM {table_name}").arrow()
+            data_reader = duck.execute(
+                f"SELECT * FROM {table_name}"
+            ).fetch_record_batch(BATCH_ROWS)
 
             write_deltalake(
                 table_or_uri=table_uri,
-                data=data_arrow,
+                data=data_reader,
+                partition_by=delta_schema.get_partition_columns(table_name),
                 mode="append",
                 storage_options=cfg,
             )
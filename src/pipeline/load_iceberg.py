@@ -1,6 +1,7 @@
 import logging
 import os
 
+import pyarrow as pa
 from duckdb import DuckDBPyConnection
 from pyiceberg.catalog import load_catalog
 
@@ -9,6 +10,9 @@ import schemas.iceberg_schema as iceberg_schema
 
 logger = logging.getLogger(__name__)
 
+# Rows appended per Iceberg commit, tables are never fully in memory
+BATCH_ROWS = 5_000_000
+
 # TODO: duplicate with delta_schema.py file
 ICEBERG_TABLES = [
     "dim_student",
@@ -21,7 +25,7 @@ ICEBERG_TABLES = [
     "fact_grade",
     "fact_fee",
     "fact_academic",
-    # "fact_attendence",
+    "fact_attendance",
     "fact_teaching",
     "fact_room_usage",
 ]
@@ -35,6 +39,7 @@ def create_iceberg_tables(catalog):
                 #  better to make schema as parameter instead of hard coded like this
                 identifier=f"siak.{table_name}",
                 schema=iceberg_schema.get_schema(table_name),
+                partition_spec=iceberg_schema.get_partition_spec(table_name),
             )
             logger.info(f"✅ Created Iceberg table: {table_name}")
         except Exception as e:
@@ -44,11 +49,16 @@ def create_iceberg_tables(catalog):
 def load_to_iceberg_tables(catalog, duck: DuckDBPyConnection):
     for table_name in ICEBERG_TABLES:
         try:
-            data_arrow = duck.sql(f"SELECT * FROM {table_name}").arrow()
-            data_arrow = data_arrow.cast(delta_schema.get_schema(table_name))
+            schema = delta_schema.get_schema(table_name)
             table = catalog.load_table(f"siak.{table_name}")
-            table.append(data_arrow)
-            logger.info(f"✅ Data appended to Iceberg table: {table}")
+            reader = duck.execute(f"SELECT * FROM {table_name}").fetch_record_batch(
+                BATCH_ROWS
+            )
+            rows = 0
+            for batch in reader:
+                table.append(pa.Table.from_batches([batch]).cast(schema))
+                rows += batch.num_rows
+            logger.info(f"✅ {rows:,} rows appended to Iceberg table: {table}")
         except Exception as e:
             logger.error(f"❌ Failed to load data table {table_name}: {e}")
 
@@ -1,15 +1,170 @@
+import hashlib
+import inspect
 import logging
+import os
+import time
+from typing import Dict, Optional
 
 from duckdb import DuckDBPyConnection
 
+from pipeline.dag import TransformNode, run_nodes
+
 logger = logging.getLogger(__name__)
 
+# Transform nodes run at the same time, each on its own DuckDB cursor
+# (1: one after the other)
+TRANSFORM_CONCURRENCY = int(os.getenv("TRANSFORM_CONCURRENCY", "1"))
+
+# Newest updated_at of every source a table was built or merged from, see
+# build_table
+TRANSFORM_WATERMARK_TABLE = "transform_watermarks"
+# Seconds before the watermarks merges start from: the incremental extract
+# re-reads as far back (see pipeline.extract), so rows can reach the staging
+# tables with an updated_at older than a watermark (default: 3600)
+WATERMARK_OVERLAP = int(os.getenv("WATERMARK_OVERLAP", "3600"))
+
+
+def create_transform_watermarks(duck: DuckDBPyConnection):
+    duck.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TRANSFORM_WATERMARK_TABLE} (
+            table_name VARCHAR,
+            source_table VARCHAR,
+            updated_at TIMESTAMP,
+            query_hash VARCHAR,
+            PRIMARY KEY (table_name, source_table)
+        )
+    """)
+
+
+def build_table(
+    duck: DuckDBPyConnection,
+    table: str,
+    key: str,
+    select: str,
+    sources: Dict[str, str],
+):
+    """
+    Create a table from a SELECT, or merge only the rows of changed source
+    rows into it
+
+    After a whole build the newest updated_at of every source is kept in
+    transform_watermarks. Later runs select only the rows where some source
+    row is newer, less WATERMARK_OVERLAP, and merge them by key: the old versions are deleted and the
+    new ones inserted. Every row comes from one row of the first source, its
+    key being that row's id; deleted ones are found by comparing the table's
+    row count with that source's and only then anti-joining the source ids,
+    so the SELECT itself only ever runs on the changes. Rows of the other
+    sources cannot be deleted while referenced (PostgreSQL foreign keys).
+    The table is built whole when it does not exist, its SELECT or
+    MERGE_VERSION changed, a source has no updated_at, or its watermarks
+    were dropped (transform's full_refresh).
+
+    Args:
+        duck: Connection to the DuckDB database with the staging tables
+        table: Table to create or merge into
+        key: Column of the table the rows are merged by
+        select: SELECT of the table's rows, without a WHERE clause
+        sources: Aliases in the SELECT to the staging tables they scan, the
+                 one the key comes from first
+    """
+    query_hash = hashlib.sha256((MERGE_VERSION + select).encode()).hexdigest()[:16]
+    create_transform_watermarks(duck)
+    watermarks = dict(
+        duck.execute(
+            f"""
+            SELECT source_table, updated_at FROM {TRANSFORM_WATERMARK_TABLE}
+            WHERE table_name = ? AND query_hash = ?
+            """,
+            [table, query_hash],
+        ).fetchall()
+    )
+    tracked = all(
+        duck.execute(
+            """
+            SELECT COUNT(*) FROM information_schema.columns
+            WHERE table_catalog = current_database()
+                AND table_name = ? AND column_name = 'updated_at'
+            """,
+            [source],
+        ).fetchone()[0]
+        for source in sources.values()
+    )
+    exists = duck.execute(
+        """
+        SELECT COUNT(*) FROM information_schema.tables
+        WHERE table_catalog = current_database() AND table_name = ?
+        """,
+        [table],
+    ).fetchone()[0]
+
+    duck.execute("BEGIN TRANSACTION")
+    try:
+        if exists and tracked and set(watermarks) == set(sources.values()):
+            # A missing watermark is an empty source, every row is new
+            changed = " OR ".join(
+                f"{alias}.updated_at > COALESCE(?, '-infinity'::TIMESTAMP)"
+                f" - INTERVAL {WATERMARK_OVERLAP} SECOND"
+                for alias in sources
+            )
+            rows = duck.execute(
+                f"""
+                CREATE OR REPLACE TEMP TABLE {table}_changes AS
+                {select} WHERE {changed}
+                """,
+                [watermarks[source] for source in sources.values()],
+            ).fetchone()[0]
+            duck.execute(f"""
+                DELETE FROM {table} WHERE {key} IN (SELECT {key} FROM {table}_changes)
+            """)
+            duck.execute(f"INSERT INTO {table} SELECT * FROM {table}_changes")
+            duck.execute(f"DROP TABLE {table}_changes")
+
+            driving = next(iter(sources.values()))
+            source_count = duck.execute(f"SELECT COUNT(*) FROM {driving}").fetchone()
+            table_count = duck.execute(f"SELECT COUNT(*) FROM {table}").fetchone()
+            if source_count != table_count:
+                duck.execute(f"""
+                    DELETE FROM {table}
+                    WHERE {key} NOT IN (SELECT id FROM {driving})
+                """)
+            logger.info(f"Merged {rows:,} changed rows into {table}")
+        else:
+            duck.execute(f"CREATE OR REPLACE TABLE {table} AS {select}")
+            logger.info(f"Built {table} whole")
+
+        duck.execute(
+            f"DELETE FROM {TRANSFORM_WATERMARK_TABLE} WHERE table_name = ?", [table]
+        )
+        if tracked:
+            for source in set(sources.values()):
+                duck.execute(
+                    f"""
+                    INSERT INTO {TRANSFORM_WATERMARK_TABLE}
+                    SELECT ?, ?, MAX(updated_at), ? FROM {source}
+                    """,
+                    [table, source, query_hash],
+                )
+        duck.execute("COMMIT")
+    except BaseException:
+        duck.execute("ROLLBACK")
+        raise
+
+
+# Version of the merge logic and its settings: a change reruns every node and
+# builds its table whole again, see pipeline.dag
+MERGE_VERSION = hashlib.sha256(
+    f"{inspect.getsource(build_table)}{WATERMARK_OVERLAP}".encode()
+).hexdigest()[:16]
+
 
 def transform_dim_student(duck: DuckDBPyConnection):
     # alter student id column to student_id
     # denormalized students, programs, and faculties tables
-    duck.execute("""
-        CREATE OR REPLACE TABLE dim_student AS
+    build_table(
+        duck,
+        "dim_student",
+        "student_id",
+        """
         SELECT
             s.id AS student_id,
             s.npm,
@@ -24,14 +179,19 @@ def transform_dim_student(duck: DuckDBPyConnection):
         FROM students s
         JOIN programs p ON s.program_id = p.id
         JOIN faculties f ON p.faculty_id = f.id
-    """)
+        """,
+        {"s": "students", "p": "programs", "f": "faculties"},
+    )
 
 
 def transform_dim_course(duck: DuckDBPyConnection):
     # denormalized courses, programs, faculties tables
     # alter courses id column to course_id
-    duck.execute("""
-        CREATE OR REPLACE TABLE dim_course AS
+    build_table(
+        duck,
+        "dim_course",
+        "course_id",
+        """
         SELECT
             c.id AS course_id,
             c.course_code,
@@ -44,13 +204,18 @@ def transform_dim_course(duck: DuckDBPyConnection):
         FROM courses c
         JOIN programs p ON c.program_id = p.id
         JOIN faculties f ON p.faculty_id = f.id
-    """)
+        """,
+        {"c": "courses", "p": "programs", "f": "faculties"},
+    )
 
 
 def transform_dim_lecturer(duck: DuckDBPyConnection):
     # denormalized lecturer and faculties tables
-    duck.execute("""
-        CREATE OR REPLACE TABLE dim_lecturer AS
+    build_table(
+        duck,
+        "dim_lecturer",
+        "lecturer_id",
+        """
         SELECT
             l.id AS lecturer_id,
             l.nip,
@@ -60,13 +225,18 @@ def transform_dim_lecturer(duck: DuckDBPyConnection):
             f.faculty_name
         FROM lecturers l
         JOIN faculties f ON l.faculty_id = f.id
-    """)
+        """,
+        {"l": "lecturers", "f": "faculties"},
+    )
 
 
 def transform_dim_semester(duck: DuckDBPyConnection):
     # Keep DATE fields as DATE type for proper PyArrow date32 compatibility
-    duck.execute("""
-        CREATE OR REPLACE TABLE dim_semester AS
+    build_table(
+        duck,
+        "dim_semester",
+        "semester_id",
+        """
         SELECT
             id AS semester_id,
             semester_code,
@@ -79,25 +249,35 @@ def transform_dim_semester(duck: DuckDBPyConnection):
                     CAST(YEAR(start_date) AS VARCHAR) || '/' || CAST(YEAR(end_date) AS VARCHAR)
             END AS academic_year
         FROM semesters
-    """)
+        """,
+        {"semesters": "semesters"},
+    )
 
 
 def transform_dim_room(duck: DuckDBPyConnection):
     # Fixed: Remove room_number field to match schema (3 fields: room_id, building, capacity)
-    duck.execute("""
-        CREATE OR REPLACE TABLE dim_room AS
+    build_table(
+        duck,
+        "dim_room",
+        "room_id",
+        """
         SELECT
             id AS room_id,
             building,
             capacity
         FROM rooms
-    """)
+        """,
+        {"rooms": "rooms"},
+    )
 
 
 def transform_dim_class(duck: DuckDBPyConnection):
     # Keep TIME fields as TIME type for proper PyArrow time32 compatibility
-    duck.execute("""
-        CREATE OR REPLACE TABLE dim_class AS
+    build_table(
+        duck,
+        "dim_class",
+        "class_id",
+        """
         SELECT
             cs.id AS class_id,
             c.course_code || '_' || l.name || '_' || s.semester_code AS class_code,
@@ -118,12 +298,17 @@ def transform_dim_class(duck: DuckDBPyConnection):
         JOIN courses c ON cs.course_id = c.id
         JOIN lecturers l ON cs.lecturer_id = l.id
         JOIN semesters s ON cs.semester_id = s.id
-    """)
+        """,
+        {"cs": "class_schedules", "c": "courses", "l": "lecturers", "s": "semesters"},
+    )
 
 
 def transform_fact_registration(duck: DuckDBPyConnection):
-    duck.execute("""
-        CREATE OR REPLACE TABLE fact_registration AS
+    build_table(
+        duck,
+        "fact_registration",
+        "registration_id",
+        """
         SELECT
             r.id AS registration_id,
             r.student_id,
@@ -131,14 +316,19 @@ def transform_fact_registration(duck: DuckDBPyConnection):
             r.semester_id,
             r.registration_date,
         FROM registrations r
-    """)
+        """,
+        {"r": "registrations"},
+    )
 
 
 def transform_fact_fee(duck: DuckDBPyConnection):
     # Transform semester_fees to fact_fee
     # alter semester_fees column id to fee_id
-    duck.execute("""
-        CREATE OR REPLACE TABLE fact_fee AS
+    build_table(
+        duck,
+        "fact_fee",
+        "fee_id",
+        """
         SELECT
             sf.id AS fee_id,
             sf.student_id,
@@ -146,28 +336,38 @@ def transform_fact_fee(duck: DuckDBPyConnection):
             sf.fee_amount,
             sf.payment_date::DATE AS payment_date
         FROM semester_fees sf
-    """)
+        """,
+        {"sf": "semester_fees"},
+    )
 
 
 def transform_fact_academic(duck: DuckDBPyConnection):
-    duck.execute("""
-    CREATE OR REPLACE TABLE fact_academic AS
-    SELECT
-        ac.id AS academic_id,
-        ac.student_id,
-        ac.semester_id,
-        ac.semester_gpa,
-        ac.cumulative_gpa,
-        ac.semester_credits,
-        ac.credits_passed,
-        ac.total_credits
-    FROM academic_records ac
-    """)
+    build_table(
+        duck,
+        "fact_academic",
+        "academic_id",
+        """
+        SELECT
+            ac.id AS academic_id,
+            ac.student_id,
+            ac.semester_id,
+            ac.semester_gpa,
+            ac.cumulative_gpa,
+            ac.semester_credits,
+            ac.credits_passed,
+            ac.total_credits
+        FROM academic_records ac
+        """,
+        {"ac": "academic_records"},
+    )
 
 
 def transform_fact_grade(duck: DuckDBPyConnection):
-    duck.execute("""
-        CREATE OR REPLACE TABLE fact_grade AS
+    build_table(
+        duck,
+        "fact_grade",
+        "grade_id",
+        """
         SELECT
             g.id AS grade_id,
             r.student_id,
@@ -177,19 +377,48 @@ def transform_fact_grade(duck: DuckDBPyConnection):
             g.letter_grade
         FROM grades g
         JOIN registrations r ON g.registration_id = r.id
+        """,
+        {"g": "grades", "r": "registrations"},
+    )
+
+
+def transform_fact_attendance(duck: DuckDBPyConnection):
+    attendance = duck.execute(
+        "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = 'attendance'"
+    ).fetchone()[0]
+    if not attendance:
+        logger.warning("⚠️ No attendance extracted, fact_attendance will be empty")
+        duck.execute("""
+            CREATE OR REPLACE TABLE fact_attendance (
+                attendance_id BIGINT,
+                student_id BIGINT,
+                course_id BIGINT,
+                class_id BIGINT,
+                room_id BIGINT,
+                semester_id BIGINT,
+                attendance_date DATE,
+                check_in_time VARCHAR
+            )
+        """)
+        return
+
+    # A view over the Parquet files: the load streams it in batches instead of
+    # materializing every attendance row in DuckDB first
+    duck.execute("""
+        CREATE OR REPLACE VIEW fact_attendance AS
+        SELECT
+            CAST(a.id AS BIGINT) AS attendance_id,
+            CAST(a.student_id AS BIGINT) AS student_id,
+            CAST(a.course_id AS BIGINT) AS course_id,
+            CAST(a.class_schedule_id AS BIGINT) AS class_id,
+            CAST(a.room_id AS BIGINT) AS room_id,
+            CAST(a.semester_id AS BIGINT) AS semester_id,
+            CAST(a.meeting_date AS DATE) AS attendance_date,
+            CAST(a.check_in_time AS VARCHAR) AS check_in_time
+        FROM attendance a
     """)
 
 
-# def transform_fact_attendance(duck: DuckDBPyConnection):
-#     duck.execute("""
-#         CREATE OR REPLACE TABLE fact_attendance AS
-#         SELECT
-#             !!! THIS ATTENDANCE TABLE SOMEHOW NOT CREATED FROM POSTGRESQL DATABASE
-#             !!! I JUST FOLLOWED SOMEONE'S ADV. DATABASE COURSE PROJECT LAST SEMESTER
-#             !!! https://github.com/isaui/SIAK-analytics-advanced-database
-#     """)
-
-
 def transform_fact_teaching(duck: DuckDBPyConnection):
     # OK, this doesn't make any sense for me; the same goes for the attendance table
     # The attendance table and this random value for teaching are generated, and don't come from the PostgreSQL db
@@ -233,22 +462,70 @@ def transform_fact_room_usage(duck: DuckDBPyConnection):
     """)
 
 
-def transform(duck: DuckDBPyConnection):
+# Every dim or fact with the staging tables it reads; see pipeline.dag
+TRANSFORMS = [
+    # Dimension tables
+    TransformNode(
+        "dim_student", transform_dim_student, ("students", "programs", "faculties")
+    ),
+    TransformNode(
+        "dim_course", transform_dim_course, ("courses", "programs", "faculties")
+    ),
+    TransformNode("dim_semester", transform_dim_semester, ("semesters",)),
+    TransformNode(
+        "dim_class",
+        transform_dim_class,
+        ("class_schedules", "courses", "lecturers", "semesters"),
+    ),
+    TransformNode("dim_lecturer", transform_dim_lecturer, ("lecturers", "faculties")),
+    TransformNode("dim_room", transform_dim_room, ("rooms",)),
+    # Fact tables
+    TransformNode("fact_registration", transform_fact_registration, ("registrations",)),
+    TransformNode("fact_fee", transform_fact_fee, ("semester_fees",)),
+    TransformNode("fact_academic", transform_fact_academic, ("academic_records",)),
+    TransformNode("fact_grade", transform_fact_grade, ("grades", "registrations")),
+    TransformNode("fact_attendance", transform_fact_attendance, ("attendance",)),
+    TransformNode("fact_teaching", transform_fact_teaching, ("class_schedules",)),
+    TransformNode("fact_room_usage", transform_fact_room_usage, ("class_schedules",)),
+]
+
+
+def transform(
+    duck: DuckDBPyConnection,
+    concurrency: int = TRANSFORM_CONCURRENCY,
+    full_refresh: bool = False,
+) -> Dict[str, Optional[float]]:
+    """
+    Build the dim and fact tables from the staging tables
+
+    Independent nodes run concurrently, and a node whose inputs and SQL did
+    not change since its last run is skipped, see pipeline.dag. The other
+    dims and facts only merge the rows of changed source rows, see
+    build_table.
+
+    Args:
+        duck: Connection to the DuckDB database with the staging tables
+        concurrency: Nodes run at the same time
+        full_refresh: Rebuild every table whole, also the unchanged ones
+
+    Returns:
+        Dict of table name to seconds it took, None for a skipped one
+    """
     logger.info("🚀 Starting ETL Transform Process")
-    # Transform each dimension table
-    transform_dim_student(duck)
-    transform_dim_course(duck)
-    transform_dim_semester(duck)
-    transform_dim_class(duck)
-    transform_dim_lecturer(duck)
-    transform_dim_room(duck)
-
-    # Transform each fact table
-    transform_fact_registration(duck)
-    transform_fact_fee(duck)
-    transform_fact_academic(duck)
-    transform_fact_grade(duck)
-    transform_fact_teaching(duck)
-    transform_fact_room_usage(duck)
+    # Created before the nodes write to it from their own cursors
+    create_transform_watermarks(duck)
+    if full_refresh:
+        duck.execute(f"DELETE FROM {TRANSFORM_WATERMARK_TABLE}")
+    start = time.perf_counter()
+    results = run_nodes(duck, TRANSFORMS, concurrency, full_refresh, MERGE_VERSION)
+    elapsed = time.perf_counter() - start
+
+    logger.info(f"📊 Transform summary ({elapsed:.1f}s, {concurrency} at a time):")
+    for name, seconds in results.items():
+        if seconds is None:
+            logger.info(f"   - {name}: inputs unchanged, skipped")
+        else:
+            logger.info(f"   - {name}: built in {seconds:.1f}s")
 
     logger.info("✅ ETL Transform Process Completed Successfully")
+    return results
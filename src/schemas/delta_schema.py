@@ -120,17 +120,18 @@ fact_academic = pa.schema(
     ]
 )
 
-# fact_attendence = pa.schema(
-#     [
-#         pa.field("attendence_id", pa.int64(), nullable=False),
-#         pa.field("student_id", pa.int64(), nullable=False),
-#         pa.field("course_id", pa.int64(), nullable=False),
-#         pa.field("class_id", pa.int64(), nullable=False),
-#         pa.field("room_id", pa.int64(), nullable=False),
-#         pa.field("attendence_date", pa.date32(), nullable=False),
-#         pa.field("check_in_time", pa.string(), nullable=False),
-#     ]
-# )
+fact_attendance = pa.schema(
+    [
+        pa.field("attendance_id", pa.int64(), nullable=False),
+        pa.field("student_id", pa.int64(), nullable=False),
+        pa.field("course_id", pa.int64(), nullable=False),
+        pa.field("class_id", pa.int64(), nullable=False),
+        pa.field("room_id", pa.int64(), nullable=False),
+        pa.field("semester_id", pa.int64(), nullable=False),
+        pa.field("attendance_date", pa.date32(), nullable=False),
+        pa.field("check_in_time", pa.string(), nullable=False),
+    ]
+)
 
 fact_teaching = pa.schema(
     [
@@ -176,11 +177,16 @@ SCHEMAS = {
     "fact_grade": fact_grade,
     "fact_fee": fact_fee,
     "fact_academic": fact_academic,
-    # "fact_attendence": fact_attendence,
+    "fact_attendance": fact_attendance,
     "fact_teaching": fact_teaching,
     "fact_room_usage": fact_room_usage,
 }
 
+# Tables too large to scan whole, partitioned by semester
+PARTITION_COLUMNS = {
+    "fact_attendance": ["semester_id"],
+}
+
 
 def get_schema(table_name: str) -> pa.Schema:
     """Get schema by table name"""
@@ -189,6 +195,11 @@ def get_schema(table_name: str) -> pa.Schema:
     return SCHEMAS[table_name]
 
 
+def get_partition_columns(table_name: str) -> list | None:
+    """Get the partition columns of a table, None if it is not partitioned"""
+    return PARTITION_COLUMNS.get(table_name)
+
+
 def list_schemas() -> dict:
     """Return all available schemas"""
     return SCHEMAS.copy()
@@ -1,4 +1,10 @@
+from pyiceberg.partitioning import (
+    UNPARTITIONED_PARTITION_SPEC,
+    PartitionField,
+    PartitionSpec,
+)
 from pyiceberg.schema import NestedField, Schema
+from pyiceberg.transforms import IdentityTransform
 from pyiceberg.types import (
     BooleanType,
     DateType,
@@ -107,6 +113,17 @@ fact_academic = Schema(
     NestedField(8, "total_credits", IntegerType(), required=True),
 )
 
+fact_attendance = Schema(
+    NestedField(1, "attendance_id", LongType(), required=True),
+    NestedField(2, "student_id", LongType(), required=True),
+    NestedField(3, "course_id", LongType(), required=True),
+    NestedField(4, "class_id", LongType(), required=True),
+    NestedField(5, "room_id", LongType(), required=True),
+    NestedField(6, "semester_id", LongType(), required=True),
+    NestedField(7, "attendance_date", DateType(), required=True),
+    NestedField(8, "check_in_time", StringType(), required=True),
+)
+
 fact_teaching = Schema(
     NestedField(1, "teaching_id", LongType(), required=True),
     NestedField(2, "lecturer_id", LongType(), required=True),
@@ -144,10 +161,23 @@ SCHEMAS = {
     "fact_grade": fact_grade,
     "fact_fee": fact_fee,
     "fact_academic": fact_academic,
+    "fact_attendance": fact_attendance,
     "fact_teaching": fact_teaching,
     "fact_room_usage": fact_room_usage,
 }
 
+# Tables too large to scan whole, partitioned by semester
+PARTITION_SPECS = {
+    "fact_attendance": PartitionSpec(
+        PartitionField(
+            source_id=6,
+            field_id=1000,
+            transform=IdentityTransform(),
+            name="semester_id",
+        )
+    ),
+}
+
 
 def get_schema(table_name: str) -> Schema:
     if table_name not in SCHEMAS:
@@ -155,6 +185,10 @@ def get_schema(table_name: str) -> Schema:
     return SCHEMAS[table_name]
 
 
+def get_partition_spec(table_name: str) -> PartitionSpec:
+    return PARTITION_SPECS.get(table_name, UNPARTITIONED_PARTITION_SPEC)
+
+
 def list_schemas() -> dict:
     return SCHEMAS.copy()
 
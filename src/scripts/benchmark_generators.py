@@ -0,0 +1,256 @@
+"""
+Throughput benchmark of the data generators.
+
+Runs every generator, and the full save_generated_data flow, at several
+FakerConfig scale factors. Each measurement runs in a fresh process so its
+peak RSS is its own. Results (rows, seconds, rows/sec, peak RSS) go to a
+JSON file and can be compared against a stored baseline:
+
+    python -m src.scripts.benchmark_generators --scale 0.1 1 --output bench.json
+    python -m src.scripts.benchmark_generators --baseline bench.json
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import platform
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.generator.academic_record_faker import (
+    generate_academic_record,
+    generate_academic_record_arrow,
+)
+from src.generator.dag import run_task
+from src.generator.grade_faker import generate_grade, generate_grade_arrow
+from src.generator.registration_faker import (
+    generate_registration,
+    generate_registration_arrow,
+)
+from src.generator.semester_fees_faker import (
+    generate_semester_fees,
+    generate_semester_fees_arrow,
+)
+from src.scripts.generate_data import (
+    generate_reference_data,
+    reference_tasks,
+    save_generated_data,
+)
+from src.utils.config import FakerConfig
+from src.utils.logging import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+SEED = 42
+SCALE_FACTORS = [0.1, 1.0]
+# Phases faster than this are too noisy to flag as regressions
+MIN_SECONDS = 0.05
+
+
+def scaled_config(scale: float) -> FakerConfig:
+    """FakerConfig with every table count multiplied by scale"""
+    cfg = FakerConfig()
+    return cfg.model_copy(
+        update={
+            name: max(1, round(value * scale))
+            for name, value in cfg.model_dump().items()
+            # Semesters are a calendar, not a volume
+            if name != "semester"
+        }
+    )
+
+
+def measure(func: Callable, *args) -> Dict:
+    """Run func(*args) and report its rows, time and the process peak RSS"""
+    start = time.perf_counter()
+    result = func(*args)
+    seconds = time.perf_counter() - start
+    rows = result if isinstance(result, int) else len(result)
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+    return {
+        "rows": rows,
+        "seconds": round(seconds, 4),
+        "rows_per_sec": round(rows / seconds, 1) if seconds else None,
+        "peak_rss_mb": round(peak_mb, 1),
+    }
+
+
+def run_isolated(func: Callable, *args) -> Dict:
+    """Measure in a freshly spawned process so peak RSS is not inherited"""
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(1, mp_context=context) as executor:
+        return executor.submit(measure, func, *args).result()
+
+
+def run_full_flow(cfg: FakerConfig, engine: str) -> int:
+    with tempfile.TemporaryDirectory() as output_dir:
+        save_generated_data("parquet", output_dir, engine, seed=SEED, cfg=cfg)
+    return cfg.registration
+
+
+def phases(cfg: FakerConfig) -> List[Tuple[str, Callable, tuple]]:
+    """(phase name, function, args) for every generator at this config"""
+    reference = generate_reference_data(cfg, SEED)
+    students = reference["students"]
+    courses = reference["courses"]
+    semesters = reference["semesters"]
+    programs = reference["programs"]
+
+    rng = np.random.default_rng(SEED)
+    registrations = generate_registration_arrow(
+        students, courses, semesters, cfg.registration, rng
+    )
+    grades = generate_grade_arrow(registrations, rng)
+    registration_rows = registrations.to_pylist()
+    grade_rows = generate_grade(registration_rows).to_pylist()
+
+    result = [
+        (
+            task.name,
+            run_task,
+            (task, [reference[i] for i in task.inputs], SEED, "id_ID"),
+        )
+        for task in reference_tasks(cfg)
+    ]
+    result += [
+        (
+            "registrations",
+            generate_registration,
+            (students, courses, semesters, cfg.registration),
+        ),
+        (
+            "registrations_arrow",
+            generate_registration_arrow,
+            (students, courses, semesters, cfg.registration),
+        ),
+        ("grades", generate_grade, (registration_rows,)),
+        ("grades_arrow", generate_grade_arrow, (registrations,)),
+        ("semester_fees", generate_semester_fees, (students, semesters, programs)),
+        (
+            "semester_fees_arrow",
+            generate_semester_fees_arrow,
+            (students, semesters, programs),
+        ),
+        (
+            "academic_records",
+            generate_academic_record,
+            (students, semesters, registration_rows, grade_rows, courses),
+        ),
+        (
+            "academic_records_arrow",
+            generate_academic_record_arrow,
+            (students, semesters, registrations, grades, courses),
+        ),
+        ("save_generated_data", run_full_flow, (cfg, "python")),
+        ("save_generated_data_numpy", run_full_flow, (cfg, "numpy")),
+    ]
+    return result
+
+
+def run_benchmarks(
+    scales: List[float], only: Optional[List[str]] = None
+) -> Dict[str, Dict[str, Dict]]:
+    results = {}
+    for scale in scales:
+        cfg = scaled_config(scale)
+        logger.info(f"Scale factor {scale}: {cfg.model_dump()}")
+        results[str(scale)] = {}
+        for name, func, args in phases(cfg):
+            if only and name not in only:
+                continue
+            stats = run_isolated(func, *args)
+            logger.info(
+                f"{name:>26}: {stats['rows']:>10} rows in {stats['seconds']:>8.3f}s "
+                f"({stats['rows_per_sec']} rows/s, {stats['peak_rss_mb']} MB peak)"
+            )
+            results[str(scale)][name] = stats
+    return results
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Phases whose throughput dropped more than `tolerance` below baseline"""
+    regressions = []
+    for scale, scale_phases in results.items():
+        for name, stats in scale_phases.items():
+            base = baseline.get(scale, {}).get(name)
+            if not base or not base.get("rows_per_sec") or not stats["rows_per_sec"]:
+                continue
+            if max(stats["seconds"], base["seconds"]) < MIN_SECONDS:
+                continue
+            ratio = stats["rows_per_sec"] / base["rows_per_sec"]
+            if ratio < 1 - tolerance:
+                regressions.append(
+                    f"{name} at scale {scale}: {stats['rows_per_sec']} rows/s, "
+                    f"{ratio:.0%} of baseline {base['rows_per_sec']} rows/s"
+                )
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the data generators")
+    parser.add_argument(
+        "--scale",
+        type=float,
+        nargs="+",
+        default=SCALE_FACTORS,
+        help="FakerConfig scale factors to run (default: 0.1 1)",
+    )
+    parser.add_argument(
+        "--phase",
+        action="append",
+        default=None,
+        help="Only run the given phase, e.g. registrations_arrow (repeatable)",
+    )
+    parser.add_argument(
+        "--output",
+        default="benchmark_results.json",
+        help="Results file (default: benchmark_results.json)",
+    )
+    parser.add_argument(
+        "--baseline",
+        default=None,
+        help="Baseline results file to compare against",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed throughput drop against the baseline (default: 0.2)",
+    )
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.scale, args.phase)
+
+    with open(args.output, "w") as f:
+        json.dump(
+            {
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+    logger.info(f"Saved benchmark results to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            logger.warning(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+        logger.info("No regressions against the baseline")
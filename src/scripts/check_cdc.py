@@ -0,0 +1,125 @@
+"""
+End-to-end check of the CDC ingestion against a local PostgreSQL.
+
+Creates the SIAK schema if needed and a replication slot and publication of
+its own, ingests into an in-memory DuckDB, then inserts, updates and deletes
+faculties in PostgreSQL and checks that the next ingestion applied exactly
+those changes to the staging table. The slot, the publication and the rows
+are removed again. Needs wal_level=logical, e.g. the compose service:
+
+    docker-compose --profile postgres up -d postgres
+    uv run python -m src.scripts.check_cdc
+
+Exits with 1 when the staging table does not match.
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+import duckdb
+import psycopg
+from dotenv import load_dotenv
+
+from src.utils.logging import setup_logging
+from src.utils.postgres import create_schema
+
+load_dotenv()
+setup_logging()
+
+logger = logging.getLogger(__name__)
+
+CHECK_SLOT = "siak_cdc_check"
+CHECK_PUBLICATION = "siak_cdc_check"
+
+
+def check_cdc(conninfo: str = "") -> bool:
+    """
+    Returns:
+        Whether the changes reached the staging table as expected
+    """
+    # The pipeline modules import each other from src, as src/main.py runs
+    # them
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+    from pipeline.cdc import ingest
+
+    create_schema(conninfo)
+    duck = duckdb.connect()
+    duck.execute("INSTALL postgres;")
+    duck.execute("LOAD postgres;")
+    conninfo_sql = conninfo.replace("'", "''")
+    duck.execute(
+        f"ATTACH DATABASE '{conninfo_sql}' AS p_siak (TYPE POSTGRES, READ_ONLY);"
+    )
+
+    with psycopg.connect(conninfo, autocommit=True) as conn:
+        try:
+            # Creates the slot and copies every table whole
+            ingest(duck, conninfo, CHECK_SLOT, CHECK_PUBLICATION)
+
+            (kept,) = conn.execute(
+                """
+                INSERT INTO faculties (faculty_code, faculty_name)
+                VALUES ('CDC-K', 'CDC check') RETURNING id
+                """
+            ).fetchone()
+            conn.execute(
+                "UPDATE faculties SET faculty_name = 'CDC check, updated' "
+                "WHERE id = %s",
+                (kept,),
+            )
+            (dropped,) = conn.execute(
+                """
+                INSERT INTO faculties (faculty_code, faculty_name)
+                VALUES ('CDC-D', 'CDC check, deleted') RETURNING id
+                """
+            ).fetchone()
+            conn.execute("DELETE FROM faculties WHERE id = %s", (dropped,))
+
+            counts = ingest(duck, conninfo, CHECK_SLOT, CHECK_PUBLICATION)
+            staged = dict(
+                duck.execute(
+                    "SELECT id, faculty_name FROM faculties WHERE id IN (?, ?)",
+                    [kept, dropped],
+                ).fetchall()
+            )
+            expected_counts = {"insert": 2, "update": 1, "delete": 1}
+            ok = (
+                staged == {kept: "CDC check, updated"}
+                and counts.get("faculties") == expected_counts
+            )
+            if ok:
+                logger.info("✅ Insert, update and delete reached the staging table")
+            else:
+                logger.error(
+                    f"❌ Expected {{{kept}: 'CDC check, updated'}} and "
+                    f"{expected_counts}, staged {staged} and applied "
+                    f"{counts.get('faculties')}"
+                )
+            return ok
+        finally:
+            conn.execute(
+                "DELETE FROM faculties WHERE faculty_code IN ('CDC-K', 'CDC-D')"
+            )
+            conn.execute(
+                "SELECT pg_drop_replication_slot(slot_name) FROM pg_replication_slots "
+                "WHERE slot_name = %s",
+                (CHECK_SLOT,),
+            )
+            conn.execute(f"DROP PUBLICATION IF EXISTS {CHECK_PUBLICATION}")
+            duck.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Check the CDC ingestion against a local PostgreSQL"
+    )
+    parser.add_argument(
+        "--conninfo",
+        default="",
+        help="PostgreSQL connection string (default: the PG* environment "
+        "variables, e.g. in .env)",
+    )
+    args = parser.parse_args()
+    sys.exit(0 if check_cdc(args.conninfo) else 1)
@@ -2,155 +2,490 @@ import argparse
 import json
 import logging
 import os
-from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
-from typing import Dict, List
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Union
 
 import numpy as np
 import pyarrow as pa
 import pyarrow.parquet as pq
-from faker import Faker
+from dotenv import load_dotenv
 from pyarrow import csv
+from pyarrow import json as pa_json
 
 from src.generator.academic_record_faker import generate_academic_record
+from src.generator.blocks import (
+    BLOCK_TABLES,
+    block_seed,
+    generate_registration_chunk,
+    iter_blocks,
+)
+from src.generator.changes import (
+    CHANGE_TABLES,
+    generate_change_batch,
+    merge_change_batch,
+)
 from src.generator.class_schedule_faker import generate_class_schedule
+from src.generator.columnar import now_seconds
 from src.generator.course_faker import generate_course
+from src.generator.dag import TableTask, run_tasks
 from src.generator.faculty_faker import generate_faculty
 from src.generator.grade_faker import generate_grade
 from src.generator.lecturer_faker import generate_lecturer
 from src.generator.program_faker import generate_program
-from src.generator.registration_faker import generate_registration
 from src.generator.room_faker import generate_room
 from src.generator.semester_faker import generate_semester
 from src.generator.semester_fees_faker import generate_semester_fees
+from src.generator.shared import SharedTables
+from src.generator.sql_engine import write_sql_tables
 from src.generator.student_faker import generate_student
 from src.utils.config import FakerConfig
 from src.utils.logging import setup_logging
+from src.utils.postgres import CopyWriter, apply_change_batch, create_schema
+from src.utils.writer import (
+    PARQUET_COMPRESSION,
+    TEXT_COMPRESSION,
+    WriterOptions,
+    open_writer,
+    write_partitioned,
+)
 
 setup_logging()
 logger = logging.getLogger(__name__)
 
+# Approximate registrations per block for the numpy engine
+BATCH_SIZE = 100_000
+
+
+def run_entropy(seed: Optional[int] = None) -> int:
+    """Root seed of a run; a random one is logged so the run can be repeated"""
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+        logger.info(f"Using random seed {seed} (pass --seed {seed} to reproduce)")
+    return seed
+
+
+def reference_tasks(cfg: FakerConfig) -> List[TableTask]:
+    """Reference table generators and the tables they read, in foreign key order"""
+    return [
+        TableTask("faculties", generate_faculty, (), cfg.faculty),
+        TableTask("programs", generate_program, ("faculties",), cfg.program),
+        TableTask("lecturers", generate_lecturer, ("faculties",), cfg.lecturer),
+        TableTask("students", generate_student, ("programs",), cfg.student),
+        TableTask("rooms", generate_room, (), cfg.room, uses_faker=False),
+        TableTask("courses", generate_course, ("programs",), cfg.course),
+        TableTask("semesters", generate_semester, (), cfg.semester, uses_faker=False),
+        TableTask(
+            "class_schedules",
+            generate_class_schedule,
+            ("courses", "lecturers", "rooms", "semesters"),
+            cfg.class_schedule,
+            uses_faker=False,
+        ),
+    ]
 
-def save_generated_data(save_format: str, output_dir: str) -> None:
-    fake = Faker("id_ID")
-    cfg = FakerConfig()
-
-    logger.info("Generating faculties")
-    faculties = generate_faculty(fake, cfg.faculty)
-
-    logger.info("Generating programs")
-    programs = generate_program(fake, faculties, cfg.program)
-
-    logger.info("Generating lecturers")
-    lecturers = generate_lecturer(fake, faculties, cfg.lecturer)
 
-    logger.info("Generating students")
-    students = generate_student(fake, programs, cfg.student)
+def generate_reference_data(
+    cfg: FakerConfig,
+    seed: int,
+    workers: Optional[int] = None,
+    on_result: Optional[Callable[[str, pa.Table], None]] = None,
+) -> Dict[str, pa.Table]:
+    """
+    Generate the reference tables, independent ones concurrently.
+
+    Every table draws from its own seed derived from `seed`, so ids, codes,
+    dates and UUIDs are reproducible; created_at is the time of the run.
+    on_result gets each table as soon as it is ready, parents before
+    children.
+    """
+    return run_tasks(reference_tasks(cfg), seed, workers, on_result)
+
+
+def save_generated_data(
+    save_format: str,
+    output_dir: str,
+    engine: str = "python",
+    workers: Optional[int] = None,
+    seed: Optional[int] = None,
+    current_time: Optional[np.datetime64] = None,
+    cfg: Optional[FakerConfig] = None,
+    options: Optional[WriterOptions] = None,
+) -> None:
+    cfg = cfg or FakerConfig()
+    entropy = run_entropy(seed)
+
+    def save(name, data):
+        save_table(save_format, data, output_dir, name, options)
+
+    # Every table is written in the background as soon as it is generated
+    with ThreadPoolExecutor() as writes:
+        saved = []
+
+        def save_later(name, data):
+            saved.append(writes.submit(save, name, data))
+
+        reference = generate_reference_data(cfg, entropy, workers, save_later)
+        students = reference["students"]
+        courses = reference["courses"]
+        semesters = reference["semesters"]
+        programs = reference["programs"]
+
+        if engine == "numpy":
+            logger.info("Generating registrations, grades, fees and academic records")
+            blocks = [
+                tables
+                for _, tables in iter_blocks(
+                    reference,
+                    cfg.registration,
+                    BATCH_SIZE,
+                    workers,
+                    entropy,
+                    current_time,
+                )
+            ]
+            for name in BLOCK_TABLES:
+                save_later(
+                    name,
+                    pa.concat_tables(
+                        [block[name] for block in blocks if block[name].num_rows]
+                    ),
+                )
+        elif engine == "duckdb":
+            logger.info("Generating registrations, grades, fees and academic records")
+            write_sql_tables(
+                reference,
+                cfg.registration,
+                save_format,
+                output_dir,
+                entropy,
+                current_time if current_time is not None else now_seconds(),
+                workers,
+                options,
+            )
+        else:
+            logger.info("Generating registrations")
+            cores = workers or os.cpu_count()
+            lengths = [
+                len(c) for c in np.array_split(np.zeros(cfg.registration), cores)
+            ]
+            # Each chunk owns the id range [id_start, id_start + length)
+            id_starts = np.cumsum([1] + lengths[:-1])
+            # Workers attach to the shared reference tables instead of
+            # receiving a pickled copy of them with every task
+            with SharedTables() as shared, ProcessPoolExecutor(cores) as executor:
+                paths = {
+                    name: shared.publish(name, reference[name])
+                    for name in ["students", "courses", "semesters"]
+                }
+                futures = [
+                    executor.submit(
+                        generate_registration_chunk,
+                        paths,
+                        length,
+                        int(id_start),
+                        int(block_seed(entropy, i).generate_state(1)[0]),
+                    )
+                    for i, (length, id_start) in enumerate(zip(lengths, id_starts))
+                ]
+
+                # Keep chunk order so the output does not depend on scheduling
+                registrations = pa.concat_tables([f.result() for f in futures])
+            save_later("registrations", registrations)
+
+            logger.info("Generating grades")
+            grades = generate_grade(registrations)
+            save_later("grades", grades)
+
+            logger.info("Generating semester fees")
+            save_later(
+                "semester_fees", generate_semester_fees(students, semesters, programs)
+            )
 
-    logger.info("Generating rooms")
-    rooms = generate_room(cfg.room)
+            logger.info("Generating academic records")
+            save_later(
+                "academic_records",
+                generate_academic_record(
+                    students, semesters, registrations, grades, courses
+                ),
+            )
 
-    logger.info("Generating courses")
-    courses = generate_course(fake, programs, cfg.course)
+        # Surface write errors
+        for future in saved:
+            future.result()
+
+
+def stream_generated_data(
+    save_format: str,
+    output_dir: str,
+    batch_size: int = BATCH_SIZE,
+    workers: Optional[int] = None,
+    seed: Optional[int] = None,
+    current_time: Optional[np.datetime64] = None,
+    sharded: bool = False,
+    shard_indexes: Optional[List[int]] = None,
+    attendance: bool = False,
+    options: Optional[WriterOptions] = None,
+) -> None:
+    """
+    Generate data with bounded memory.
+
+    Reference tables are generated in memory as usual. The large tables
+    (registrations, grades, semester fees, academic records) are generated
+    per block of students across a process pool, since every one of their
+    rows depends on a single student, and each block is appended to the
+    output files as soon as it is ready.
+
+    With sharded=True every block is written to its own part file,
+    <output_dir>/<table>/part-<block>.<ext>. Blocks are deterministic for a
+    given config, batch size, seed and current_time, so shard_indexes can
+    regenerate a subset of them elsewhere; the reference tables are only
+    written when all blocks are generated.
+
+    With attendance=True every block also gets its attendance rows, written
+    as Parquet partitioned by semester, <output_dir>/attendance/semester_id=<id>/,
+    whatever the save format.
+
+    Peak memory is the reference tables plus about 2 KB × batch_size
+    (~200 MB at the default 100k) per in-flight block, two per worker, and
+    does not grow with cfg.registration.
+    """
+    cfg = FakerConfig()
+    entropy = run_entropy(seed)
 
-    logger.info("Generating semesters")
-    semesters = generate_semester(cfg.semester)
+    def save(name, data):
+        save_table(save_format, data, output_dir, name, options)
 
-    logger.info("Generating class schedules")
-    class_schedules = generate_class_schedule(
-        courses, lecturers, rooms, semesters, cfg.class_schedule
+    reference = generate_reference_data(
+        cfg, entropy, workers, save if shard_indexes is None else None
     )
 
-    logger.info("Generating registrations")
-    cores = os.cpu_count()
-    lengths = [len(c) for c in np.array_split(np.zeros(cfg.registration), cores)]
-    chunks = [(students, courses, semesters, length) for length in lengths]
-    registrations = []
-    with ProcessPoolExecutor() as executor:
-        futures = [
-            executor.submit(generate_registration, s, c, sem, length)
-            for s, c, sem, length in chunks
-        ]
-
-        for f in as_completed(futures):
-            registrations.extend(f.result())
-
-    logger.info("Generating grades")
-    grades = generate_grade(registrations)
-
-    logger.info("Generating semester fees")
-    semester_fees = generate_semester_fees(students, semesters, programs)
-
-    logger.info("Generating academic records")
-    student_chunks = np.array_split(students, cores)
-    chunks = [
-        (chunk, semesters, registrations, grades, courses) for chunk in student_chunks
-    ]
-    academic_records = []
-    with ProcessPoolExecutor() as executor:
-        futures = [
-            executor.submit(generate_academic_record, s, sem, reg, g, c)
-            for s, sem, reg, g, c in chunks
-        ]
-
-        for f in as_completed(futures):
-            academic_records.extend(f.result())
-
-    def save(data_name_tuple):
-        data, name = data_name_tuple
-        if save_format == "csv":
-            save_to_csv(data, output_dir, name)
-        elif save_format == "parquet":
-            save_to_parquet(data, output_dir, name)
-        else:
-            save_to_json(data, output_dir, name)
-
-    # Save all generated data at the end
-    with ThreadPoolExecutor() as executor:
-        list(
-            executor.map(
-                save,
-                [
-                    (faculties, "faculties"),
-                    (programs, "programs"),
-                    (lecturers, "lecturers"),
-                    (students, "students"),
-                    (rooms, "rooms"),
-                    (courses, "courses"),
-                    (semesters, "semesters"),
-                    (class_schedules, "class_schedules"),
-                    (registrations, "registrations"),
-                    (grades, "grades"),
-                    (semester_fees, "semester_fees"),
-                    (academic_records, "academic_records"),
-                ],
-            )
+    writers = {}
+    if not sharded:
+        writers = {
+            name: open_writer(save_format, output_dir, name, options)
+            for name in BLOCK_TABLES
+        }
+    try:
+        blocks = iter_blocks(
+            reference,
+            cfg.registration,
+            batch_size,
+            workers,
+            entropy,
+            current_time,
+            shard_indexes,
+            attendance,
         )
+        for block, tables in blocks:
+            logger.info(
+                f"Writing block {block.index} "
+                f"({tables['registrations'].num_rows} registrations)"
+            )
+            for name, table in tables.items():
+                if name == "attendance":
+                    write_partitioned(
+                        table,
+                        os.path.join(output_dir, name),
+                        "semester_id",
+                        f"part-{block.index:05d}",
+                        options,
+                    )
+                elif sharded:
+                    table_dir = os.path.join(output_dir, name)
+                    part = f"part-{block.index:05d}"
+                    with open_writer(save_format, table_dir, part, options) as writer:
+                        writer.write(table)
+                else:
+                    writers[name].write(table)
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+
+def copy_generated_data(
+    batch_size: int = BATCH_SIZE,
+    workers: Optional[int] = None,
+    seed: Optional[int] = None,
+    current_time: Optional[np.datetime64] = None,
+    conninfo: str = "",
+) -> None:
+    """
+    Stream generated data straight into the SIAK Postgres database.
+
+    Reference tables are copied first, in foreign key order. The large
+    tables are generated block by block like stream_generated_data and every
+    table gets its own COPY writer thread and connection; grades wait for
+    the registrations of the same block to be committed.
+
+    Connection settings come from the PostgreSQL environment variables
+    (see https://www.postgresql.org/docs/current/libpq-envars.html) unless
+    conninfo is given.
+    """
+    load_dotenv()
+    create_schema(conninfo)
 
+    cfg = FakerConfig()
+    entropy = run_entropy(seed)
 
-def save_to_json(data: List[Dict], output_dir: str, file_name: str) -> None:
-    os.makedirs(output_dir, exist_ok=True)
-    filepath = os.path.join(output_dir, f"{file_name}.json")
-    with open(filepath, "w") as f:
-        json.dump(data, f, indent=2)
-    logger.info(f"Saved {len(data)} records to {filepath}")
-
-
-def save_to_csv(data: List[Dict], output_dir: str, file_name: str) -> None:
-    os.makedirs(output_dir, exist_ok=True)
+    def copy(name, data):
+        with CopyWriter(name, conninfo) as writer:
+            writer.write(to_table(data))
 
-    filepath = os.path.join(output_dir, f"{file_name}.csv")
-    table = pa.Table.from_pylist(data)
-    csv.write_csv(table, filepath)
-    logger.info(f"Saved {len(data)} records to {filepath}")
+    # Tables arrive parents first, so foreign keys are satisfied
+    reference = generate_reference_data(cfg, entropy, workers, copy)
 
+    writers = {}
+    try:
+        writers["registrations"] = CopyWriter("registrations", conninfo)
+        writers["grades"] = CopyWriter(
+            "grades", conninfo, parent=writers["registrations"]
+        )
+        writers["semester_fees"] = CopyWriter("semester_fees", conninfo)
+        writers["academic_records"] = CopyWriter("academic_records", conninfo)
 
-def save_to_parquet(data: List[Dict], output_dir: str, file_name: str) -> None:
-    os.makedirs(output_dir, exist_ok=True)
+        blocks = iter_blocks(
+            reference, cfg.registration, batch_size, workers, entropy, current_time
+        )
+        for block, tables in blocks:
+            logger.info(
+                f"Copying block {block.index} "
+                f"({tables['registrations'].num_rows} registrations)"
+            )
+            for name, table in tables.items():
+                writers[name].write(table)
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+
+def load_generated_data(
+    save_format: str, output_dir: str, names: List[str]
+) -> Dict[str, pa.Table]:
+    """Read tables written by save/stream_generated_data back as Arrow"""
+    tables = {}
+    for name in names:
+        path = os.path.join(output_dir, name)
+        if save_format == "parquet":
+            # A single file, or a directory of sharded part files
+            if os.path.exists(f"{path}.parquet"):
+                path = f"{path}.parquet"
+            tables[name] = pq.read_table(path)
+        elif save_format == "csv":
+            tables[name] = csv.read_csv(find_file(path, "csv"))
+        elif os.path.exists(f"{path}.json"):
+            with open(f"{path}.json") as f:
+                tables[name] = pa.Table.from_pylist(json.load(f))
+        else:
+            # Compressed files are decompressed by their suffix
+            tables[name] = pa_json.read_json(find_file(path, "jsonl"))
+    return tables
+
+
+def find_file(path: str, extension: str) -> str:
+    """The plain, gzip or zstd file of a table"""
+    for suffix in ["", *(f".{s}" for s in TEXT_COMPRESSION.values())]:
+        if os.path.exists(f"{path}.{extension}{suffix}"):
+            return f"{path}.{extension}{suffix}"
+    raise FileNotFoundError(f"No {extension} file for {path}")
+
+
+def generate_change_data(
+    save_format: str,
+    output_dir: str,
+    n_batches: int = 1,
+    seed: Optional[int] = None,
+    current_time: Optional[np.datetime64] = None,
+    postgres: bool = False,
+    conninfo: str = "",
+    options: Optional[WriterOptions] = None,
+) -> None:
+    """
+    Generate change batches on top of a generated dataset.
+
+    Every batch starts a new semester (see src.generator.changes) and is
+    merged into the in-memory snapshot before the next one, so batches chain.
+    Batch k is stamped current_time + k seconds: created_at/updated_at stay
+    real time and increase from batch to batch, the simulated semester only
+    shows in the business dates, so extract watermarks never run ahead of
+    the clock.
+
+    Batches are written to <output_dir>/changes/semester-<id>/<table>/
+    <insert|update|delete>.<ext>, or with postgres=True applied to the SIAK
+    database instead, which must hold the same dataset.
+    """
+    if postgres:
+        load_dotenv()
+
+    tables = load_generated_data(
+        save_format, output_dir, CHANGE_TABLES + ["programs", "courses"]
+    )
+    rng = np.random.default_rng(run_entropy(seed))
+    current_time = current_time if current_time is not None else now_seconds()
 
-    filepath = os.path.join(output_dir, f"{file_name}.parquet")
-    table = pa.Table.from_pylist(data)
-    pq.write_table(table, filepath)
-    logger.info(f"Saved {len(data)} records to {filepath}")
+    for k in range(n_batches):
+        batch = generate_change_batch(
+            tables, rng, current_time + np.timedelta64(k, "s")
+        )
+        semester_id = batch["semesters"]["insert"].column("id")[0].as_py()
+        if postgres:
+            apply_change_batch(batch, conninfo)
+        else:
+            batch_dir = os.path.join(output_dir, "changes", f"semester-{semester_id}")
+            for name, changes in batch.items():
+                for op, rows in changes.items():
+                    with open_writer(
+                        save_format, os.path.join(batch_dir, name), op, options
+                    ) as writer:
+                        writer.write(rows)
+        tables = merge_change_batch(tables, batch)
+
+
+def to_table(data: Union[List[Dict], pa.Table]) -> pa.Table:
+    # Columnar generators already return Arrow tables
+    if isinstance(data, pa.Table):
+        return data
+    return pa.Table.from_pylist(data)
+
+
+def save_table(
+    save_format: str,
+    data: Union[List[Dict], pa.Table],
+    output_dir: str,
+    file_name: str,
+    options: Optional[WriterOptions] = None,
+) -> None:
+    """Write a whole table through the streaming writer, BATCH_SIZE rows at a time"""
+    table = to_table(data)
+    with open_writer(save_format, output_dir, file_name, options) as writer:
+        for batch in table.to_batches(max_chunksize=BATCH_SIZE):
+            writer.write(pa.Table.from_batches([batch], table.schema))
+
+
+def save_to_json(
+    data: Union[List[Dict], pa.Table],
+    output_dir: str,
+    file_name: str,
+    options: Optional[WriterOptions] = None,
+) -> None:
+    save_table("json", data, output_dir, file_name, options)
+
+
+def save_to_csv(
+    data: Union[List[Dict], pa.Table],
+    output_dir: str,
+    file_name: str,
+    options: Optional[WriterOptions] = None,
+) -> None:
+    save_table("csv", data, output_dir, file_name, options)
+
+
+def save_to_parquet(
+    data: Union[List[Dict], pa.Table],
+    output_dir: str,
+    file_name: str,
+    options: Optional[WriterOptions] = None,
+) -> None:
+    save_table("parquet", data, output_dir, file_name, options)
 
 
 if __name__ == "__main__":
@@ -166,8 +501,153 @@ if __name__ == "__main__":
         default="data/generated",
         help="Directory to save generated data (default: data/generated)",
     )
+    parser.add_argument(
+        "--engine",
+        choices=["python", "numpy", "duckdb"],
+        default="python",
+        help="Generator implementation for the large tables: python, numpy, or "
+        "duckdb to generate them in SQL and write them with COPY (default: python)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Write the large tables in batches with bounded memory "
+        "(uses the numpy generators, JSON is written as NDJSON)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=BATCH_SIZE,
+        help="Approximate registrations per streamed batch (default: 100000)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for the large tables (default: CPU count)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Root seed; with the same config and batch size the numpy "
+        "generators produce identical blocks (default: random, logged)",
+    )
+    parser.add_argument(
+        "--as-of",
+        default=None,
+        help="created_at/updated_at timestamp for the numpy generators, "
+        "e.g. 2025-01-01T00:00:00 (default: now)",
+    )
+    parser.add_argument(
+        "--sharded",
+        action="store_true",
+        help="Stream each block to its own part file, <table>/part-<block>",
+    )
+    parser.add_argument(
+        "--shard-index",
+        type=int,
+        action="append",
+        default=None,
+        help="Only generate the given block (repeatable); implies --sharded",
+    )
+    parser.add_argument(
+        "--postgres",
+        action="store_true",
+        help="Stream straight into Postgres with COPY instead of writing files "
+        "(connection from the PG* environment variables)",
+    )
+    parser.add_argument(
+        "--compression",
+        choices=sorted(set(PARQUET_COMPRESSION) | set(TEXT_COMPRESSION)),
+        default=None,
+        help="Compression codec: gzip or zstd for CSV/JSON (default: none), "
+        "any of snappy, zstd, gzip, lz4, brotli, none for Parquet (default: snappy)",
+    )
+    parser.add_argument(
+        "--compression-level",
+        type=int,
+        default=None,
+        help="Parquet codec compression level (default: codec default)",
+    )
+    parser.add_argument(
+        "--row-group-size",
+        type=int,
+        default=None,
+        help="Maximum rows per Parquet row group (default: one per batch)",
+    )
+    parser.add_argument(
+        "--no-dictionary",
+        action="store_true",
+        help="Disable Parquet dictionary encoding",
+    )
+    parser.add_argument(
+        "--data-page-size",
+        type=int,
+        default=None,
+        help="Target Parquet data page size in bytes (default: 1 MiB)",
+    )
+    parser.add_argument(
+        "--changes",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Instead of a snapshot, generate N change batches (one per new "
+        "semester) on top of the dataset in --output_dir; with --postgres they "
+        "are applied to the database",
+    )
+    parser.add_argument(
+        "--attendance",
+        action="store_true",
+        help="Also generate attendance, as Parquet partitioned by semester "
+        "under <output_dir>/attendance; implies --stream",
+    )
 
     args = parser.parse_args()
 
-    os.makedirs(args.output_dir, exist_ok=True)
-    save_generated_data(args.format, args.output_dir)
+    current_time = np.datetime64(args.as_of, "s") if args.as_of else None
+    options = WriterOptions(
+        compression=args.compression,
+        compression_level=args.compression_level,
+        row_group_size=args.row_group_size,
+        use_dictionary=not args.no_dictionary,
+        data_page_size=args.data_page_size,
+    )
+
+    if args.changes:
+        generate_change_data(
+            args.format,
+            args.output_dir,
+            args.changes,
+            args.seed,
+            current_time,
+            postgres=args.postgres,
+            options=options,
+        )
+    elif args.postgres:
+        copy_generated_data(args.batch_size, args.workers, args.seed, current_time)
+    elif args.stream or args.sharded or args.shard_index or args.attendance:
+        os.makedirs(args.output_dir, exist_ok=True)
+        stream_generated_data(
+            args.format,
+            args.output_dir,
+            args.batch_size,
+            args.workers,
+            args.seed,
+            current_time,
+            sharded=args.sharded or args.shard_index is not None,
+            shard_indexes=args.shard_index,
+            attendance=args.attendance,
+            options=options,
+        )
+    else:
+        os.makedirs(args.output_dir, exist_ok=True)
+        save_generated_data(
+            args.format,
+            args.output_dir,
+            args.engine,
+            args.workers,
+            args.seed,
+            current_time,
+            options=options,
+        )
@@ -0,0 +1,275 @@
+import logging
+import os
+import queue
+import threading
+import uuid
+from datetime import time
+from typing import Dict, List, Optional, Tuple
+
+import psycopg
+import pyarrow as pa
+import pyarrow.compute as pc
+from psycopg import sql
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "../../schemas/siak_schema.sql")
+
+# Target columns filled from a differently named generator column
+COLUMN_ALIASES = {
+    "registration_date": "registration_timestamp",
+    "payment_date": "payment_timestamp",
+    "room_number": "room_code",
+}
+
+
+def create_schema(conninfo: str = "", schema_path: str = SCHEMA_PATH) -> None:
+    """Create the SIAK tables if they do not exist yet"""
+    with open(schema_path) as f:
+        schema_sql = f.read()
+    with psycopg.connect(conninfo) as conn:
+        conn.execute(schema_sql)
+    logger.info("Database schema created successfully.")
+
+
+def table_columns(conn: psycopg.Connection, table: str) -> List[Tuple]:
+    """(name, udt_name, numeric_precision, numeric_scale) of a table's columns"""
+    return conn.execute(
+        """
+        SELECT column_name, udt_name, numeric_precision, numeric_scale
+        FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = %s
+        ORDER BY ordinal_position
+        """,
+        (table,),
+    ).fetchall()
+
+
+def to_postgres(array: pa.ChunkedArray, udt_name: str, precision, scale) -> list:
+    """Convert a column to the Python values the binary COPY dumper expects"""
+    if pa.types.is_dictionary(array.type):
+        array = array.cast(array.type.value_type)
+    if udt_name in ("int2", "int4", "int8"):
+        array = array.cast(
+            {"int2": pa.int16(), "int4": pa.int32()}.get(udt_name, pa.int64())
+        )
+    elif udt_name == "numeric":
+        scale = scale or 0
+        array = pc.round(array.cast(pa.float64()), scale)
+        array = array.cast(pa.decimal128(precision or 38, scale))
+    elif udt_name == "date":
+        if pa.types.is_string(array.type):
+            array = array.cast(pa.timestamp("s"))
+        array = array.cast(pa.date32())
+    elif udt_name in ("timestamp", "timestamptz"):
+        array = array.cast(pa.timestamp("us"))
+        if udt_name == "timestamptz":
+            array = pc.assume_timezone(array, "UTC")
+    elif udt_name == "time":
+        if pa.types.is_time(array.type):
+            return array.to_pylist()
+        return [None if v is None else time.fromisoformat(v) for v in array.to_pylist()]
+    elif udt_name == "uuid":
+        # arrow.uuid values are converted to uuid.UUID by to_pylist
+        if array.type == pa.uuid():
+            return array.to_pylist()
+        return [None if v is None else uuid.UUID(v) for v in array.to_pylist()]
+    return array.to_pylist()
+
+
+def copy_rows(
+    conn: psycopg.Connection, table: str, columns: List[Tuple], batch: pa.Table
+) -> List[str]:
+    """
+    Binary COPY a batch into a table, matching columns by name (see
+    COLUMN_ALIASES) and dropping the ones the table lacks
+
+    Returns:
+        Names of the copied columns
+    """
+    names, types, values = [], [], []
+    for name, udt_name, precision, scale in columns:
+        source = name if name in batch.column_names else COLUMN_ALIASES.get(name)
+        if source not in batch.column_names:
+            continue
+        names.append(name)
+        types.append(udt_name)
+        values.append(to_postgres(batch.column(source), udt_name, precision, scale))
+
+    statement = sql.SQL("COPY {} ({}) FROM STDIN (FORMAT BINARY)").format(
+        sql.Identifier(table), sql.SQL(", ").join(map(sql.Identifier, names))
+    )
+    with conn.cursor() as cur, cur.copy(statement) as copy:
+        copy.set_types(types)
+        for row in zip(*values):
+            copy.write_row(row)
+    return names
+
+
+def reset_sequence(conn: psycopg.Connection, table: str, columns: List[Tuple]) -> None:
+    """Move a SERIAL id sequence past the ids that were copied in"""
+    if "id" not in [c[0] for c in columns]:
+        return
+    (sequence,) = conn.execute(
+        "SELECT pg_get_serial_sequence(%s, 'id')", (table,)
+    ).fetchone()
+    if sequence is not None:
+        conn.execute(
+            sql.SQL("SELECT setval(%s, GREATEST(MAX(id), 1)) FROM {}").format(
+                sql.Identifier(table)
+            ),
+            (sequence,),
+        )
+
+
+def apply_change_batch(
+    batch: Dict[str, Dict[str, pa.Table]], conninfo: str = ""
+) -> None:
+    """
+    Apply a change batch (see src.generator.changes) in one transaction
+
+    Inserts go in table order, which is foreign key order, and are COPYed in.
+    Updates are COPYed into a temporary table and merged with one
+    UPDATE ... FROM per table. Deletes go last, in reverse table order.
+    """
+    with psycopg.connect(conninfo) as conn:
+        columns = {table: table_columns(conn, table) for table in batch}
+
+        for table, changes in batch.items():
+            if "insert" in changes:
+                copy_rows(conn, table, columns[table], changes["insert"])
+                reset_sequence(conn, table, columns[table])
+
+        for table, changes in batch.items():
+            if "update" not in changes:
+                continue
+            staging = f"{table}_changes"
+            conn.execute(
+                sql.SQL("CREATE TEMP TABLE {} (LIKE {}) ON COMMIT DROP").format(
+                    sql.Identifier(staging), sql.Identifier(table)
+                )
+            )
+            names = copy_rows(conn, staging, columns[table], changes["update"])
+            conn.execute(
+                sql.SQL("UPDATE {} AS t SET {} FROM {} AS s WHERE t.id = s.id").format(
+                    sql.Identifier(table),
+                    sql.SQL(", ").join(
+                        sql.SQL("{0} = s.{0}").format(sql.Identifier(name))
+                        for name in names
+                        if name != "id"
+                    ),
+                    sql.Identifier(staging),
+                )
+            )
+
+        for table, changes in reversed(batch.items()):
+            if "delete" in changes:
+                conn.execute(
+                    sql.SQL("DELETE FROM {} WHERE id = ANY(%s)").format(
+                        sql.Identifier(table)
+                    ),
+                    (changes["delete"].column("id").to_pylist(),),
+                )
+
+    counts = {
+        table: {op: rows.num_rows for op, rows in changes.items()}
+        for table, changes in batch.items()
+        if changes
+    }
+    logger.info(f"Applied change batch: {counts}")
+
+
+class CopyWriter:
+    """
+    Stream Arrow batches into one Postgres table with binary COPY.
+
+    Batches are handed to a background thread through a bounded queue, so
+    generation blocks instead of buffering when the database falls behind.
+    Every batch is committed on its own; a writer with a parent (e.g.
+    grades -> registrations) waits until the parent committed the batch with
+    the same sequence number, which keeps foreign keys satisfied while the
+    tables load concurrently.
+
+    Columns are matched to the target table by name (see COLUMN_ALIASES);
+    generator columns the table lacks are dropped.
+    """
+
+    def __init__(
+        self,
+        table: str,
+        conninfo: str = "",
+        parent: Optional["CopyWriter"] = None,
+        queue_size: int = 2,
+    ):
+        self.table = table
+        self.conninfo = conninfo
+        self.parent = parent
+        self.rows = 0
+        self.committed = 0
+        self.error: Optional[BaseException] = None
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name=f"copy-{table}")
+        self._thread.start()
+
+    def write(self, table: pa.Table) -> None:
+        if self.error is not None:
+            raise RuntimeError(f"COPY into {self.table} failed") from self.error
+        self._queue.put(table)
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+        if self.error is not None:
+            raise RuntimeError(f"COPY into {self.table} failed") from self.error
+        logger.info(f"Copied {self.rows} records into {self.table}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def wait_for(self, sequence: int) -> None:
+        """Block until `sequence` batches have been committed"""
+        with self._condition:
+            while self.committed < sequence and self.error is None:
+                self._condition.wait()
+        if self.error is not None:
+            raise RuntimeError(f"COPY into {self.table} failed") from self.error
+
+    def _run(self) -> None:
+        closed = False
+        try:
+            with psycopg.connect(self.conninfo) as conn:
+                columns = table_columns(conn, self.table)
+                while (batch := self._queue.get()) is not None:
+                    if self.parent is not None:
+                        self.parent.wait_for(self.committed + 1)
+                    # Empty batches still count, sequence numbers stay aligned
+                    # with the parent's
+                    if batch.num_rows:
+                        self._copy(conn, columns, batch)
+                        conn.commit()
+                    with self._condition:
+                        self.committed += 1
+                        self._condition.notify_all()
+                closed = True
+                self._reset_sequence(conn, columns)
+        except BaseException as e:
+            logger.error(f"❌ COPY into {self.table} failed: {e}")
+            with self._condition:
+                self.error = e
+                self._condition.notify_all()
+            # Keep draining so producers never block on a dead writer, unless
+            # close() already queued its None and nothing else will come
+            while not closed and self._queue.get() is not None:
+                pass
+
+    def _copy(self, conn: psycopg.Connection, columns: List[Tuple], batch) -> None:
+        copy_rows(conn, self.table, columns, batch)
+        self.rows += batch.num_rows
+
+    def _reset_sequence(self, conn: psycopg.Connection, columns: List[Tuple]) -> None:
+        reset_sequence(conn, self.table, columns)
+        conn.commit()
@@ -0,0 +1,285 @@
+import json
+import logging
+import os
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pyarrow import csv
+
+from src.generator.columnar import UUID_TYPE, cast_array
+
+logger = logging.getLogger(__name__)
+
+# Codecs for the text formats, by file suffix
+TEXT_COMPRESSION = {"gzip": "gz", "zstd": "zst"}
+PARQUET_COMPRESSION = ["snappy", "zstd", "gzip", "lz4", "brotli", "none"]
+
+
+class WriterOptions(NamedTuple):
+    # gzip/zstd for CSV and JSON, any PARQUET_COMPRESSION codec for Parquet
+    compression: Optional[str] = None
+    # Parquet only
+    compression_level: Optional[int] = None
+    row_group_size: Optional[int] = None  # default: one row group per batch
+    use_dictionary: bool = True
+    data_page_size: Optional[int] = None  # bytes
+
+
+class BatchWriter:
+    """
+    Append Arrow batches to a single output file without holding the whole
+    table in memory. The schema is taken from the first non-empty batch and
+    later batches are cast to it.
+    """
+
+    extension = ""
+
+    def __init__(
+        self, output_dir: str, file_name: str, options: Optional[WriterOptions] = None
+    ):
+        os.makedirs(output_dir, exist_ok=True)
+        self.options = options or WriterOptions()
+        self.filepath = os.path.join(output_dir, f"{file_name}.{self.extension}")
+        self.schema: Optional[pa.Schema] = None
+        self.rows = 0
+
+    def write(self, table: pa.Table) -> None:
+        if table.num_rows == 0:
+            return
+        if self.schema is None:
+            self.schema = table.schema
+            self._open()
+        elif table.schema != self.schema:
+            table = table.cast(self.schema)
+        self._write(table)
+        self.rows += table.num_rows
+
+    def close(self) -> None:
+        self._close()
+        logger.info(f"Saved {self.rows} records to {self.filepath}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _open(self) -> None:
+        pass
+
+    def _write(self, table: pa.Table) -> None:
+        raise NotImplementedError
+
+    def _close(self) -> None:
+        pass
+
+
+class TextBatchWriter(BatchWriter):
+    """
+    A writer of a text format, optionally gzip or zstd compressed. UUIDs are
+    written as canonical strings.
+    """
+
+    def __init__(
+        self, output_dir: str, file_name: str, options: Optional[WriterOptions] = None
+    ):
+        super().__init__(output_dir, file_name, options)
+        compression = self.options.compression
+        if compression not in (None, "none", *TEXT_COMPRESSION):
+            raise ValueError(f"Unsupported {self.extension} compression: {compression}")
+        self.compression = None if compression == "none" else compression
+        if self.compression:
+            self.filepath += f".{TEXT_COMPRESSION[self.compression]}"
+
+    def write(self, table: pa.Table) -> None:
+        super().write(text_table(table))
+
+    def _open_stream(self) -> pa.NativeFile:
+        stream = pa.OSFile(self.filepath, "wb")
+        if self.compression:
+            stream = pa.CompressedOutputStream(stream, self.compression)
+        return stream
+
+
+class ParquetBatchWriter(BatchWriter):
+    """Each batch becomes one Parquet row group, unless row_group_size is set"""
+
+    extension = "parquet"
+
+    def _open(self) -> None:
+        self._writer = pq.ParquetWriter(
+            self.filepath, self.schema, **parquet_options(self.options)
+        )
+
+    def _write(self, table: pa.Table) -> None:
+        self._writer.write_table(
+            table, row_group_size=self.options.row_group_size or table.num_rows
+        )
+
+    def _close(self) -> None:
+        if self.schema is not None:
+            self._writer.close()
+
+
+class CsvBatchWriter(TextBatchWriter):
+    extension = "csv"
+
+    def _open(self) -> None:
+        self._stream = self._open_stream()
+        self._writer = csv.CSVWriter(self._stream, self.schema)
+
+    def _write(self, table: pa.Table) -> None:
+        self._writer.write_table(table)
+
+    def _close(self) -> None:
+        if self.schema is not None:
+            self._writer.close()
+            self._stream.close()
+
+
+class JsonBatchWriter(TextBatchWriter):
+    """Newline-delimited JSON, one object per row"""
+
+    extension = "jsonl"
+
+    def _open(self) -> None:
+        self._stream = self._open_stream()
+
+    def _write(self, table: pa.Table) -> None:
+        for batch in table.to_batches():
+            self._stream.write(ndjson_lines(batch))
+
+    def _close(self) -> None:
+        if self.schema is not None:
+            self._stream.close()
+
+
+def parquet_options(options: WriterOptions) -> dict:
+    """ParquetWriter keyword arguments of the writer options"""
+    kwargs = {
+        "compression": options.compression or "snappy",
+        "compression_level": options.compression_level,
+        "use_dictionary": options.use_dictionary,
+    }
+    if kwargs["compression"] not in PARQUET_COMPRESSION:
+        raise ValueError(f"Unsupported parquet compression: {options.compression}")
+    if options.data_page_size:
+        kwargs["data_page_size"] = options.data_page_size
+    return kwargs
+
+
+def text_table(table: pa.Table) -> pa.Table:
+    """A table with its arrow.uuid columns as strings, which text formats lack"""
+    for i, field in enumerate(table.schema):
+        if field.type == UUID_TYPE:
+            table = table.set_column(
+                i, field.name, cast_array(table.column(i), pa.string())
+            )
+    return table
+
+
+def json_values(array: pa.Array) -> pa.Array:
+    """A column as JSON value literals, null for nulls"""
+    if pa.types.is_dictionary(array.type):
+        array = array.dictionary_decode()
+    if pa.types.is_null(array.type):
+        return pa.array(["null"] * len(array))
+    if pa.types.is_boolean(array.type) or pa.types.is_integer(array.type):
+        values = array.cast(pa.string())
+    elif pa.types.is_floating(array.type):
+        # NaN and infinity have no JSON literal
+        values = pc.if_else(pc.is_finite(array), array.cast(pa.string()), None)
+    elif pa.types.is_decimal(array.type):
+        values = array.cast(pa.string())
+    else:
+        # Strings, and dates/times/timestamps as str() of their Python value
+        strings = array.cast(pa.string())
+        escaped = pc.replace_substring(strings, "\\", "\\\\")
+        escaped = pc.replace_substring(escaped, '"', '\\"')
+        values = pc.binary_join_element_wise('"', escaped, '"', "")
+        # Control characters are rare, leave them to the json module
+        control = pc.fill_null(
+            pc.match_substring_regex(strings, "[\\x00-\\x1f]"), False
+        )
+        if pc.any(control).as_py():
+            rows = np.flatnonzero(control.to_numpy(zero_copy_only=False))
+            fixed = values.to_pylist()
+            for row in rows:
+                fixed[row] = json.dumps(strings[row].as_py(), ensure_ascii=False)
+            values = pa.array(fixed, pa.string())
+    return pc.fill_null(values, "null")
+
+
+def ndjson_lines(batch: pa.RecordBatch) -> pa.Buffer:
+    """
+    Serialize a batch to newline-delimited JSON with Arrow kernels: every
+    column is turned into JSON literals, then joined row-wise with the keys
+    """
+    if batch.num_rows == 0:
+        return pa.py_buffer(b"")
+    parts = []
+    for i, name in enumerate(batch.schema.names):
+        prefix = "{" if i == 0 else ","
+        parts += [f"{prefix}{json.dumps(name)}:", json_values(batch.column(i))]
+    parts.append("}\n")
+    lines = pc.binary_join_element_wise(*parts, "")
+    if isinstance(lines, pa.ChunkedArray):
+        lines = lines.combine_chunks()
+    # The joined strings are one contiguous UTF-8 buffer
+    offset_type = np.int64 if pa.types.is_large_string(lines.type) else np.int32
+    offsets = np.frombuffer(lines.buffers()[1], dtype=offset_type)
+    start, stop = offsets[lines.offset], offsets[lines.offset + len(lines)]
+    return lines.buffers()[2][start:stop]
+
+
+WRITERS = {
+    "parquet": ParquetBatchWriter,
+    "csv": CsvBatchWriter,
+    "json": JsonBatchWriter,
+}
+
+
+def open_writer(
+    save_format: str,
+    output_dir: str,
+    file_name: str,
+    options: Optional[WriterOptions] = None,
+) -> BatchWriter:
+    """Get a batch writer for the given output format"""
+    if save_format not in WRITERS:
+        raise ValueError(f"Unsupported output format: {save_format}")
+    return WRITERS[save_format](output_dir, file_name, options)
+
+
+def write_partitioned(
+    table: pa.Table,
+    output_dir: str,
+    partition_by: str,
+    part: str,
+    options: Optional[WriterOptions] = None,
+) -> None:
+    """
+    Write a table as Hive-partitioned Parquet, <output_dir>/<column>=<value>/,
+    adding <part>-<n>.parquet files next to the ones already there.
+    """
+    if table.num_rows == 0:
+        return
+    options = options or WriterOptions()
+    kwargs = parquet_options(options)
+    parquet_format = ds.ParquetFileFormat()
+    ds.write_dataset(
+        table,
+        output_dir,
+        format=parquet_format,
+        file_options=parquet_format.make_write_options(**kwargs),
+        partitioning=[partition_by],
+        partitioning_flavor="hive",
+        basename_template=f"{part}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        max_rows_per_group=options.row_group_size or 1024 * 1024,
+    )
+    logger.info(f"Saved {table.num_rows} records to {output_dir}")